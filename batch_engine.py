@@ -0,0 +1,122 @@
+"""
+Concurrent batch execution engine
+Thread-pool fan-out with rate limiting and jittered retries for model calls
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls evenly to stay under a per-minute budget"""
+
+    def __init__(self, requests_per_minute: Optional[float] = None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the next request slot is available"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Return True for rate-limit (429) and server-side (5xx) errors"""
+    for attr in ("code", "status_code", "status"):
+        code = getattr(exc, attr, None)
+        if callable(code):
+            try:
+                code = code()
+            except Exception:
+                continue
+        try:
+            code = int(code)
+        except (TypeError, ValueError):
+            continue
+        return code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def retry_with_backoff(
+    fn: Callable,
+    *args,
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    rate_limiter: Optional[RateLimiter] = None,
+    retry_on: Callable[[Exception], bool] = is_retryable,
+):
+    """Call fn(*args), retrying retryable errors with full-jitter exponential backoff"""
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return fn(*args)
+        except Exception as e:
+            if attempt >= max_retries or not retry_on(e):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+            attempt += 1
+
+
+def run_concurrent(
+    items: list,
+    fn: Callable,
+    max_workers: int = 8,
+    requests_per_minute: Optional[float] = None,
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+    on_error: Optional[Callable] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> list:
+    """
+    Apply fn to every item using a thread pool and return results in input order.
+
+    At most max_workers calls are in flight at once and requests_per_minute caps the
+    overall start rate. Retryable errors (429/5xx) are retried with jittered backoff;
+    when an item still fails, on_error(item, exc) supplies its result (or the error
+    is raised if no handler is given). progress_callback(done, total) is invoked from
+    the calling thread, so it is safe to update Streamlit widgets from it.
+    """
+    total = len(items)
+    results = [None] * total
+    if not total:
+        return results
+
+    limiter = RateLimiter(requests_per_minute)
+
+    def run_one(item):
+        try:
+            return retry_with_backoff(
+                fn, item,
+                max_retries=max_retries,
+                base_delay=base_delay,
+                rate_limiter=limiter,
+            )
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(item, e)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as executor:
+        futures = {executor.submit(run_one, item): idx for idx, item in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress_callback is not None:
+                progress_callback(done, total)
+
+    return results
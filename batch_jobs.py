@@ -0,0 +1,335 @@
+"""
+Background batch jobs
+SQLite job table with per-row checkpoints and a resumable background worker thread
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# A running job whose owner has not renewed its lease for this long may be claimed by another runner
+JOB_LEASE_SECONDS = 300
+
+
+def job_id_for(raw_inputs: list) -> str:
+    """Content-addressed job id: the same inputs always map to the same job"""
+    digest = hashlib.sha256()
+    for raw_input in raw_inputs:
+        digest.update(str(raw_input).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:16]
+
+
+class JobStore:
+    """
+    Jobs and their per-row results, persisted in SQLite so they survive restarts.
+
+    Runners claim a job by setting its owner and heartbeat_at with a conditional
+    UPDATE, so several processes (or replicas sharing the file) never work on the
+    same job; a running job is only taken over once its owner's lease has expired.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS batch_jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                settings TEXT,
+                error TEXT,
+                owner TEXT,
+                heartbeat_at REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS batch_job_rows (
+                job_id TEXT NOT NULL,
+                row_idx INTEGER NOT NULL,
+                raw_input TEXT NOT NULL,
+                result TEXT,
+                PRIMARY KEY (job_id, row_idx)
+            );
+            CREATE INDEX IF NOT EXISTS idx_batch_job_rows_pending
+                ON batch_job_rows(job_id, row_idx) WHERE result IS NULL;
+        """)
+        # Upgrade job databases created before leases existed
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(batch_jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE batch_jobs ADD COLUMN {column} {kind}")
+
+    def create_job(self, raw_inputs: list, name: str = "", settings: Optional[dict] = None) -> str:
+        """
+        Register a job and return its id.
+
+        Re-submitting the same inputs returns the existing job: finished rows keep
+        their results and only unfinished rows are queued again.
+        """
+        job_id = job_id_for(raw_inputs)
+        now = time.time()
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT status, done, total FROM batch_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            self._conn.execute("BEGIN")
+            if existing is None:
+                self._conn.execute(
+                    "INSERT INTO batch_jobs (id, name, status, total, settings, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, name, QUEUED, len(raw_inputs), json.dumps(settings or {}), now, now),
+                )
+                self._conn.executemany(
+                    "INSERT INTO batch_job_rows (job_id, row_idx, raw_input) VALUES (?, ?, ?)",
+                    [(job_id, idx, str(raw_input)) for idx, raw_input in enumerate(raw_inputs)],
+                )
+            elif existing["done"] < existing["total"] and existing["status"] not in ACTIVE_STATUSES:
+                self._conn.execute(
+                    "UPDATE batch_jobs SET status = ?, settings = ?, error = NULL, owner = NULL, updated_at = ? "
+                    "WHERE id = ?",
+                    (QUEUED, json.dumps(settings or {}), now, job_id),
+                )
+            self._conn.execute("COMMIT")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM batch_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM batch_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def next_active_job(self) -> Optional[dict]:
+        """Oldest queued or running job, whoever owns it (use claim_job to work on one)"""
+        placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT * FROM batch_jobs WHERE status IN ({placeholders}) ORDER BY created_at LIMIT 1",
+                ACTIVE_STATUSES,
+            ).fetchone()
+        return dict(row) if row else None
+
+    def claim_job(self, owner: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[dict]:
+        """
+        Mark the oldest claimable job as running under owner and return it.
+
+        Claimable means queued, or running with no owner or an expired lease (its
+        runner died). The claim is a conditional UPDATE, so when two runners race for
+        the same job only one of them gets it; the other moves on to the next one.
+        """
+        claimable = (
+            "(status = ? OR (status = ? AND (owner IS NULL OR heartbeat_at IS NULL OR heartbeat_at < ?)))"
+        )
+        while True:
+            now = time.time()
+            params = (QUEUED, RUNNING, now - lease_seconds)
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT id FROM batch_jobs WHERE {claimable} ORDER BY created_at LIMIT 1", params
+                ).fetchone()
+                if row is None:
+                    return None
+                claimed = self._conn.execute(
+                    f"UPDATE batch_jobs SET status = ?, owner = ?, heartbeat_at = ?, error = NULL, updated_at = ? "
+                    f"WHERE id = ? AND {claimable}",
+                    (RUNNING, owner, now, now, row["id"]) + params,
+                ).rowcount
+            if claimed:
+                return self.get_job(row["id"])
+
+    def renew_lease(self, job_id: str, owner: str) -> bool:
+        """Extend owner's lease on a running job; False once it was cancelled or taken over"""
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE batch_jobs SET heartbeat_at = ?, updated_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (now, now, job_id, RUNNING, owner),
+            ).rowcount == 1
+
+    def finish(self, job_id: str, owner: str, status: str, error: Optional[str] = None) -> bool:
+        """
+        Move owner's running job to status and release it.
+
+        Does nothing (and returns False) if the job is no longer running under owner,
+        so a cancel that lands mid-chunk is never overwritten.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE batch_jobs SET status = ?, error = ?, owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND owner = ?",
+                (status, error, time.time(), job_id, RUNNING, owner),
+            ).rowcount == 1
+
+    def cancel_job(self, job_id: str) -> None:
+        """Cancel a queued or running job; its runner stops after the chunk in flight"""
+        placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE batch_jobs SET status = ?, owner = NULL, updated_at = ? "
+                f"WHERE id = ? AND status IN ({placeholders})",
+                (CANCELLED, time.time(), job_id) + ACTIVE_STATUSES,
+            )
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Set status unconditionally and release any owner (for cancel and resume)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batch_jobs SET status = ?, error = ?, owner = NULL, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def pending_rows(self, job_id: str, limit: int) -> list:
+        """Next (row_idx, raw_input) pairs that have no checkpointed result"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_idx, raw_input FROM batch_job_rows "
+                "WHERE job_id = ? AND result IS NULL ORDER BY row_idx LIMIT ?",
+                (job_id, limit),
+            ).fetchall()
+        return [(row["row_idx"], row["raw_input"]) for row in rows]
+
+    def checkpoint(self, job_id: str, results: list) -> None:
+        """Persist (row_idx, result) pairs and advance the job's done counter atomically"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE batch_job_rows SET result = ? WHERE job_id = ? AND row_idx = ? AND result IS NULL",
+                [(json.dumps(result), job_id, row_idx) for row_idx, result in results],
+            )
+            self._conn.execute(
+                "UPDATE batch_jobs SET done = (SELECT COUNT(*) FROM batch_job_rows "
+                "WHERE job_id = ? AND result IS NOT NULL), updated_at = ? WHERE id = ?",
+                (job_id, time.time(), job_id),
+            )
+            self._conn.execute("COMMIT")
+
+    def iter_results(self, job_id: str, batch_size: int = 1000, with_row_idx: bool = False):
+        """Yield finished results in row order, batch_size at a time (as (row_idx, result) pairs if with_row_idx)"""
+        last_idx = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT row_idx, result FROM batch_job_rows "
+                    "WHERE job_id = ? AND row_idx > ? AND result IS NOT NULL ORDER BY row_idx LIMIT ?",
+                    (job_id, last_idx, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            if with_row_idx:
+                yield [(row["row_idx"], json.loads(row["result"])) for row in rows]
+            else:
+                yield [json.loads(row["result"]) for row in rows]
+            last_idx = rows[-1]["row_idx"]
+
+
+class JobRunner:
+    """
+    Daemon thread that works through active jobs chunk by chunk.
+
+    classify_fn(raw_inputs, settings) must return one result dict per input, or None
+    for inputs that failed. Every chunk is checkpointed before the next starts, so a
+    crash or restart loses at most the chunk in flight, and jobs left running by a
+    runner that stopped renewing its lease are taken over once lease_seconds pass
+    (so lease_seconds must comfortably exceed the time one chunk takes). A chunk with
+    failures stops the job as failed; resuming it retries only the rows without a
+    checkpointed result.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        classify_fn: Callable,
+        chunk_rows: int = 50,
+        poll_seconds: float = 5.0,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ):
+        self.store = store
+        self.classify_fn = classify_fn
+        self.chunk_rows = chunk_rows
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="batch-job-runner", daemon=True)
+        self._thread.start()
+
+    def submit(self, raw_inputs: list, name: str = "", settings: Optional[dict] = None) -> str:
+        """Queue a job (or resume an identical one) and wake the worker"""
+        job_id = self.store.create_job(raw_inputs, name=name, settings=settings)
+        self._wake.set()
+        return job_id
+
+    def cancel(self, job_id: str) -> None:
+        """Stop a job after its current chunk; it can be resumed by re-submitting"""
+        self.store.cancel_job(job_id)
+
+    def resume(self, job_id: str) -> None:
+        """Re-queue a cancelled or failed job from its last checkpoint"""
+        job = self.store.get_job(job_id)
+        if job and job["status"] not in ACTIVE_STATUSES and job["done"] < job["total"]:
+            self.store.set_status(job_id, QUEUED)
+            self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            job = self.store.claim_job(self.owner, self.lease_seconds)
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            try:
+                self._process(job)
+            except Exception as e:
+                logger.exception("Batch job %s failed", job["id"])
+                self.store.finish(job["id"], self.owner, FAILED, error=str(e))
+
+    def _process(self, job: dict) -> None:
+        job_id = job["id"]
+        settings = json.loads(job["settings"] or "{}")
+        while True:
+            # Stops here once the job was cancelled or another runner took it over
+            if not self.store.renew_lease(job_id, self.owner):
+                return
+            rows = self.store.pending_rows(job_id, self.chunk_rows)
+            if not rows:
+                self.store.finish(job_id, self.owner, COMPLETED)
+                return
+            results = self.classify_fn([raw_input for _, raw_input in rows], settings)
+            finished = [
+                (row_idx, result)
+                for (row_idx, _), result in zip(rows, results)
+                if result is not None
+            ]
+            self.store.checkpoint(job_id, finished)
+            if len(finished) < len(rows):
+                self.store.finish(
+                    job_id, self.owner, FAILED, error=f"{len(rows) - len(finished)} rows failed; resume to retry them"
+                )
+                return
@@ -0,0 +1,52 @@
+"""
+Batch engine throughput benchmark
+Runs run_concurrent against a mocked model client with fixed latency and shows
+throughput scaling with concurrency until the rate limit caps it.
+
+Usage: python benchmarks/bench_batch_engine.py [--rows 200] [--latency 0.2] [--rpm 3000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_engine import run_concurrent
+
+
+def mock_model_call(latency: float):
+    """Return a fake classification call that sleeps like a network round trip"""
+    def call(raw_input: str) -> dict:
+        time.sleep(latency)
+        return {"category": "Cloud Services", "vendor": None, "enriched_description": raw_input}
+    return call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock model latency in seconds")
+    parser.add_argument("--rpm", type=float, default=3000, help="Rate limit in requests/min (0 = none)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    inputs = [f"Transaction {i}" for i in range(args.rows)]
+    call = mock_model_call(args.latency)
+    ceiling = args.rpm / 60 if args.rpm else float("inf")
+
+    print(f"rows={args.rows} latency={args.latency}s rate_limit={args.rpm or 'none'} rpm "
+          f"(ceiling {ceiling:.1f} req/s)")
+    print(f"{'workers':>8} {'seconds':>9} {'req/s':>9} {'ideal':>9}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        results = run_concurrent(inputs, call, max_workers=workers, requests_per_minute=args.rpm or None)
+        elapsed = time.perf_counter() - start
+        assert [r["enriched_description"] for r in results] == inputs, "results out of order"
+        ideal = min(workers / args.latency, ceiling)
+        print(f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>9.1f} {ideal:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+fp32 vs INT8 benchmark for the local spend classifier
+Compares latency at batch sizes 1/8/64, throughput, serialized model size and
+test-set accuracy/F1 (the notebook's compute_metrics).
+
+Run python quantize_bert.py first to produce the INT8 weights.
+Usage: python benchmarks/bench_bert_int8.py [--model ./bert-spend-cls-final] [--test-csv test.csv]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import torch
+
+from bert_classifier import BertSpendClassifier, compute_metrics, quantized_model_available
+
+SAMPLE_TEXTS = [
+    "Appl Inc. IT Eqpt PO-4532 10K",
+    "Consulting services - annual review",
+    "Flight tickets from New York to Chicago",
+    "Uber ride to client office 2024-03-14",
+    "AWS monthly invoice INV-99812",
+    "Team lunch at Dominos",
+    "Adobe Creative Cloud annual subscription",
+    "Office Depot printer paper and toner",
+]
+
+
+def model_size_mb(model) -> float:
+    """Size of the serialized state dict in MB"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+
+def batch_latency_ms(classifier, texts: list, batch_size: int, repeats: int) -> float:
+    """Median wall time in ms to classify one batch of batch_size texts"""
+    batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        classifier.logits(batch, batch_size=batch_size)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("LOCAL_MODEL_PATH", "./bert-spend-cls-final"))
+    parser.add_argument("--test-csv", default="test.csv", help="CSV with 'Raw Input' and 'Category' columns")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if not quantized_model_available(args.model):
+        sys.exit(f"No INT8 export in {args.model}; run python quantize_bert.py --model {args.model}")
+
+    test_df = pd.read_csv(args.test_csv) if os.path.isfile(args.test_csv) else None
+    texts = test_df["Raw Input"].astype(str).tolist() if test_df is not None else SAMPLE_TEXTS * 64
+
+    rows = []
+    for name, quantized in (("fp32", False), ("int8", True)):
+        classifier = BertSpendClassifier(args.model, num_threads=args.threads, quantized=quantized)
+        classifier.logits(SAMPLE_TEXTS)  # warm-up
+
+        row = {"model": name, "size_mb": round(model_size_mb(classifier.model), 1)}
+        for batch_size in (1, 8, 64):
+            row[f"ms@bs{batch_size}"] = round(batch_latency_ms(classifier, texts, batch_size, args.repeats), 2)
+
+        start = time.perf_counter()
+        logits = classifier.logits(texts, batch_size=64)
+        row["texts/s"] = round(len(texts) / (time.perf_counter() - start), 1)
+
+        if test_df is not None:
+            label2id = classifier.model.config.label2id
+            known = test_df["Category"].isin(label2id).to_numpy()
+            labels = test_df.loc[known, "Category"].map(label2id).to_numpy()
+            metrics = compute_metrics((logits.numpy()[known], labels))
+            row["accuracy"] = round(metrics["accuracy"], 4)
+            row["f1"] = round(metrics["f1"], 4)
+
+        rows.append(row)
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    if test_df is None:
+        print(f"\n{args.test_csv} not found: latency measured on sample texts, accuracy skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Near-duplicate signature benchmark
+Generates transactions from a fixed set of templates with varying PO/invoice numbers,
+amounts and dates, then reports signature throughput and how many rows would still
+need a model call with exact-match deduplication versus signature clustering.
+
+Usage: python benchmarks/bench_near_duplicates.py [--rows 100000] [--templates 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import group_by_signature
+from spend_core import CATEGORY_VENDOR_MAP
+
+ITEMS = ["Eqpt", "license renewal", "consulting fees", "cab ride", "team lunch", "hosting", "stationery"]
+LAYOUTS = [
+    "{vendor} {item} PO-{po} {amount}K",
+    "{vendor} {item} INV#{po} ${amount},{cents:03d}.00 on {date}",
+    "Payment to {vendor} for {item} - invoice no. {po} - {amount} USD",
+    "{vendor} {item} ref: AB-{po} {date_long}",
+]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def synthetic_rows(rows: int, templates: int, rng: random.Random) -> list:
+    vendors = list(CATEGORY_VENDOR_MAP.values())
+    shapes = [
+        (rng.choice(LAYOUTS), f"{rng.choice(vendors)} {rng.choice(['', 'Inc.', 'Ltd', 'Store'])}".strip(), rng.choice(ITEMS))
+        for _ in range(templates)
+    ]
+    out = []
+    for _ in range(rows):
+        layout, vendor, item = rng.choice(shapes)
+        out.append(layout.format(
+            vendor=vendor,
+            item=item,
+            po=rng.randint(1000, 99999),
+            amount=rng.randint(1, 999),
+            cents=rng.randint(0, 999),
+            date=f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            date_long=f"{rng.randint(1, 28)} {rng.choice(MONTHS)} 2024",
+        ))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--templates", type=int, default=200, help="Distinct transaction patterns")
+    args = parser.parse_args()
+
+    texts = synthetic_rows(args.rows, args.templates, random.Random(42))
+
+    start = time.perf_counter()
+    signatures, _, _ = group_by_signature(texts)
+    elapsed = time.perf_counter() - start
+
+    exact = len(set(texts))
+    print(f"rows:                 {len(texts):,}")
+    print(f"signature time:       {elapsed:.2f}s ({len(texts) / elapsed:,.0f} rows/sec)")
+    print(f"exact-match distinct: {exact:,} ({exact / len(texts):.3f} per row)")
+    print(f"unique signatures:    {len(signatures):,} ({len(signatures) / len(texts):.4f} per row)")
+
+
+if __name__ == "__main__":
+    main()
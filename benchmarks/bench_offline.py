@@ -0,0 +1,199 @@
+"""
+Offline end-to-end benchmark suite
+Runs the pipeline with no network access: Gemini is replaced by FakeGeminiModel and
+Supabase by LocalSupabase (SQLite with the classifications table and rollups from
+supabase_setup.sql), both from benchmarks/offline.py. At each size it times batch
+classification, save_to_supabase, load_from_supabase, the analytics derivations,
+date extraction, fuzzy_correct_vendor and the CSV/Excel/Parquet/Arrow/PDF exports.
+
+Per-row helpers (extract_date, fuzzy_correct_vendor) are timed on a sample of
+--per-row-sample rows and reported per call; everything else runs on the full size.
+The fake model's latency defaults to 0 so the numbers measure this code, not the mock.
+
+Results are written as JSON. Pass a previous results file as --baseline to flag cases
+that got slower than --tolerance allows; the exit status is 1 when any did.
+
+Usage: python benchmarks/bench_offline.py [--sizes 1000 100000 1000000] [--output bench_offline.json]
+                                          [--baseline previous.json] [--tolerance 0.25]
+                                          [--model-latency 0] [--error-rate 0] [--db-latency 0]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the classification cache out of the working tree; must be set before spend_core loads
+os.environ.setdefault("CLASSIFICATION_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_offline_"), "cache.db"))
+
+import pandas as pd
+
+import spend_core
+from bench_near_duplicates import synthetic_rows
+from exports import EXPORT_FORMATS
+from offline import FakeGeminiModel, LocalSupabase
+
+# Rows in the discarded warm-up pass that loads every lazily imported module first
+WARMUP_ROWS = 200
+
+# Regressions smaller than this many seconds are treated as noise
+MIN_REGRESSION_SECONDS = 0.05
+
+# Texts whose first match of a layout is not a valid date; both date extractors must
+# give up on that layout rather than read a later match
+DATE_EDGE_CASES = [
+    "bad 2024-13-45 then 2024-01-02",
+    "a 99/99/2024 b 01/02/2024",
+    "Paid 31/12/2024 rent",
+    "Order 2024-03-05 shipped 04/06/2024",
+    "no date here",
+]
+
+VENDOR_TYPOS = ["Amazn Web Services", "Ubr", "Adobee", "Microsft", "Taj Hotel", "Starbuks", "Dell Technologes"]
+
+
+def run_case(results: list, case: str, rows: int, func, items: int = None):
+    """Time func() once, append the result record and return func's return value"""
+    start = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - start
+    items = rows if items is None else items
+    results.append({
+        "case": case,
+        "rows": rows,
+        "items": items,
+        "seconds": round(seconds, 6),
+        "us_per_item": round(1e6 * seconds / items, 3) if items else None,
+    })
+    print(f"{case:<28} {rows:>10,} rows  {seconds:>9.3f}s  {1e6 * seconds / items if items else 0:>10.2f} us/item")
+    return value
+
+
+def bench_size(rows: int, args, results: list) -> None:
+    rng = random.Random(rows)
+    texts = synthetic_rows(rows, args.templates, rng)
+
+    model = FakeGeminiModel(latency=args.model_latency, jitter=args.model_jitter, error_rate=args.error_rate)
+    db = LocalSupabase(latency=args.db_latency)
+    spend_core.get_gemini_model = lambda: model
+    spend_core.get_supabase = lambda: db
+    spend_core.get_classification_cache().clear()
+
+    classified, _ = run_case(results, "classify_transactions", rows, lambda: spend_core.classify_transactions(
+        texts,
+        max_workers=args.workers,
+        batch_size=spend_core.GEMINI_BATCH_SIZE,
+        tiers=spend_core.build_classifier_tiers(False),
+        cluster=not args.no_cluster,
+    ))
+    results[-1]["model_calls"] = model.calls
+
+    run_case(results, "save_to_supabase", rows, lambda: spend_core.save_to_supabase(classified))
+    df = run_case(results, "load_from_supabase", rows, lambda: spend_core.load_from_supabase(limit=None))
+
+    run_case(results, "summarize_classifications", rows, lambda: spend_core.summarize_classifications(df))
+    run_case(results, "fetch_analytics_summary", rows, spend_core.fetch_analytics_summary)
+    run_case(results, "extract_dates", rows, lambda: spend_core.extract_dates(pd.Series(texts, dtype=object)))
+
+    sample = min(rows, args.per_row_sample)
+    per_row_dates = run_case(results, "extract_date", rows, lambda: [spend_core.extract_date(text) for text in texts[:sample]], items=sample)
+    check_dates = texts[:sample] + DATE_EDGE_CASES
+    vectorized = spend_core.extract_dates(pd.Series(check_dates, dtype=object)).tolist()
+    per_row = per_row_dates + [spend_core.extract_date(text) for text in DATE_EDGE_CASES]
+    assert [None if pd.isna(d) else d for d in vectorized] == per_row, "extract_dates and extract_date disagree"
+    vendors = [rng.choice(VENDOR_TYPOS) for _ in range(sample)]
+    spend_core.get_vendor_index()
+    run_case(results, "fuzzy_correct_vendor", rows, lambda: [spend_core.fuzzy_correct_vendor(v) for v in vendors], items=sample)
+
+    for fmt, (build, _) in EXPORT_FORMATS.items():
+        run_case(results, f"export_{fmt}", rows, lambda: build(df))
+    run_case(results, "export_pdf", rows, lambda: spend_core.create_pdf_report(df, "Benchmark Report"))
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(results: list, baseline: list, tolerance: float) -> list:
+    """Cases slower than the baseline by more than tolerance (and MIN_REGRESSION_SECONDS)"""
+    previous = {(r["case"], r["rows"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["case"], result["rows"]))
+        if before is None or before["items"] != result["items"]:
+            continue
+        slowdown = result["seconds"] - before["seconds"]
+        if slowdown > MIN_REGRESSION_SECONDS and result["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append({**result, "baseline_seconds": before["seconds"], "ratio": round(result["seconds"] / before["seconds"], 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--templates", type=int, default=200, help="Distinct transaction patterns in the synthetic data")
+    parser.add_argument("--workers", type=int, default=spend_core.BATCH_MAX_WORKERS)
+    parser.add_argument("--no-cluster", action="store_true", help="Classify every distinct row instead of one per signature")
+    parser.add_argument("--per-row-sample", type=int, default=5_000, help="Rows timed for per-row helpers")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Fake model latency per call in seconds")
+    parser.add_argument("--model-jitter", type=float, default=0.0, help="Extra random latency per call, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake model calls failing with 429/503")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="Simulated database round trip in seconds")
+    parser.add_argument("--output", default="bench_offline.json")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a case counts as a regression")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        bench_size(WARMUP_ROWS, args, [])
+
+    results = []
+    for rows in args.sizes:
+        bench_size(rows, args, results)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        report["regressions"] = find_regressions(results, baseline, args.tolerance)
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression['case']} at {regression['rows']:,} rows: "
+                  f"{regression['baseline_seconds']:.3f}s -> {regression['seconds']:.3f}s ({regression['ratio']}x)")
+        status = 1 if report["regressions"] else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
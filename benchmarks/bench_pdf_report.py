@@ -0,0 +1,113 @@
+"""
+PDF report benchmark
+Times create_pdf_report at 1k, 10k and 100k rows (Unicode font and Latin-1 fallback)
+next to the previous iterrows/multi_cell implementation, which is skipped above
+--legacy-max rows because it takes minutes there.
+
+Usage: python benchmarks/bench_pdf_report.py [--sizes 1000 10000 100000] [--legacy-max 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+from fpdf import FPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_report import build_pdf_report, find_unicode_font
+from spend_core import CATEGORY_VENDOR_MAP, summarize_classifications
+
+DESCRIPTIONS = [
+    "Ride-sharing trip between client office and airport",
+    "Quarterly cloud hosting invoice for production workloads",
+    "Team lunch during the quarterly planning offsite",
+    "Annual design software subscription renewal",
+]
+
+
+def synthetic_results(rows: int, rng: random.Random, unicode_share: float = 0.0) -> pd.DataFrame:
+    """Classification results; unicode_share of vendors get non-Latin-1 names"""
+    records = []
+    for i in range(rows):
+        category, vendor = rng.choice(list(CATEGORY_VENDOR_MAP.items()))
+        if rng.random() < unicode_share:
+            vendor = f"{vendor} 東京支店"
+        records.append({
+            "raw_input": f"INV-{100000 + i} paid {vendor} {rng.randint(10, 5000)} USD on 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "category": category,
+            "vendor": vendor,
+            "enriched_description": rng.choice(DESCRIPTIONS),
+        })
+    return pd.DataFrame(records)
+
+
+def legacy_pdf_report(df: pd.DataFrame, title: str = "Spend Enrichment Report") -> bytes:
+    """The previous create_pdf_report, kept here for comparison"""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, title, ln=True, align="C")
+    pdf.ln(10)
+    pdf.set_font("Arial", "", 9)
+    for idx, row in df.iterrows():
+        pdf.set_font("Arial", "B", 10)
+        pdf.multi_cell(0, 5, f"Transaction {idx + 1}")
+        pdf.set_font("Arial", "", 9)
+        pdf.multi_cell(0, 5, f"Input: {row.get('raw_input', '')[:100]}")
+        pdf.multi_cell(0, 5, f"Category: {row.get('category', '')}  |  Vendor: {row.get('vendor', '')}")
+        pdf.multi_cell(0, 5, f"Description: {row.get('enriched_description', '')}")
+        pdf.ln(3)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        return time.perf_counter() - start, f"{type(e).__name__}"
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000, help="Skip the old implementation above this size")
+    parser.add_argument("--unicode-share", type=float, default=0.05, help="Share of rows with non-Latin vendor names")
+    args = parser.parse_args()
+
+    font_path, bold_font_path = find_unicode_font()
+    if font_path is None:
+        print("No Unicode TrueType font found; the Unicode column uses the Latin-1 fallback")
+
+    rng = random.Random(42)
+    print(f"{'rows':>8} {'unicode s':>10} {'latin-1 s':>10} {'pages':>6} {'MB':>6} {'legacy s':>9} {'legacy w/ unicode':>18}")
+    for size in args.sizes:
+        df = synthetic_results(size, rng, args.unicode_share)
+        summary = summarize_classifications(df)
+
+        unicode_seconds, pdf_bytes = timed(
+            build_pdf_report, df, "Benchmark Report", summary, font_path=font_path, bold_font_path=bold_font_path
+        )
+        latin_seconds, _ = timed(build_pdf_report, df, "Benchmark Report", summary)
+        pages = pdf_bytes.count(b"/Type /Page\n")
+
+        legacy, legacy_unicode = "-", "-"
+        if size <= args.legacy_max:
+            latin_df = df.assign(vendor=df["vendor"].str.replace(" 東京支店", "", regex=False))
+            legacy_seconds, _ = timed(legacy_pdf_report, latin_df)
+            legacy = f"{legacy_seconds:.2f}"
+            _, outcome = timed(legacy_pdf_report, df.head(100))
+            legacy_unicode = "ok" if isinstance(outcome, bytes) else f"fails ({outcome})"
+
+        print(f"{size:>8} {unicode_seconds:>10.2f} {latin_seconds:>10.2f} {pages:>6} "
+              f"{len(pdf_bytes) / 1e6:>6.1f} {legacy:>9} {legacy_unicode:>18}")
+
+
+if __name__ == "__main__":
+    main()
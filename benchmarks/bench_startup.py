@@ -0,0 +1,95 @@
+"""
+Dashboard startup and rerun benchmark
+Runs spend.py headlessly with Streamlit's AppTest in fresh interpreters and reports the
+first script run (time to first paint, including module imports) and the median rerun
+(what every click costs), plus which heavy modules the app imported on its first run.
+
+Dummy credentials are used and no network calls are made on startup. To compare against
+an older revision, check it out elsewhere and pass its spend.py:
+
+    git worktree add /tmp/spend-old HEAD~1
+    python benchmarks/bench_startup.py --app /tmp/spend-old/spend.py
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--reruns 10] [--app spend.py]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["torch", "transformers", "plotly", "fpdf", "openpyxl", "google.generativeai", "supabase"]
+DUMMY_ENV = {
+    "GEMINI_API_KEY": "benchmark",
+    "VITE_SUPABASE_URL": "https://benchmark.supabase.co",
+    "VITE_SUPABASE_ANON_KEY": "bench.mark.key",
+}
+
+
+def measure(app: str, reruns: int) -> dict:
+    """One cold start plus reruns, in the current interpreter"""
+    sys.path.insert(0, os.path.dirname(app))
+    from streamlit.testing.v1 import AppTest
+    # Streamlit itself pulls some of these in; only count what the app adds
+    preloaded = set(sys.modules)
+
+    start = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=120).run()
+    first_run = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    rerun_seconds = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        rerun_seconds.append(time.perf_counter() - start)
+
+    return {
+        "first_run": first_run,
+        "rerun": statistics.median(rerun_seconds) if rerun_seconds else None,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules and name not in preloaded],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "spend.py"))
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts, each in a fresh interpreter")
+    parser.add_argument("--reruns", type=int, default=10, help="Reruns timed after each cold start")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    app = os.path.abspath(args.app)
+
+    if args.child:
+        print(json.dumps(measure(app, args.reruns)))
+        return
+
+    env = {**os.environ, **DUMMY_ENV}
+    samples = []
+    for _ in range(args.runs):
+        # Fresh working directory so local caches and job databases start empty
+        with tempfile.TemporaryDirectory() as workdir:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--app", app, "--reruns", str(args.reruns)],
+                cwd=workdir, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    first_runs = [sample["first_run"] for sample in samples]
+    reruns = [sample["rerun"] for sample in samples if sample["rerun"] is not None]
+    print(f"app: {app}")
+    print(f"first run (time to first paint): median {statistics.median(first_runs) * 1000:.0f} ms, "
+          f"min {min(first_runs) * 1000:.0f} ms over {len(first_runs)} cold starts")
+    if reruns:
+        print(f"rerun (per click):               median {statistics.median(reruns) * 1000:.0f} ms")
+    print(f"heavy modules imported on first run: {', '.join(samples[-1]['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Vendor lookup benchmark
+Shows VendorIndex lookup latency staying flat as the vendor master grows from 10 to
+100k entries, next to difflib.get_close_matches (the previous implementation).
+
+Usage: python benchmarks/bench_vendor_index.py [--queries 500] [--difflib-max 10000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from difflib import get_close_matches
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vendor_index import VendorIndex, normalize_vendor
+
+SYLLABLES = ["ac", "bel", "cor", "dyn", "ex", "fin", "gal", "hex", "ion", "jet", "kin", "lux",
+             "mar", "nov", "omn", "pro", "quo", "ray", "syn", "tek", "uni", "vox", "wav", "zen"]
+SUFFIXES = ["Inc.", "LLC", "Ltd", "Corp", "Group", "Services", "Systems", "Partners", ""]
+
+
+def synthetic_vendors(count: int, rng: random.Random) -> list:
+    """Unique, plausible-looking vendor names"""
+    vendors = set()
+    while len(vendors) < count:
+        stem = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        vendors.add(f"{stem} {rng.choice(SUFFIXES)}".strip())
+    return sorted(vendors)
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """Drop, duplicate or swap one character"""
+    chars = list(name)
+    pos = rng.randrange(len(chars) - 1)
+    edit = rng.choice(("drop", "dup", "swap"))
+    if edit == "drop":
+        del chars[pos]
+    elif edit == "dup":
+        chars.insert(pos, chars[pos])
+    else:
+        chars[pos], chars[pos + 1] = chars[pos + 1], chars[pos]
+    return "".join(chars)
+
+
+def per_lookup_us(lookup, queries: list) -> float:
+    """Median microseconds per lookup"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        lookup(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--difflib-max", type=int, default=10_000, help="Skip difflib above this size")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'vendors':>8} {'build s':>8} {'index us':>9} {'difflib us':>11} {'agree':>6}")
+    for size in args.sizes:
+        vendors = synthetic_vendors(size, rng)
+        queries = [misspell(rng.choice(vendors), rng) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        index = VendorIndex(vendors, memo_size=0)  # memo off: measure raw lookups
+        build_seconds = time.perf_counter() - start
+        index_us = per_lookup_us(index.match, queries)
+
+        difflib_us, agree = "-", "-"
+        if size <= args.difflib_max:
+            normalized = {normalize_vendor(v): v for v in vendors}
+
+            def difflib_lookup(query):
+                matches = get_close_matches(normalize_vendor(query), list(normalized), n=1, cutoff=0.6)
+                return normalized[matches[0]] if matches else None
+
+            difflib_us = f"{per_lookup_us(difflib_lookup, queries):.0f}"
+            sample = queries[:100]
+            agree = f"{sum(index.match(q) == difflib_lookup(q) for q in sample) / len(sample):.0%}"
+
+        print(f"{size:>8} {build_seconds:>8.2f} {index_us:>9.0f} {difflib_us:>11} {agree:>6}")
+
+
+if __name__ == "__main__":
+    main()
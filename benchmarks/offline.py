@@ -0,0 +1,350 @@
+"""
+Offline stand-ins for the external services, used by the benchmarks
+FakeGeminiModel answers classification prompts locally with configurable latency and
+error rate; LocalSupabase implements the part of the supabase-py client spend_core uses
+on top of SQLite, with the classifications table and analytics rollups from
+supabase_setup.sql.
+"""
+
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from spend_core import CATEGORY_VENDOR_MAP
+
+# ---------------------------------------------------------
+# Gemini
+# ---------------------------------------------------------
+BATCH_LINE = re.compile(r'^(\d+): (".*")$', re.M)
+SINGLE_INPUT = re.compile(r'^Input: "(.*)"$', re.M)
+
+
+class FakeAPIError(Exception):
+    """Transient API failure carrying a status code, like the SDK's errors"""
+
+    def __init__(self, code: int):
+        super().__init__(f"{code} simulated API error")
+        self.code = code
+
+
+class _Usage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class _Response:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        # Roughly four characters per token, close enough to compare prompt modes
+        self.usage_metadata = _Usage(len(prompt) // 4, len(text) // 4)
+
+
+class FakeGeminiModel:
+    """
+    Drop-in for genai.GenerativeModel that classifies by vendor keyword.
+
+    Understands single, packed-batch and compact prompts. Each call sleeps latency
+    seconds (plus up to jitter more) and fails with a 429 or 503 at error_rate.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._vendors = [(vendor.lower(), category, vendor) for category, vendor in CATEGORY_VENDOR_MAP.items()]
+
+    def classify(self, text: str) -> dict:
+        lowered = text.lower()
+        for needle, category, vendor in self._vendors:
+            if needle in lowered:
+                return {"category": category, "vendor": vendor, "enriched_description": f"Payment to {vendor}"}
+        return {"category": "Miscellaneous", "vendor": None, "enriched_description": "General business expense"}
+
+    def generate_content(self, prompt: str, generation_config=None) -> _Response:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.random() * self.jitter
+            failed = self._rng.random() < self.error_rate
+            code = self._rng.choice([429, 503])
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise FakeAPIError(code)
+
+        batch = BATCH_LINE.findall(prompt)
+        if batch:
+            items = [{"index": int(idx), **self.classify(json.loads(text))} for idx, text in batch]
+            return _Response(json.dumps(items), prompt)
+        single = SINGLE_INPUT.search(prompt)
+        text = single.group(1) if single else json.loads(prompt)
+        return _Response(json.dumps(self.classify(text)), prompt)
+
+
+# ---------------------------------------------------------
+# Supabase
+# ---------------------------------------------------------
+# supabase_setup.sql in SQLite terms; the statement-level rollup triggers become row-level ones
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+  id text PRIMARY KEY,
+  raw_input text NOT NULL,
+  category text,
+  vendor text,
+  enriched_description text,
+  created_at text,
+  content_hash text,
+  transaction_date text,
+  seq integer
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_classifications_seq ON classifications(seq);
+CREATE INDEX IF NOT EXISTS idx_classifications_transaction_date ON classifications(transaction_date);
+CREATE INDEX IF NOT EXISTS idx_classifications_category_vendor ON classifications(category, vendor);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_classifications_content_hash ON classifications(content_hash);
+
+CREATE TABLE IF NOT EXISTS classification_pair_counts (
+  category text NOT NULL,
+  vendor text NOT NULL,
+  transaction_count integer NOT NULL,
+  first_transaction text,
+  last_transaction text,
+  PRIMARY KEY (category, vendor)
+);
+CREATE TABLE IF NOT EXISTS classification_daily_counts (
+  day text PRIMARY KEY,
+  transaction_count integer NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS classifications_rollups_insert AFTER INSERT ON classifications
+BEGIN
+  INSERT INTO classification_pair_counts
+  SELECT coalesce(NEW.category, ''), coalesce(NEW.vendor, ''), 1, NEW.created_at, NEW.created_at WHERE true
+  ON CONFLICT (category, vendor) DO UPDATE SET
+    transaction_count = transaction_count + 1,
+    first_transaction = min(first_transaction, excluded.first_transaction),
+    last_transaction = max(last_transaction, excluded.last_transaction);
+  INSERT INTO classification_daily_counts
+  SELECT NEW.transaction_date, 1 WHERE NEW.transaction_date IS NOT NULL
+  ON CONFLICT (day) DO UPDATE SET transaction_count = transaction_count + 1;
+END;
+"""
+
+COLUMNS = (
+    "id", "raw_input", "category", "vendor", "enriched_description", "created_at", "content_hash", "transaction_date", "seq"
+)
+OPERATORS = {"eq": "=", "neq": "!=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+CONDITION = re.compile(r'(\w+)\.(eq|neq|lt|lte|gt|gte)\.("(?:[^"\\]|\\.)*"|[^,()]*)')
+
+
+def _split_top_level(expr: str) -> list:
+    parts, depth, start = [], 0, 0
+    for pos, char in enumerate(expr):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(expr[start:pos])
+            start = pos + 1
+    parts.append(expr[start:])
+    return parts
+
+
+def postgrest_filter(expr: str, joiner: str = "OR") -> tuple:
+    """Translate a PostgREST logic filter (as passed to .or_()) into SQL and parameters"""
+    clauses, params = [], []
+    for part in _split_top_level(expr):
+        nested = re.fullmatch(r"(and|or)\((.*)\)", part)
+        if nested:
+            sql, nested_params = postgrest_filter(nested.group(2), nested.group(1).upper())
+            clauses.append(f"({sql})")
+            params += nested_params
+            continue
+        match = CONDITION.fullmatch(part)
+        if match is None or match.group(1) not in COLUMNS:
+            raise ValueError(f"Unsupported filter: {part}")
+        column, op, value = match.groups()
+        if value.startswith('"'):
+            value = json.loads(value)
+        clauses.append(f"{column} {OPERATORS[op]} ?")
+        params.append(value)
+    return f" {joiner} ".join(clauses), params
+
+
+class _Params:
+    """Immutable query parameters with the httpx.QueryParams.add() interface"""
+
+    def __init__(self, items: tuple = ()):
+        self.items = items
+
+    def add(self, key: str, value: str) -> "_Params":
+        return _Params(self.items + ((key, value),))
+
+    def get(self, key: str):
+        return next((value for name, value in reversed(self.items) if name == key), None)
+
+
+class _Result:
+    def __init__(self, data: list):
+        self.data = data
+
+
+class _Query:
+    """Chainable query on one table, executed against SQLite"""
+
+    def __init__(self, db: "LocalSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.params = _Params()
+        self.where = []
+        self.where_params = []
+        self.row_limit = None
+        self.rows = None
+
+    def select(self, columns: str = "*") -> "_Query":
+        if columns != "*":
+            raise NotImplementedError("Only select('*') is supported")
+        return self
+
+    def _compare(self, column: str, op: str, value) -> "_Query":
+        sql, params = postgrest_filter(f"{column}.{op}.{json.dumps(value)}")
+        self.where.append(sql)
+        self.where_params += params
+        return self
+
+    def gt(self, column: str, value) -> "_Query":
+        return self._compare(column, "gt", value)
+
+    def gte(self, column: str, value) -> "_Query":
+        return self._compare(column, "gte", value)
+
+    def lt(self, column: str, value) -> "_Query":
+        return self._compare(column, "lt", value)
+
+    def or_(self, expr: str) -> "_Query":
+        sql, params = postgrest_filter(expr)
+        self.where.append(f"({sql})")
+        self.where_params += params
+        return self
+
+    def limit(self, count: int) -> "_Query":
+        self.row_limit = count
+        return self
+
+    def upsert(self, rows: list, on_conflict: str = "id", ignore_duplicates: bool = False) -> "_Query":
+        if not ignore_duplicates:
+            raise NotImplementedError("Only ignore_duplicates=True upserts are supported")
+        self.rows = (rows, on_conflict)
+        return self
+
+    def execute(self) -> _Result:
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        if self.rows is not None:
+            return _Result(self.db.insert_ignoring(self.table, *self.rows))
+
+        sql = f"SELECT * FROM {self.table}"
+        if self.where:
+            sql += " WHERE " + " AND ".join(self.where)
+        order = self.params.get("order")
+        if order:
+            sql += " ORDER BY " + ", ".join(
+                f"{column} {direction.upper()}" for column, direction in (term.split(".") for term in order.split(","))
+            )
+        if self.row_limit is not None:
+            sql += f" LIMIT {int(self.row_limit)}"
+        return _Result(self.db.query(sql, self.where_params))
+
+
+class _Call:
+    def __init__(self, func, params: dict, latency: float):
+        self.func = func
+        self.params = params
+        self.latency = latency
+
+    def execute(self) -> _Result:
+        if self.latency:
+            time.sleep(self.latency)
+        return _Result(self.func(**self.params))
+
+
+class LocalSupabase:
+    """
+    SQLite stand-in for the Supabase client: table(...).select/gt/gte/lt/or_/limit/upsert,
+    the order query parameter, and rpc("get_analytics_summary"). Every execute()
+    sleeps latency seconds to model the network round trip.
+    """
+
+    def __init__(self, path: str = ":memory:", latency: float = 0.0):
+        self.latency = latency
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: dict) -> _Call:
+        if name != "get_analytics_summary":
+            raise NotImplementedError(f"Unknown RPC: {name}")
+        return _Call(self.get_analytics_summary, params, self.latency)
+
+    def query(self, sql: str, params: list = ()) -> list:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def insert_ignoring(self, table: str, rows: list, on_conflict: str) -> list:
+        """INSERT ... ON CONFLICT DO NOTHING, returning the rows actually written"""
+        written = []
+        with self._lock, self._conn:
+            for row in rows:
+                # Like a bigserial, a value is used up even when the insert conflicts
+                self._seq += 1
+                row = {"id": str(uuid.uuid4()), **row, "seq": self._seq}
+                columns = ", ".join(row)
+                placeholders = ", ".join("?" for _ in row)
+                cursor = self._conn.execute(
+                    f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) "
+                    f"ON CONFLICT ({on_conflict}) DO NOTHING RETURNING *",
+                    list(row.values()),
+                )
+                written += [dict(r) for r in cursor.fetchall()]
+        return written
+
+    def get_analytics_summary(self, top_n: int = 10, matrix_n: int = 20) -> list:
+        """The get_analytics_summary function from supabase_setup.sql, read from the rollups"""
+        by_category = self.query(
+            "SELECT category, sum(transaction_count) AS count FROM classification_pair_counts "
+            "WHERE category != '' GROUP BY category ORDER BY count DESC, category"
+        )
+        by_vendor = self.query(
+            "SELECT vendor, sum(transaction_count) AS count FROM classification_pair_counts "
+            "WHERE vendor != '' GROUP BY vendor ORDER BY count DESC, vendor"
+        )
+        total = self.query("SELECT coalesce(sum(transaction_count), 0) AS total FROM classification_pair_counts")
+        summary = {
+            "total": total[0]["total"],
+            "categories": len(by_category),
+            "vendors": len(by_vendor),
+            "top_category": by_category[0]["category"] if by_category else None,
+            "category_counts": by_category[:top_n],
+            "vendor_counts": by_vendor[:top_n],
+            "daily_counts": self.query(
+                "SELECT day, transaction_count AS count FROM classification_daily_counts ORDER BY day"
+            ),
+            "category_vendor": self.query(
+                "SELECT category, vendor, transaction_count AS count FROM classification_pair_counts "
+                "WHERE category != '' AND vendor != '' ORDER BY count DESC, category, vendor LIMIT ?",
+                [matrix_n],
+            ),
+        }
+        return [{"summary": summary}]
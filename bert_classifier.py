@@ -0,0 +1,148 @@
+"""
+Local BERT spend classifier
+Batched CPU inference (fp32 or dynamically quantized INT8) for the fine-tuned model
+saved by Finetune_BERT.ipynb
+"""
+
+import importlib.util
+import os
+from typing import Optional
+
+# torch and transformers take seconds to import, so they are only imported once a
+# model is actually loaded; availability is checked without importing them.
+
+# INT8 weights written next to the fp32 checkpoint by export_quantized_model
+QUANTIZED_WEIGHTS_FILE = "quantized_int8.pt"
+
+
+def torch_available() -> bool:
+    """True when torch and transformers are installed"""
+    return all(importlib.util.find_spec(name) is not None for name in ("torch", "transformers"))
+
+
+def local_model_available(model_path: str) -> bool:
+    """True when torch/transformers are installed and the model directory exists"""
+    return os.path.isdir(model_path) and torch_available()
+
+
+def quantized_model_available(model_path: str) -> bool:
+    """True when an INT8 export exists for the model directory"""
+    return local_model_available(model_path) and os.path.isfile(
+        os.path.join(model_path, QUANTIZED_WEIGHTS_FILE)
+    )
+
+
+def quantize_linear_layers(model):
+    """Apply dynamic INT8 quantization to every nn.Linear (weights int8, activations fp32)"""
+    import torch
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_quantized_model(model_path: str) -> str:
+    """Quantize the fp32 checkpoint in model_path and save the INT8 weights alongside it"""
+    if not torch_available():
+        raise ImportError("Install torch and transformers to export the local model: pip install torch transformers")
+    import torch
+    from transformers import AutoModelForSequenceClassification
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    output_path = os.path.join(model_path, QUANTIZED_WEIGHTS_FILE)
+    torch.save(quantize_linear_layers(model).state_dict(), output_path)
+    return output_path
+
+
+def compute_metrics(eval_pred):
+    """Accuracy and weighted F1 from (logits, labels), as used by the training notebook"""
+    from sklearn.metrics import accuracy_score, f1_score
+    logits, labels = eval_pred
+    preds = logits.argmax(-1)
+    return {
+        "accuracy": accuracy_score(labels, preds),
+        "f1": f1_score(labels, preds, average="weighted")
+    }
+
+
+class BertSpendClassifier:
+    """Fine-tuned BertForSequenceClassification wrapped for batched CPU inference"""
+
+    def __init__(
+        self,
+        model_path: str,
+        max_length: int = 128,
+        num_threads: Optional[int] = None,
+        quantized: bool = False,
+    ):
+        if not torch_available():
+            raise ImportError("Install torch and transformers to use the local model: pip install torch transformers")
+        import torch
+        from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model_path = model_path
+        self.max_length = max_length
+        self.quantized = quantized
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        if quantized:
+            # Rebuild the architecture, quantize it, then load the exported INT8 weights
+            model = AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(model_path))
+            model = quantize_linear_layers(model.eval())
+            model.load_state_dict(torch.load(os.path.join(model_path, QUANTIZED_WEIGHTS_FILE)))
+        else:
+            model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.model = model
+        self.model.eval()
+        self.id2label = self.model.config.id2label
+
+    def logits(self, texts: list, batch_size: int = 32):
+        """Return a (len(texts), num_labels) logits tensor, in input order"""
+        import torch
+        # Sorting by length keeps padding inside each batch to a minimum
+        order = sorted(range(len(texts)), key=lambda idx: len(texts[idx]))
+        outputs = torch.empty(len(texts), self.model.config.num_labels)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                batch_idx = order[start:start + batch_size]
+                encoded = self.tokenizer(
+                    [texts[idx] for idx in batch_idx],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt",
+                )
+                outputs[batch_idx] = self.model(**encoded).logits
+
+        return outputs
+
+    def predict(self, texts: list, batch_size: int = 32) -> list:
+        """Return (label, confidence) for each text, in input order"""
+        if not texts:
+            return []
+        import torch
+        probs = torch.softmax(self.logits(texts, batch_size=batch_size), dim=-1)
+        confidence, label_ids = probs.max(dim=-1)
+        return [
+            (self.id2label[label_id], score)
+            for label_id, score in zip(label_ids.tolist(), confidence.tolist())
+        ]
+
+
+class LocalModelTier:
+    """Classifier tier that accepts local model predictions above a confidence threshold"""
+
+    name = "local"
+
+    def __init__(self, classifier: BertSpendClassifier, threshold: float = 0.9, batch_size: int = 32):
+        self.classifier = classifier
+        self.threshold = threshold
+        self.batch_size = batch_size
+
+    def classify(self, raw_inputs: list) -> list:
+        """Return a parsed classification per input, or None to defer it to the next tier"""
+        results = []
+        for label, confidence in self.classifier.predict(raw_inputs, batch_size=self.batch_size):
+            if confidence >= self.threshold:
+                results.append({"category": label, "vendor": None, "enriched_description": None})
+            else:
+                results.append(None)
+        return results
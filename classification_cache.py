@@ -0,0 +1,140 @@
+"""
+Persistent classification cache
+SQLite-backed store for AI classification results with TTL and LRU eviction
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_input(raw_input: str) -> str:
+    """Normalize transaction text so trivially different spellings share a cache entry"""
+    return _WHITESPACE.sub(" ", str(raw_input)).strip().casefold()
+
+
+def make_cache_key(raw_input: str, model_name: str, template_hash: str) -> str:
+    """Build the cache key from the normalized input, model name and prompt template hash"""
+    payload = "\x1f".join([normalize_input(raw_input), model_name, template_hash])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    """Disk-backed key/value cache with TTL expiry and size-bounded LRU eviction"""
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: int = 100_000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS classification_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON classification_cache(accessed_at)"
+        )
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached value for key, or None on a miss"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: value} for every key that has a live entry"""
+        found = {}
+        expired = []
+        now = time.time()
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM classification_cache WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self._is_expired(created_at, now):
+                        expired.append((key,))
+                    else:
+                        found[key] = json.loads(value)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE classification_cache SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+            if expired:
+                self._conn.executemany("DELETE FROM classification_cache WHERE key = ?", expired)
+
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put(self, key: str, value: dict) -> None:
+        """Store a single value"""
+        self.put_many({key: value})
+
+    def put_many(self, items: dict) -> None:
+        """Store several values and evict least-recently-used entries beyond max_entries"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO classification_cache (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(value), now, now) for key, value in items.items()],
+            )
+            self._conn.execute("COMMIT")
+            self._evict()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM classification_cache WHERE key IN "
+                "(SELECT key FROM classification_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def clear(self) -> None:
+        """Drop every cached entry and reset counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM classification_cache")
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current entry count"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
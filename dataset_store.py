@@ -0,0 +1,137 @@
+"""
+Shared dataset store
+Process-wide registry of loaded classification frames: each distinct dataset is held once,
+in compact column types, and shared by every tab and session that loads it
+"""
+
+import threading
+import weakref
+
+import pandas as pd
+
+from memo_cache import frame_content_fingerprint, frame_fingerprint, remember_content_fingerprint, remember_fingerprint
+
+# Repetitive text columns stored as categoricals when distinct values are at most
+# CATEGORICAL_MAX_RATIO of the rows
+CATEGORICAL_COLUMNS = ("category", "vendor", "enriched_description", "classified_by")
+CATEGORICAL_MAX_RATIO = 0.5
+
+# Other all-string columns (raw_input, timestamps, hashes) move to Arrow-backed strings,
+# which drop the per-value Python object overhead
+ARROW_STRING_DTYPE = "string[pyarrow]"
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df with object columns in compact types: categoricals for repetitive text columns and
+    Arrow strings for other columns holding only strings. Values and dataset fingerprints
+    are unchanged; columns with mixed or missing values are left as they are.
+    """
+    dtypes = {}
+    for column in df.columns:
+        series = df[column]
+        if series.dtype != object:
+            continue
+        if column in CATEGORICAL_COLUMNS and series.nunique() <= CATEGORICAL_MAX_RATIO * len(series):
+            dtypes[column] = "category"
+        elif pd.api.types.infer_dtype(series, skipna=False) == "string":
+            dtypes[column] = ARROW_STRING_DTYPE
+    return df.astype(dtypes) if dtypes else df.copy()
+
+
+def frame_records(df: pd.DataFrame) -> list:
+    """Row dicts for df with missing values as None, whatever the column types"""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+class DatasetStore:
+    """
+    Holds one compacted copy of each distinct dataset (by content_fingerprint of the
+    frame as loaded) for as long as any session references it.
+
+    Frames are held weakly: session state owns them, so a dataset is freed once no
+    session keeps it. Sessions record which dataset each of their slots (e.g.
+    "report_df") points at, which is what per-session memory reports are built from.
+    Stored frames are shared and must not be modified in place.
+    """
+
+    def __init__(self):
+        self._frames = weakref.WeakValueDictionary()
+        self._nbytes = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def put(self, session_id: str, name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Register df as session_id's name slot; returns the shared compact frame to keep"""
+        # Keyed on the whole frame: frames that only agree on the analytics columns must
+        # not be handed to each other's sessions
+        fingerprint = frame_content_fingerprint(df)
+        with self._lock:
+            shared = self._frames.get(fingerprint)
+
+        if shared is None:
+            compact = compact_frame(df)
+            nbytes = int(compact.memory_usage(deep=True).sum())
+            with self._lock:
+                shared = self._frames.setdefault(fingerprint, compact)
+                if shared is compact:
+                    token = object()
+                    self._nbytes[fingerprint] = (token, nbytes)
+                    weakref.finalize(compact, self._forget, fingerprint, token)
+            # The compact copy has other dtypes, so it inherits the loaded frame's keys
+            remember_content_fingerprint(shared, fingerprint)
+            remember_fingerprint(shared, frame_fingerprint(df))
+
+        with self._lock:
+            self._sessions.setdefault(session_id, {})[name] = fingerprint
+        return shared
+
+    def _forget(self, fingerprint: str, token: object) -> None:
+        # Finalizer: cyclic GC can run it on a thread already holding the lock, so it must
+        # not take it. Only the size recorded for this frame (same token) is dropped, never
+        # that of a newer frame stored under the same fingerprint.
+        entry = self._nbytes.get(fingerprint)
+        if entry is not None and entry[0] is token:
+            self._nbytes.pop(fingerprint, None)
+
+    def _size(self, fingerprint: str) -> int:
+        entry = self._nbytes.get(fingerprint)
+        return entry[1] if entry is not None else 0
+
+    def _live_slots(self) -> dict:
+        """session_id -> {name: fingerprint} for datasets still held; prunes the rest"""
+        for session_id, slots in list(self._sessions.items()):
+            for name, fingerprint in list(slots.items()):
+                if fingerprint not in self._frames:
+                    del slots[name]
+            if not slots:
+                del self._sessions[session_id]
+        return self._sessions
+
+    def session_memory(self, session_id: str) -> dict:
+        """
+        Memory held by one session's datasets: bytes counts each distinct dataset once,
+        exclusive_bytes only those no other session shares.
+        """
+        with self._lock:
+            sessions = self._live_slots()
+            slots = dict(sessions.get(session_id, {}))
+            shared_elsewhere = {
+                fingerprint
+                for other, other_slots in sessions.items() if other != session_id
+                for fingerprint in other_slots.values()
+            }
+            datasets = set(slots.values())
+            nbytes = sum(self._size(fingerprint) for fingerprint in datasets)
+            exclusive = sum(self._size(fingerprint) for fingerprint in datasets - shared_elsewhere)
+        return {"slots": len(slots), "datasets": len(datasets), "bytes": nbytes, "exclusive_bytes": exclusive}
+
+    def stats(self) -> dict:
+        """Datasets, total bytes and sessions across the whole process"""
+        with self._lock:
+            sessions = self._live_slots()
+            return {
+                "datasets": len(self._frames),
+                "bytes": sum(nbytes for _, nbytes in list(self._nbytes.values())),
+                "sessions": len(sessions),
+            }
@@ -0,0 +1,180 @@
+"""
+Report exports
+Constant-memory Excel (openpyxl write-only mode) with a per-category summary sheet, and
+Parquet / Arrow IPC files with dictionary-encoded category and vendor columns
+"""
+
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Low-cardinality columns stored as categoricals / Arrow dictionaries
+CATEGORICAL_COLUMNS = ("category", "vendor", "classified_by")
+
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_CHUNK_ROWS = 10_000
+EXCEL_COLUMN_WIDTHS = {
+    "raw_input": 60,
+    "category": 34,
+    "vendor": 24,
+    "enriched_description": 60,
+}
+
+CSV_MIME = "text/csv"
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PARQUET_MIME = "application/vnd.apache.parquet"
+ARROW_MIME = "application/vnd.apache.arrow.file"
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV file contents for df, without the index"""
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def categorical_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """df with the low-cardinality text columns converted to pandas categoricals"""
+    columns = {column: "category" for column in CATEGORICAL_COLUMNS if column in df.columns}
+    return df.astype(columns) if columns else df
+
+
+def arrow_table(df: pd.DataFrame) -> pa.Table:
+    """Arrow table of df; categorical columns become dictionary-encoded strings"""
+    return pa.Table.from_pandas(categorical_frame(df), preserve_index=False)
+
+
+def to_parquet_bytes(df: pd.DataFrame, compression: str = "zstd") -> bytes:
+    """Parquet file contents for df"""
+    sink = pa.BufferOutputStream()
+    pq.write_table(arrow_table(df), sink, compression=compression)
+    return sink.getvalue().to_pybytes()
+
+
+def to_arrow_bytes(df: pd.DataFrame, compression: str = "zstd") -> bytes:
+    """Arrow IPC (Feather v2) file contents for df, loadable with pyarrow.ipc.open_file"""
+    table = arrow_table(df)
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def category_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per category: transactions, share, distinct vendors and the top vendor"""
+    if df.empty or "category" not in df.columns:
+        return pd.DataFrame(columns=["Category", "Transactions", "Share", "Vendors", "Top Vendor"])
+
+    vendors = df["vendor"] if "vendor" in df.columns else pd.Series("", index=df.index)
+    pairs = pd.DataFrame({"category": df["category"], "vendor": vendors}).astype(object).fillna("")
+    pair_counts = pairs.groupby(["category", "vendor"], sort=False).size().reset_index(name="count")
+    top_vendor = (
+        pair_counts.sort_values("count", ascending=False, kind="stable")
+        .drop_duplicates("category")
+        .set_index("category")["vendor"]
+    )
+    by_category = pair_counts.groupby("category").agg(
+        transactions=("count", "sum"),
+        vendors=("vendor", lambda v: int((v != "").sum())),
+    ).sort_values("transactions", ascending=False)
+
+    return pd.DataFrame({
+        "Category": by_category.index,
+        "Transactions": by_category["transactions"].to_numpy(),
+        "Share": (by_category["transactions"] / len(df)).round(4).to_numpy(),
+        "Vendors": by_category["vendors"].to_numpy(),
+        "Top Vendor": top_vendor.reindex(by_category.index).to_numpy(),
+    })
+
+
+def _excel_ready(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Values openpyxl accepts: no timezones, no XML control characters, None for missing"""
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    chunk = chunk.copy()
+    for column in chunk.columns:
+        series = chunk[column]
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            chunk[column] = series.dt.tz_localize(None)
+        elif series.dtype == object or isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            chunk[column] = series.astype(object).map(
+                lambda v: ILLEGAL_CHARACTERS_RE.sub("", v) if isinstance(v, str) else v
+            )
+    return chunk.astype(object).where(chunk.notna(), None)
+
+
+def _header_row(sheet, headers: list) -> list:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+
+    row = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill("solid", fgColor="E6E9F5")
+        row.append(cell)
+    return row
+
+
+def write_excel(df: pd.DataFrame, target, chunk_rows: int = EXCEL_CHUNK_ROWS) -> None:
+    """
+    Write df to target (a path or binary file object) as an .xlsx workbook with a
+    Summary sheet first and the rows on Classifications sheets.
+
+    Uses openpyxl's write-only mode, which streams rows to the file instead of keeping
+    a cell object per value, so memory stays flat as the row count grows. Rows beyond
+    Excel's sheet limit continue on "Classifications 2", "Classifications 3", ...
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+
+    summary_sheet = workbook.create_sheet("Summary")
+    summary = category_summary(df)
+    for letter, width in zip("ABCDE", (40, 14, 10, 10, 30)):
+        summary_sheet.column_dimensions[letter].width = width
+    summary_sheet.append(_header_row(summary_sheet, ["Total Transactions", "Categories", "Vendors"]))
+    summary_sheet.append([
+        len(df),
+        int(df["category"].nunique()) if "category" in df.columns else 0,
+        int(df["vendor"].nunique()) if "vendor" in df.columns else 0,
+    ])
+    summary_sheet.append([])
+    summary_sheet.append(_header_row(summary_sheet, list(summary.columns)))
+    for row in summary.itertuples(index=False, name=None):
+        summary_sheet.append(list(row))
+
+    headers = [str(column) for column in df.columns]
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+    sheet_starts = range(0, max(len(df), 1), rows_per_sheet)
+    for number, sheet_start in enumerate(sheet_starts, start=1):
+        sheet = workbook.create_sheet("Classifications" if number == 1 else f"Classifications {number}")
+        for position, header in enumerate(headers, start=1):
+            sheet.column_dimensions[get_column_letter(position)].width = EXCEL_COLUMN_WIDTHS.get(header, 16)
+        sheet.append(_header_row(sheet, headers))
+
+        sheet_end = min(sheet_start + rows_per_sheet, len(df))
+        for start in range(sheet_start, sheet_end, chunk_rows):
+            chunk = _excel_ready(df.iloc[start:min(start + chunk_rows, sheet_end)])
+            for row in chunk.itertuples(index=False, name=None):
+                sheet.append(row)
+
+    workbook.save(target)
+
+
+def to_excel_bytes(df: pd.DataFrame) -> bytes:
+    """.xlsx file contents for df (see write_excel)"""
+    buffer = io.BytesIO()
+    write_excel(df, buffer)
+    return buffer.getvalue()
+
+
+# format -> (builder returning file bytes, MIME type)
+EXPORT_FORMATS = {
+    "csv": (to_csv_bytes, CSV_MIME),
+    "xlsx": (to_excel_bytes, EXCEL_MIME),
+    "parquet": (to_parquet_bytes, PARQUET_MIME),
+    "arrow": (to_arrow_bytes, ARROW_MIME),
+}
@@ -0,0 +1,99 @@
+"""
+Gemini usage accounting
+Per prompt-mode counters for requests, transactions, prompt/output tokens, latency and
+response parse failures, so cost and latency per transaction can be compared across modes
+"""
+
+import threading
+
+import pandas as pd
+
+COUNTERS = (
+    "requests",
+    "transactions",
+    "prompt_tokens",
+    "output_tokens",
+    "unmetered_requests",
+    "seconds",
+    "parsed",
+    "parse_failures",
+)
+
+
+def response_token_counts(response) -> tuple:
+    """(prompt tokens, output tokens) from a Gemini response's usage_metadata, None when absent"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None, None
+    return getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+
+
+class UsageMeter:
+    """Thread-safe usage counters, kept separately for each prompt mode"""
+
+    def __init__(self):
+        self._modes = {}
+        self._lock = threading.Lock()
+
+    def _counters(self, mode: str) -> dict:
+        return self._modes.setdefault(mode, dict.fromkeys(COUNTERS, 0))
+
+    def record_call(self, mode: str, transactions: int, response, seconds: float) -> None:
+        """Count one model request covering transactions rows"""
+        prompt_tokens, output_tokens = response_token_counts(response)
+        with self._lock:
+            counters = self._counters(mode)
+            counters["requests"] += 1
+            counters["transactions"] += transactions
+            counters["seconds"] += seconds
+            if prompt_tokens is None:
+                counters["unmetered_requests"] += 1
+            else:
+                counters["prompt_tokens"] += prompt_tokens
+                counters["output_tokens"] += output_tokens or 0
+
+    def record_parse(self, mode: str, parsed: int, failed: int) -> None:
+        """Count transactions whose response parsed into fields, and those that did not"""
+        with self._lock:
+            counters = self._counters(mode)
+            counters["parsed"] += parsed
+            counters["parse_failures"] += failed
+
+    def merge(self, snapshot: dict) -> None:
+        """Add counters from another meter's snapshot (e.g. from a worker process)"""
+        with self._lock:
+            for mode, other in snapshot.items():
+                counters = self._counters(mode)
+                for name in COUNTERS:
+                    counters[name] += other.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """Copy of the counters, keyed by mode"""
+        with self._lock:
+            return {mode: dict(counters) for mode, counters in self._modes.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._modes.clear()
+
+
+def usage_frame(snapshot: dict) -> pd.DataFrame:
+    """Tabulate cost and latency per transaction and the parse-failure rate for each mode"""
+    rows = []
+    for mode, counters in snapshot.items():
+        transactions = counters["transactions"] or 1
+        metered = counters["requests"] - counters["unmetered_requests"]
+        # Token averages only cover requests that reported usage
+        metered_share = metered / counters["requests"] if counters["requests"] else 0.0
+        metered_transactions = transactions * metered_share or 1
+        attempts = counters["parsed"] + counters["parse_failures"]
+        rows.append({
+            "Mode": mode,
+            "Requests": counters["requests"],
+            "Transactions": counters["transactions"],
+            "Prompt Tokens / Txn": round(counters["prompt_tokens"] / metered_transactions, 1) if metered else None,
+            "Output Tokens / Txn": round(counters["output_tokens"] / metered_transactions, 1) if metered else None,
+            "ms / Txn": round(1000 * counters["seconds"] / transactions, 1),
+            "Parse Failure Rate": f"{counters['parse_failures'] / attempts:.1%}" if attempts else None,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,203 @@
+"""
+Fingerprint-keyed memoization
+Bounded in-memory LRU for derived tables and figures, keyed on a cheap fingerprint of
+the data they were computed from so unchanged data is never recomputed
+"""
+
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columns that decide what the analytics derivations look like
+FINGERPRINT_COLUMNS = ("raw_input", "category", "vendor", "transaction_date")
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Identify a frame of classification rows by row count, newest created_at and a hash
+    of its content columns.
+
+    The content hash is one vectorized pass (pandas' per-row hashing), so fingerprinting
+    100k rows costs milliseconds while still catching edits that keep the row count.
+    """
+    digest = hashlib.sha256()
+    digest.update(str(len(df)).encode("utf-8"))
+    if "created_at" in df.columns and len(df):
+        digest.update(str(df["created_at"].max()).encode("utf-8"))
+    columns = [column for column in FINGERPRINT_COLUMNS if column in df.columns]
+    if columns:
+        row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+        digest.update(np.ascontiguousarray(row_hashes).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def content_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Identify a frame by everything in it: column names, dtypes and every value.
+
+    dataset_fingerprint only covers what the analytics read, so frames that differ
+    elsewhere (enriched_description, classified_by, extra columns) share it. Anything
+    that hands out the frame itself, such as exports or cross-session sharing, keys on
+    this instead.
+    """
+    digest = hashlib.sha256()
+    digest.update(str(len(df)).encode("utf-8"))
+    layout = [[str(column), str(dtype)] for column, dtype in df.dtypes.items()]
+    digest.update(json.dumps(layout).encode("utf-8"))
+    if len(df.columns):
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        digest.update(np.ascontiguousarray(row_hashes).tobytes())
+    return digest.hexdigest()[:16]
+
+
+# Per-object memos of the fingerprints above: id(frame) -> (weak reference to the frame, fingerprint)
+_frame_fingerprints = {}
+_frame_content_fingerprints = {}
+_frame_fingerprints_lock = threading.Lock()
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    dataset_fingerprint, computed once per DataFrame object.
+
+    Frames kept in session state are reused unchanged across reruns, so repeat lookups
+    are a dictionary hit instead of a pass over the data. Frames are treated as
+    immutable: one modified in place keeps its first fingerprint.
+    """
+    return _memoized(_frame_fingerprints, df, dataset_fingerprint)
+
+
+def frame_content_fingerprint(df: pd.DataFrame) -> str:
+    """content_fingerprint, computed once per DataFrame object (see frame_fingerprint)"""
+    return _memoized(_frame_content_fingerprints, df, content_fingerprint)
+
+
+def remember_fingerprint(df: pd.DataFrame, fingerprint: str) -> None:
+    """Record df's fingerprint when it is already known, e.g. from the frame df was converted from"""
+    _remember(_frame_fingerprints, df, fingerprint)
+
+
+def remember_content_fingerprint(df: pd.DataFrame, fingerprint: str) -> None:
+    """Record df's content fingerprint when it is already known (see remember_fingerprint)"""
+    _remember(_frame_content_fingerprints, df, fingerprint)
+
+
+def _memoized(memo: dict, df: pd.DataFrame, compute: Callable) -> str:
+    key = id(df)
+    with _frame_fingerprints_lock:
+        entry = memo.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+
+    fingerprint = compute(df)
+    _remember(memo, df, fingerprint)
+    return fingerprint
+
+
+def _remember(memo: dict, df: pd.DataFrame, fingerprint: str) -> None:
+    key = id(df)
+    ref = weakref.ref(df, lambda ref, key=key: _forget_frame(memo, key, ref))
+    with _frame_fingerprints_lock:
+        memo[key] = (ref, fingerprint)
+
+
+def _forget_frame(memo: dict, key: int, ref: weakref.ref) -> None:
+    # Weakref callback: cyclic GC can run it on a thread already holding the lock, so it
+    # must not take it. Only the entry still holding this dead ref is dropped; losing a
+    # race with a new frame that reused the id just costs that frame a recomputation.
+    entry = memo.get(key)
+    if entry is not None and entry[0] is ref:
+        memo.pop(key, None)
+
+
+def payload_fingerprint(payload) -> str:
+    """Fingerprint of a JSON-serializable value, e.g. a server-side summary"""
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class MemoCache:
+    """
+    Thread-safe, size-bounded LRU of computed values with hit/miss counters.
+
+    Bounded by entry count, and also by total size when max_bytes is set; sizeof
+    measures one value (len by default, which suits bytes artifacts).
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: Optional[int] = None, sizeof: Callable = len):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value for key without computing it; counts a hit when found"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_or_compute(self, key: Hashable, compute: Callable):
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Computed outside the lock so one slow derivation does not block other sessions
+        value = compute()
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            # The newest entry is always kept, even if it alone exceeds max_bytes
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, the current entry count and their total size"""
+        with self._lock:
+            entries = len(self._entries)
+            size = self._bytes
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
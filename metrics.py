@@ -0,0 +1,232 @@
+"""
+Pipeline stage metrics
+Each stage's latency is sent to pluggable sinks: an in-process histogram that the
+dashboard's Performance tab reads percentiles from, a Prometheus text-format file for
+node_exporter's textfile collector, and structured JSON log lines
+"""
+
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+# Upper bounds (seconds) of the exported histogram buckets
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+# Percentiles are computed over each stage's most recent observations
+RECENT_SAMPLES = 2048
+
+PROMETHEUS_METRIC = "spend_stage_seconds"
+
+
+class Histogram:
+    """Bucketed latency counts for one stage, plus a window of recent samples for percentiles"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def merge(self, state: dict) -> None:
+        self.buckets = [a + b for a, b in zip(self.buckets, state["buckets"])]
+        self.count += state["count"]
+        self.sum += state["sum"]
+        self.max = max(self.max, state["max"])
+        self.recent.extend(state["recent"])
+
+    def state(self) -> dict:
+        return {
+            "buckets": list(self.buckets),
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "recent": list(self.recent),
+        }
+
+
+def percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile of samples (q in 0-100)"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class HistogramSink:
+    """In-process histograms, one per stage"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def merge(self, snapshot: dict) -> None:
+        """Add histograms from another process's snapshot"""
+        with self._lock:
+            for stage, state in snapshot.items():
+                self._histograms.setdefault(stage, Histogram()).merge(state)
+
+    def snapshot(self) -> dict:
+        """{stage: histogram state}, safe to pickle or serialize"""
+        with self._lock:
+            return {stage: histogram.state() for stage, histogram in self._histograms.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def render_prometheus(snapshot: dict) -> str:
+    """Prometheus text exposition of histogram snapshots, one labelled series per stage"""
+    lines = [
+        f"# HELP {PROMETHEUS_METRIC} Latency of spend pipeline stages in seconds",
+        f"# TYPE {PROMETHEUS_METRIC} histogram",
+    ]
+    for stage in sorted(snapshot):
+        state = snapshot[stage]
+        label = json.dumps(stage)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, state["buckets"]):
+            cumulative += count
+            lines.append(f'{PROMETHEUS_METRIC}_bucket{{stage={label},le="{bound}"}} {cumulative}')
+        lines.append(f'{PROMETHEUS_METRIC}_bucket{{stage={label},le="+Inf"}} {state["count"]}')
+        lines.append(f"{PROMETHEUS_METRIC}_sum{{stage={label}}} {state['sum']:.6f}")
+        lines.append(f"{PROMETHEUS_METRIC}_count{{stage={label}}} {state['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusFileSink:
+    """
+    Rewrite a Prometheus text-format file from the in-process histograms, at most once
+    per interval seconds. The file is replaced atomically so scrapers never read half of it.
+    """
+
+    def __init__(self, histograms: HistogramSink, path: str, interval: float = 15.0):
+        self.histograms = histograms
+        self.path = path
+        self.interval = interval
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if time.monotonic() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._last_write = time.monotonic()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".prom.tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(render_prometheus(self.histograms.snapshot()))
+            os.replace(tmp_path, self.path)
+
+
+class JsonLogSink:
+    """One JSON log line per observation at or above min_seconds"""
+
+    def __init__(self, logger: logging.Logger = None, min_seconds: float = 0.0):
+        self.logger = logger or logging.getLogger("spend.metrics")
+        self.min_seconds = min_seconds
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if seconds >= self.min_seconds:
+            self.logger.info(json.dumps({"stage": stage, "ms": round(seconds * 1000, 3), "ts": time.time()}))
+
+
+class Metrics:
+    """
+    Fan stage latencies out to the in-process histograms and any extra sinks.
+
+    A sink is any object with observe(stage, seconds); sinks that also have flush()
+    are flushed by Metrics.flush().
+    """
+
+    def __init__(self, sinks: list = None):
+        self.histograms = HistogramSink()
+        self.sinks = [self.histograms, *(sinks or [])]
+
+    def add_sink(self, sink) -> None:
+        self.sinks.append(sink)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        for sink in self.sinks:
+            try:
+                sink.observe(stage, seconds)
+            except Exception as e:
+                # Instrumentation must never break the pipeline it measures
+                logging.getLogger("spend").warning("Metrics sink %s failed: %s", type(sink).__name__, e)
+
+    @contextlib.contextmanager
+    def timer(self, stage: str):
+        """Time the with-block as one observation of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def merge(self, snapshot: dict) -> None:
+        """Fold in another process's histogram snapshot"""
+        self.histograms.merge(snapshot)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            if hasattr(sink, "flush"):
+                sink.flush()
+
+
+def timed(get_metrics, stage: str):
+    """Decorator recording each call's latency under stage in the registry get_metrics() returns"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_metrics().timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def latency_frame(snapshot: dict) -> pd.DataFrame:
+    """Count, total and p50/p95/p99/max latency per stage, slowest p95 first"""
+    rows = []
+    for stage, state in snapshot.items():
+        recent = state["recent"]
+        rows.append({
+            "Stage": stage,
+            "Count": state["count"],
+            "p50 (ms)": round(1000 * percentile(recent, 50), 2) if recent else None,
+            "p95 (ms)": round(1000 * percentile(recent, 95), 2) if recent else None,
+            "p99 (ms)": round(1000 * percentile(recent, 99), 2) if recent else None,
+            "Max (ms)": round(1000 * state["max"], 2),
+            "Total (s)": round(state["sum"], 3),
+        })
+    frame = pd.DataFrame(rows)
+    if not frame.empty:
+        frame = frame.sort_values("p95 (ms)", ascending=False, ignore_index=True)
+    return frame
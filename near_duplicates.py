@@ -0,0 +1,117 @@
+"""
+Near-duplicate transaction signatures
+Masks the parts of a transaction that vary between otherwise identical lines (PO and
+invoice numbers, amounts, dates, other numbers) so each recurring pattern is classified once
+"""
+
+import re
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_CURRENCY_CODE = r"(?:usd|eur|gbp|inr|aud|cad|sgd|rs\.?|dollars?|rupees?|euros?)"
+
+# One compiled alternation over lowercased text, tried left to right at each position;
+# the group that matched picks the placeholder
+SIGNATURE_PATTERN = re.compile(
+    r"(?P<date>"
+    r"\b\d{4}[-/.]\d{1,2}[-/.]\d{1,2}\b"
+    r"|\b\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}\b"
+    rf"|\b\d{{1,2}}(?:st|nd|rd|th)?[\s-]+{_MONTH}[\s,-]+\d{{2,4}}\b"
+    rf"|\b{_MONTH}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b"
+    r")"
+    r"|(?P<ref>"
+    r"\b(?:p\.?o|inv|invoice|order|ord|ref|bill|receipt|txn|trx|req)\b\.?\s*"
+    r"(?:no\.?|num(?:ber)?\.?|#)?\s*[-:#]?\s*[a-z]{0,4}[-/]?\d[\w/-]*"
+    r"|#\s*\d[\w/-]*"
+    r")"
+    r"|(?P<amount>"
+    rf"(?:[$€£₹]|\b{_CURRENCY_CODE})\s*\d[\d,]*(?:\.\d+)?(?:\s*[km]\b)?"
+    rf"|\b\d[\d,]*(?:\.\d+)?(?:\s*(?:[km]\b|{_CURRENCY_CODE}(?![a-z])))"
+    r")"
+    r"|(?P<number>\d+(?:[.,]\d+)*)"
+)
+PLACEHOLDERS = {"date": "<date>", "ref": "<ref>", "amount": "<amt>", "number": "<num>"}
+
+
+def _placeholder(match: re.Match) -> str:
+    return PLACEHOLDERS[match.lastgroup]
+
+
+def transaction_signature(text: str) -> str:
+    """
+    Canonical form of a transaction line: variable tokens replaced by placeholders,
+    lowercased, whitespace collapsed. "Apple Inc. Eqpt PO-4369 10K" and
+    "apple inc.  eqpt PO-5120 12K" both become "apple inc. eqpt <ref> <amt>".
+    """
+    return " ".join(SIGNATURE_PATTERN.sub(_placeholder, str(text).lower()).split())
+
+
+def group_by_signature(texts: list) -> tuple:
+    """
+    Group texts by signature.
+
+    Returns (signatures, representatives, members): signatures[i] is the signature of
+    representatives[i], the first text seen with it, and members[j] is the index into
+    representatives for texts[j].
+    """
+    index_by_signature = {}
+    signatures = []
+    representatives = []
+    members = []
+    for text in texts:
+        signature = transaction_signature(text)
+        index = index_by_signature.get(signature)
+        if index is None:
+            index = index_by_signature[signature] = len(representatives)
+            signatures.append(signature)
+            representatives.append(text)
+        members.append(index)
+    return signatures, representatives, members
+
+
+# The same variable tokens matched in mixed-case text, e.g. a model-written description
+_VARIABLE_TOKEN = re.compile(SIGNATURE_PATTERN.pattern, re.IGNORECASE)
+_SLOT = re.compile("\x1f(\\d+)\x1f")
+
+
+def _normalize_token(token: str) -> str:
+    return " ".join(token.casefold().split())
+
+
+def description_template(description: str, text: str):
+    """
+    description with each variable token it copied from text (a PO number, amount,
+    date...) replaced by a slot naming that token's position in text, so the same
+    description can be filled in for another text with the same signature.
+
+    Returns None when the description holds a variable token that is not in text, since
+    it could not be rewritten for another row without leaking this one's details.
+    """
+    if not description:
+        return description
+    positions = {}
+    for position, match in enumerate(_VARIABLE_TOKEN.finditer(str(text))):
+        positions.setdefault(_normalize_token(match.group()), position)
+
+    def to_slot(match: re.Match) -> str:
+        position = positions.get(_normalize_token(match.group()))
+        if position is None:
+            raise KeyError(match.group())
+        return f"\x1f{position}\x1f"
+
+    try:
+        return _VARIABLE_TOKEN.sub(to_slot, description)
+    except KeyError:
+        return None
+
+
+def fill_description(template: str, text: str) -> str:
+    """A description_template filled with text's own variable tokens ("" if it does not fit)"""
+    if not template:
+        return ""
+    if "\x1f" not in template:
+        return template
+    tokens = [match.group() for match in _VARIABLE_TOKEN.finditer(str(text))]
+    try:
+        return _SLOT.sub(lambda match: tokens[int(match.group(1))], template)
+    except IndexError:
+        return ""
@@ -0,0 +1,333 @@
+"""
+PDF report engine
+Summary pages from pre-aggregated data plus dense detail tables rendered in page-sized
+chunks, with Unicode TrueType font support and a background worker that reports progress
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Hashable, Optional
+
+import pandas as pd
+from fpdf import FPDF
+
+# (column, header, width in mm) for the landscape A4 detail table (277mm usable)
+DETAIL_COLUMNS = [
+    ("raw_input", "Transaction", 88),
+    ("category", "Category", 58),
+    ("vendor", "Vendor", 42),
+    ("enriched_description", "Description", 77),
+]
+INDEX_WIDTH = 12
+ROW_HEIGHT = 4.5
+DETAIL_FONT_SIZE = 7
+ELLIPSIS = "..."
+
+# Unicode fonts tried when none is configured (fonts-dejavu-core on Debian/Ubuntu)
+SYSTEM_FONT_CANDIDATES = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+]
+
+
+def find_unicode_font() -> tuple:
+    """(regular, bold) paths of an installed Unicode TrueType font, or (None, None)"""
+    for regular, bold in SYSTEM_FONT_CANDIDATES:
+        if os.path.isfile(regular):
+            return regular, bold if os.path.isfile(bold) else None
+    return None, None
+
+
+class _GlyphSubset(list):
+    """
+    Drop-in for fpdf's per-font glyph list. fpdf appends every rendered character,
+    duplicates included, then scans the list once per code point when writing the font,
+    which is quadratic on large reports; this keeps one entry per glyph and answers
+    membership from a set.
+    """
+
+    def __init__(self, glyphs):
+        super().__init__(dict.fromkeys(glyphs))
+        self._members = set(self)
+
+    def append(self, glyph):
+        if glyph not in self._members:
+            self._members.add(glyph)
+            super().append(glyph)
+
+    def __contains__(self, glyph):
+        return glyph in self._members
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        self._members.difference_update(removed)
+
+
+class _DocumentBuffer:
+    """
+    Drop-in for fpdf's document string. fpdf grows the finished document with +=, copying
+    it once per object written; this collects the pieces and joins them once at the end.
+    len() is kept because fpdf records object offsets with it.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+
+    def __iadd__(self, s: str):
+        self._parts.append(s)
+        self._length += len(s)
+        return self
+
+    def __len__(self) -> int:
+        return self._length
+
+    def getvalue(self) -> str:
+        return "".join(self._parts)
+
+
+class _ReportPDF(FPDF):
+    """FPDF with a page-number footer and a linear-time document buffer"""
+
+    def __init__(self, regular_font: str, **kwargs):
+        super().__init__(**kwargs)
+        self.regular_font = regular_font
+        self.buffer = _DocumentBuffer()
+
+    def footer(self):
+        self.set_y(-10)
+        self.set_font(self.regular_font, "", 7)
+        self.cell(0, 5, f"Page {self.page_no()}/{{nb}}", align="R")
+
+
+class ReportWriter:
+    """
+    Lays out one report.
+
+    With font_path (a TrueType file, e.g. DejaVuSans.ttf) any Unicode text renders as-is;
+    without it the built-in Helvetica is used and characters outside Latin-1 are replaced
+    with "?" instead of failing the whole report.
+    """
+
+    def __init__(self, font_path: Optional[str] = None, bold_font_path: Optional[str] = None):
+        self.unicode = bool(font_path)
+        family = "ReportSans" if self.unicode else "Helvetica"
+        self.pdf = _ReportPDF(family, orientation="L", unit="mm", format="A4")
+        if self.unicode:
+            self.pdf.add_font(family, "", font_path, uni=True)
+            self.pdf.add_font(family, "B", bold_font_path or font_path, uni=True)
+            for style in ("", "B"):
+                font = self.pdf.fonts[family.lower() + style]
+                font["subset"] = _GlyphSubset(font["subset"])
+        self.family = family
+        self.pdf.alias_nb_pages()
+        self.pdf.set_margins(10, 10, 10)
+        # Page breaks are placed explicitly, one table chunk per page
+        self.pdf.set_auto_page_break(False)
+
+    def text(self, value) -> str:
+        """Cell text for any value: '' for missing values, Latin-1-safe without a Unicode font"""
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return ""
+        value = str(value)
+        if not self.unicode:
+            value = value.encode("latin-1", "replace").decode("latin-1")
+        return value
+
+    def fit(self, text: str, width: float) -> str:
+        """Truncate text with an ellipsis so it fits in width mm at the current font"""
+        # No glyph is wider than 1em, so short strings skip measuring entirely
+        if len(text) * self.pdf.font_size <= width:
+            return text
+        if self.pdf.get_string_width(text) <= width:
+            return text
+        width -= self.pdf.get_string_width(ELLIPSIS)
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.pdf.get_string_width(text[:mid]) <= width:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo].rstrip() + ELLIPSIS
+
+    def heading(self, text: str, size: int = 12) -> None:
+        self.pdf.set_font(self.family, "B", size)
+        self.pdf.cell(0, size * 0.6, self.text(text), ln=1)
+        self.pdf.ln(1)
+
+    def table(self, headers: list, widths: list, rows: list) -> None:
+        """Small summary table: bold header row, then one line per row"""
+        pdf = self.pdf
+        pdf.set_font(self.family, "B", 8)
+        pdf.set_fill_color(230, 233, 245)
+        for header, width in zip(headers, widths):
+            pdf.cell(width, 5, self.text(header), fill=1)
+        pdf.ln(5)
+        pdf.set_font(self.family, "", 8)
+        for row in rows:
+            for value, width in zip(row, widths):
+                pdf.cell(width, 4.5, self.fit(self.text(value), width - 1))
+            pdf.ln(4.5)
+        pdf.ln(4)
+
+    def summary_page(self, title: str, summary: dict) -> None:
+        """Title, headline numbers and the top-N tables, all from pre-aggregated data"""
+        pdf = self.pdf
+        pdf.add_page()
+        pdf.set_font(self.family, "B", 16)
+        pdf.cell(0, 10, self.text(title), ln=1, align="C")
+        pdf.set_font(self.family, "", 8)
+        pdf.cell(0, 5, f"Generated {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=1, align="C")
+        pdf.ln(4)
+
+        total = summary["total"] or 1
+        headline = [
+            ("Transactions", f"{summary['total']:,}"),
+            ("Categories", f"{summary['categories']:,}"),
+            ("Vendors", f"{summary['vendors']:,}"),
+            ("Top Category", summary["top_category"] or "N/A"),
+        ]
+        if summary["daily_counts"]:
+            headline.append(("Date Range", f"{summary['daily_counts'][0]['day']} to {summary['daily_counts'][-1]['day']}"))
+        self.table([label for label, _ in headline], [277 / len(headline)] * len(headline),
+                   [[value for _, value in headline]])
+
+        self.heading("Top Categories", 11)
+        self.table(
+            ["Category", "Transactions", "Share"], [120, 30, 25],
+            [[row["category"], f"{row['count']:,}", f"{row['count'] / total:.1%}"]
+             for row in summary["category_counts"]],
+        )
+        self.heading("Top Vendors", 11)
+        self.table(
+            ["Vendor", "Transactions", "Share"], [120, 30, 25],
+            [[row["vendor"], f"{row['count']:,}", f"{row['count'] / total:.1%}"]
+             for row in summary["vendor_counts"]],
+        )
+        if pdf.get_y() > 150:
+            pdf.add_page()
+        self.heading("Top Category-Vendor Pairs", 11)
+        self.table(
+            ["Category", "Vendor", "Transactions"], [120, 90, 30],
+            [[row["category"], row["vendor"], f"{row['count']:,}"] for row in summary["category_vendor"]],
+        )
+
+    def detail_pages(self, df: pd.DataFrame, progress_callback: Optional[Callable] = None) -> None:
+        """Every row as one truncated table line, one page-sized chunk at a time"""
+        pdf = self.pdf
+        rows_per_page = int((pdf.h - 2 * 10 - 10 - 6) // ROW_HEIGHT)
+        columns = [
+            (df[column].tolist() if column in df.columns else [""] * len(df), width)
+            for column, _, width in DETAIL_COLUMNS
+        ]
+
+        for start in range(0, len(df), rows_per_page):
+            pdf.add_page()
+            pdf.set_font(self.family, "B", DETAIL_FONT_SIZE + 1)
+            pdf.set_fill_color(230, 233, 245)
+            pdf.cell(INDEX_WIDTH, 6, "#", fill=1)
+            for _, header, width in DETAIL_COLUMNS:
+                pdf.cell(width, 6, header, fill=1)
+            pdf.ln(6)
+
+            pdf.set_font(self.family, "", DETAIL_FONT_SIZE)
+            for idx in range(start, min(start + rows_per_page, len(df))):
+                pdf.cell(INDEX_WIDTH, ROW_HEIGHT, str(idx + 1))
+                for values, width in columns:
+                    pdf.cell(width, ROW_HEIGHT, self.fit(self.text(values[idx]), width - 1))
+                pdf.ln(ROW_HEIGHT)
+
+            if progress_callback is not None:
+                progress_callback(min(start + rows_per_page, len(df)) / len(df))
+
+    def output(self) -> bytes:
+        self.pdf.close()
+        return self.pdf.buffer.getvalue().encode("latin-1")
+
+
+def build_pdf_report(
+    df: pd.DataFrame,
+    title: str,
+    summary: dict,
+    font_path: Optional[str] = None,
+    bold_font_path: Optional[str] = None,
+    max_detail_rows: Optional[int] = None,
+    progress_callback: Optional[Callable] = None,
+) -> bytes:
+    """
+    Render a summary page from summary (see summarize_classifications) followed by the
+    detail table for df, truncated to max_detail_rows when set.
+
+    progress_callback(fraction) is called after every detail page.
+    """
+    writer = ReportWriter(font_path, bold_font_path)
+    writer.summary_page(title, summary)
+
+    detail = df if not max_detail_rows else df.head(max_detail_rows)
+    writer.detail_pages(detail, progress_callback)
+    if len(detail) < len(df):
+        writer.pdf.ln(2)
+        writer.pdf.set_font(writer.family, "B", DETAIL_FONT_SIZE + 1)
+        writer.pdf.cell(0, 6, f"{len(df) - len(detail):,} more rows not shown", ln=1)
+
+    if progress_callback is not None:
+        progress_callback(1.0)
+    return writer.output()
+
+
+class ReportTask:
+    """A report being built in the background; progress runs from 0.0 to 1.0"""
+
+    def __init__(self):
+        self.progress = 0.0
+        self.future = None
+
+    def set_progress(self, fraction: float) -> None:
+        self.progress = fraction
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self) -> bytes:
+        """Report bytes, re-raising any error from the build"""
+        return self.future.result()
+
+
+class ReportWorker:
+    """
+    Builds reports on background threads, so a page rerun never restarts one.
+
+    Tasks are keyed (e.g. by content fingerprint and title): submitting a key that is
+    already building or built returns the existing task. The most recent keep tasks are
+    retained; failed tasks are rebuilt on the next submit.
+    """
+
+    def __init__(self, max_workers: int = 2, keep: int = 8):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-worker")
+        self._tasks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[ReportTask]:
+        with self._lock:
+            return self._tasks.get(key)
+
+    def submit(self, key: Hashable, build_fn: Callable, *args, **kwargs) -> ReportTask:
+        """Run build_fn(*args, progress_callback=..., **kwargs) unless key already has a task"""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and not (task.done() and task.future.exception() is not None):
+                self._tasks.move_to_end(key)
+                return task
+
+            task = ReportTask()
+            task.future = self._executor.submit(build_fn, *args, progress_callback=task.set_progress, **kwargs)
+            self._tasks[key] = task
+            while len(self._tasks) > self.keep:
+                self._tasks.popitem(last=False)
+            return task
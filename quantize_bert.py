@@ -0,0 +1,24 @@
+"""
+Export a dynamically quantized INT8 copy of the fine-tuned spend classifier
+
+Usage: python quantize_bert.py [--model ./bert-spend-cls-final]
+"""
+
+import argparse
+import os
+
+from bert_classifier import export_quantized_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("LOCAL_MODEL_PATH", "./bert-spend-cls-final"),
+                        help="Directory containing the fp32 checkpoint")
+    args = parser.parse_args()
+
+    output_path = export_quantized_model(args.model)
+    print(f"Saved INT8 weights to {output_path} ({os.path.getsize(output_path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
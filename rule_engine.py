@@ -0,0 +1,209 @@
+"""
+Keyword rule engine
+Vendor aliases, category keywords and exclusion phrases compiled into one Aho-Corasick
+automaton, so every rule is checked in a single pass over the text however many rules
+there are. Rows where a vendor and a category keyword agree are classified without a
+model call.
+"""
+
+import csv
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+from vendor_index import normalize_vendor
+
+
+class Rule(NamedTuple):
+    """
+    A vendor rule (vendor set) names a vendor and its usual category, a keyword rule
+    (no vendor) is evidence for a category, and an exclusion (no category) marks a
+    phrase the rules must not decide, e.g. a vendor name used for another business line.
+    """
+
+    pattern: str
+    category: Optional[str]
+    vendor: Optional[str]
+
+
+class AhoCorasick:
+    """Multi-pattern matcher reporting every (start, end, pattern index) occurrence in one scan"""
+
+    def __init__(self, patterns: list):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._lengths = [len(pattern) for pattern in patterns]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(index)
+
+        # Breadth-first, so each state's failure target is finished before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> list:
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        matches = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                matches.append((end - lengths[index], end, index))
+        return matches
+
+
+def seed_rules(
+    category_vendor_map: dict, aliases: dict = None, keywords: dict = None, exclusions: list = ()
+) -> list:
+    """
+    One vendor rule per vendor in category_vendor_map and per alias ({vendor: [alias, ...]}),
+    one keyword rule per entry in keywords ({category: [keyword, ...]}) and one exclusion
+    per phrase in exclusions.
+    """
+    rules = []
+    for category, vendor in category_vendor_map.items():
+        for pattern in [vendor, *(aliases or {}).get(vendor, [])]:
+            rules.append(Rule(pattern, category, vendor))
+    for category, patterns in (keywords or {}).items():
+        rules += [Rule(pattern, category, None) for pattern in patterns]
+    rules += [Rule(pattern, None, None) for pattern in exclusions]
+    return rules
+
+
+def load_rules_csv(path: str) -> list:
+    """
+    Rules from a CSV with pattern, category and vendor columns. Rows with a vendor are
+    vendor rules, rows with only a category keyword rules, and rows with neither exclusions.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            Rule(row["pattern"], row.get("category") or None, row.get("vendor") or None)
+            for row in csv.DictReader(f)
+            if row.get("pattern")
+        ]
+
+
+class RuleEngine:
+    """
+    Match transaction text against keyword rules.
+
+    Patterns match case- and whitespace-insensitively on word boundaries. A match inside
+    a longer one is dropped (so the "uber eats" keyword wins over the "uber" vendor). A
+    row only resolves when the remaining matches include exactly one vendor and at least
+    one keyword, all for the same category, and no exclusion: a vendor name alone says
+    too little ("Deloitte statutory audit fee" is not consulting). Rows the rules
+    contradict are counted as ambiguous; those and rows with only vendor or only keyword
+    matches are left for the next tier. Later rules with the same pattern replace earlier ones.
+    """
+
+    def __init__(self, rules: list):
+        by_pattern = {}
+        for rule in rules:
+            pattern = normalize_vendor(rule.pattern)
+            if pattern:
+                by_pattern[pattern] = rule
+        self.rules = list(by_pattern.values())
+        self.matcher = AhoCorasick(list(by_pattern))
+        self._counts = {"scanned": 0, "resolved": 0, "ambiguous": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def match(self, text: str):
+        """The (category, vendor) the rules assign to text, "ambiguous" if they conflict, else None"""
+        text = normalize_vendor(text)
+        spans = []
+        for start, end, index in self.matcher.find_all(text):
+            if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                spans.append((start, end, index))
+        if not spans:
+            return None
+
+        outermost = [
+            span for span in spans
+            if not any(o[0] <= span[0] and span[1] <= o[1] and (o[1] - o[0]) > (span[1] - span[0]) for o in spans)
+        ]
+        matched = [self.rules[index] for _, _, index in outermost]
+        categories = {rule.category for rule in matched}
+        vendors = {rule.vendor for rule in matched} - {None}
+        if None in categories or len(categories) != 1 or len(vendors) > 1:
+            return "ambiguous"
+        if not vendors or all(rule.vendor is not None for rule in matched):
+            return None
+        return categories.pop(), vendors.pop()
+
+    def classify(self, raw_inputs: list) -> list:
+        """A parsed classification per input, or None where the rules do not decide it"""
+        start = time.perf_counter()
+        results = []
+        ambiguous = 0
+        for raw_input in raw_inputs:
+            matched = self.match(raw_input)
+            if matched is None or matched == "ambiguous":
+                ambiguous += matched == "ambiguous"
+                results.append(None)
+            else:
+                category, vendor = matched
+                results.append({"category": category, "vendor": vendor, "enriched_description": None})
+        with self._lock:
+            self._counts["scanned"] += len(raw_inputs)
+            self._counts["resolved"] += sum(result is not None for result in results)
+            self._counts["ambiguous"] += ambiguous
+            self._counts["seconds"] += time.perf_counter() - start
+        return results
+
+    def counts(self) -> dict:
+        """Raw counters, for merging into another process's engine"""
+        with self._lock:
+            return dict(self._counts)
+
+    def merge(self, counts: dict) -> None:
+        with self._lock:
+            for name in self._counts:
+                self._counts[name] += counts.get(name, 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self._counts, 0)
+            self._counts["seconds"] = 0.0
+
+    def stats(self) -> dict:
+        """Rows scanned, resolved and left ambiguous so far, with the matching cost per row"""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["rules"] = len(self.rules)
+        counts["resolved_rate"] = counts["resolved"] / counts["scanned"] if counts["scanned"] else 0.0
+        counts["us_per_row"] = 1e6 * counts["seconds"] / counts["scanned"] if counts["scanned"] else 0.0
+        return counts
+
+
+class RuleTier:
+    """Classifier tier that accepts rows the keyword rules resolve unambiguously"""
+
+    name = "rules"
+
+    def __init__(self, engine: RuleEngine):
+        self.engine = engine
+
+    def classify(self, raw_inputs: list) -> list:
+        """Return a parsed classification per input, or None to defer it to the next tier"""
+        return self.engine.classify(raw_inputs)
@@ -5,36 +5,78 @@ Professional Streamlit application with PowerBI-like design
 
 import os
 import io
-import json
+import importlib.util
+import time
+import uuid
 from datetime import datetime
-from difflib import get_close_matches
-import re
 
 import pandas as pd
 import streamlit as st
-from dotenv import load_dotenv
-from supabase import create_client, Client
-import plotly.express as px
-import plotly.graph_objects as go
-from fpdf import FPDF
-
-# Gemini AI
-try:
-    import google.generativeai as genai
-except ImportError:
+
+# Gemini AI (imported on first request; only check it is installed here). find_spec
+# of a submodule imports its parent and raises when "google" itself is missing
+if importlib.util.find_spec("google") is None or importlib.util.find_spec("google.generativeai") is None:
     st.error("Please install google-generativeai: pip install google-generativeai")
     st.stop()
 
-# ---------------------------------------------------------
-# Configuration
-# ---------------------------------------------------------
-load_dotenv()
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL = "gemini-2.5-flash"
-
-SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("VITE_SUPABASE_ANON_KEY")
+from batch_jobs import ACTIVE_STATUSES, JobRunner, JobStore
+from spend_core import (
+    ANALYTICS_MEMO_ENTRIES,
+    BATCH_MAX_WORKERS,
+    BATCH_REQUESTS_PER_MINUTE,
+    CATEGORY_VENDOR_MAP,
+    EXPORT_CACHE_ENTRIES,
+    EXPORT_CACHE_MB,
+    GEMINI_API_KEY,
+    GEMINI_BATCH_SIZE,
+    JOB_CHUNK_ROWS,
+    JOB_DB_PATH,
+    JOB_POLL_SECONDS,
+    PDF_POLL_SECONDS,
+    LOCAL_MODEL_PATH,
+    LOCAL_MODEL_THRESHOLD,
+    METRICS_JSON_LOG,
+    METRICS_PROMETHEUS_PATH,
+    NEAR_DUPLICATE_CLUSTERING,
+    RULE_ENGINE,
+    STREAMING_AUTO_MB,
+    STREAMING_CHUNK_ROWS,
+    STREAMING_SPILL_DIR,
+    SUPABASE_CHUNK_SIZE,
+    SUPABASE_KEY,
+    SUPABASE_URL,
+    build_classifier_tiers,
+    classify_job_chunk,
+    classify_transactions,
+    create_pdf_report,
+    failed_rows,
+    fetch_analytics_summary,
+    get_classification_cache,
+    get_metrics,
+    get_rule_engine,
+    get_usage_meter,
+    get_vendor_index,
+    load_from_supabase,
+    merge_tier_reports,
+    new_batch_id,
+    refresh_from_supabase,
+    save_to_supabase,
+    signature_compression,
+    summarize_classifications,
+    tier_report_frame,
+)
+from bert_classifier import local_model_available
+from dataset_store import DatasetStore, frame_records
+from exports import EXPORT_FORMATS
+from llm_usage import usage_frame
+from metrics import latency_frame, timed
+from memo_cache import MemoCache, frame_content_fingerprint, frame_fingerprint, payload_fingerprint
+from streaming_ingest import (
+    ResultSpillWriter,
+    iter_raw_input_chunks,
+    iter_spill_records,
+    read_spill_preview,
+)
 
 if not GEMINI_API_KEY:
     st.error("❌ GEMINI_API_KEY not found in .env file")
@@ -44,155 +86,225 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     st.error("❌ Supabase credentials not found in .env file")
     st.stop()
 
-# Initialize clients
-genai.configure(api_key=GEMINI_API_KEY)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# Hard-coded vendor map
-CATEGORY_VENDOR_MAP = {
-    "Cloud Services": "Amazon Web Services",
-    "Employee Engagement > Meals & Entertainment": "Dominos",
-    "IT Hardware": "HP Inc.",
-    "Office Supplies": "Office Depot",
-    "Professional Services > Audit": "EY",
-    "Professional Services > Consulting": "Deloitte",
-    "Software Subscriptions": "Adobe",
-    "Travel > Accommodation": "Taj Hotels",
-    "Travel > Local Transport": "Uber",
-}
-ALL_HARDCODED_VENDORS = list(CATEGORY_VENDOR_MAP.values())
-
 # ---------------------------------------------------------
-# Utility Functions
+# UI Helpers
 # ---------------------------------------------------------
-def build_gemini_prompt(raw_input: str) -> str:
-    """Build prompt for Gemini AI classification with vendor correction and professional enrichment"""
-    return f"""
-You are a spend classification and enrichment assistant. For the given transaction raw text, return ONLY a valid JSON object (no extra text)
-with the following fields:
-
-{{
-  "category": string,                // e.g. "Travel > Local Transport"
-  "vendor": string|null,             // vendor name if explicitly present (correct spelling), otherwise null
-  "enriched_description": string     // professional 1-2 line purpose of the spend
-}}
-
-Rules:
-1. If the input explicitly mentions a vendor name (even if misspelled), correct the spelling to the most likely real vendor and return it.
-2. If no vendor is mentioned, set vendor to null.
-3. Always correct obvious misspellings (e.g., "Mcdonld's" -> "McDonald's", "Stabucks" -> "Starbucks").
-4. Enriched description should be professional, precise, and limited to 1–2 lines (e.g., "Business meal at McDonald's for lunch" instead of "Lunch at McDonald's").
-5. If unsure about category or vendor, set them to null.
-6. Return strictly JSON and nothing else.
-
-Input: "{raw_input}"
-Output:
-"""
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """Start the background job worker once per process; it resumes unfinished jobs"""
+    return JobRunner(JobStore(JOB_DB_PATH), classify_job_chunk, chunk_rows=JOB_CHUNK_ROWS)
+
+@st.cache_resource
+def get_analytics_memo() -> MemoCache:
+    """Derived analytics tables and figures, shared by every session"""
+    return MemoCache(max_entries=ANALYTICS_MEMO_ENTRIES)
+
+def analytics_summary_for(df: pd.DataFrame) -> dict:
+    """summarize_classifications, reused while the data's fingerprint is unchanged"""
+    return get_analytics_memo().get_or_compute(
+        ("summary", frame_fingerprint(df)),
+        lambda: summarize_classifications(df)
+    )
 
+@timed(get_metrics, "analytics.figures")
+def build_analytics_figures(summary: dict) -> dict:
+    """Plotly figures for the Analytics tab (timeline is None when no dates were found)"""
+    # plotly is imported only once there is data to chart
+    import plotly.express as px
+
+    category_counts = pd.DataFrame(summary["category_counts"], columns=["category", "count"])
+    fig_cat = px.bar(
+        x=category_counts["count"],
+        y=category_counts["category"],
+        orientation='h',
+        labels={'x': 'Count', 'y': 'Category'},
+        color=category_counts["count"],
+        color_continuous_scale='Viridis'
+    )
+    fig_cat.update_layout(
+        showlegend=False,
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
 
-def call_gemini_for_input(raw_input: str) -> dict:
-    """Call Gemini AI and parse response"""
-    try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        prompt = build_gemini_prompt(raw_input)
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-
-        # Parse JSON from response
-        start = text.find("{")
-        end = text.rfind("}")
-        if start == -1 or end == -1:
-            return {"category": None, "vendor": None, "enriched_description": None}
-
-        parsed = json.loads(text[start:end+1])
-        return {
-            "category": parsed.get("category"),
-            "vendor": parsed.get("vendor"),
-            "enriched_description": parsed.get("enriched_description"),
-        }
-    except Exception as e:
-        st.error(f"Error calling Gemini: {str(e)}")
-        return {"category": None, "vendor": None, "enriched_description": None}
-
-def fuzzy_correct_vendor(given_vendor: str) -> str:
-    """Fuzzy match vendor to known vendors"""
-    if not given_vendor:
-        return None
-    matches = get_close_matches(given_vendor, ALL_HARDCODED_VENDORS, n=1, cutoff=0.6)
-    return matches[0] if matches else given_vendor
-
-def assign_vendor_by_category(category: str) -> str:
-    """Assign vendor based on category"""
-    return CATEGORY_VENDOR_MAP.get(category, "Unknown Vendor")
-
-def save_to_supabase(records: list) -> bool:
-    """Save classification results to Supabase"""
-    try:
-        # Insert records into classifications table
-        for record in records:
-            supabase.table("classifications").insert({
-                "raw_input": record["raw_input"],
-                "category": record["category"],
-                "vendor": record["vendor"],
-                "enriched_description": record["enriched_description"],
-                "created_at": datetime.utcnow().isoformat()
-            }).execute()
-        return True
-    except Exception as e:
-        st.error(f"Error saving to Supabase: {str(e)}")
-        return False
+    vendor_counts = pd.DataFrame(summary["vendor_counts"], columns=["vendor", "count"])
+    fig_vendor = px.bar(
+        x=vendor_counts["count"],
+        y=vendor_counts["vendor"],
+        orientation='h',
+        labels={'x': 'Count', 'y': 'Vendor'},
+        color=vendor_counts["count"],
+        color_continuous_scale='Plasma'
+    )
+    fig_vendor.update_layout(
+        showlegend=False,
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+
+    fig_timeline = None
+    if summary["daily_counts"]:
+        daily_counts = pd.DataFrame(summary["daily_counts"])
+        daily_counts.columns = ["Date", "Count"]
+        daily_counts["Date"] = pd.to_datetime(daily_counts["Date"])
+
+        fig_timeline = px.line(
+            daily_counts,
+            x="Date",
+            y="Count",
+            markers=True,
+            labels={'Count': 'Transactions', 'Date': 'Date'}
+        )
+        fig_timeline.update_traces(line_color='#667eea', line_width=3)
+        fig_timeline.update_layout(
+            height=350,
+            margin=dict(l=20, r=20, t=40, b=20)
+        )
+
+    cat_vendor_top = pd.DataFrame(summary["category_vendor"], columns=["category", "vendor", "count"])
+    fig_matrix = px.scatter(
+        cat_vendor_top,
+        x="category",
+        y="vendor",
+        size="count",
+        color="count",
+        color_continuous_scale="Blues",
+        size_max=30
+    )
+    fig_matrix.update_layout(
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+
+    return {"category": fig_cat, "vendor": fig_vendor, "timeline": fig_timeline, "matrix": fig_matrix}
+
+@st.cache_resource
+def get_report_worker():
+    """Background PDF builds, shared by every session so reruns never restart them"""
+    # pdf_report pulls in fpdf, so it is imported on first use
+    from pdf_report import ReportWorker
+    return ReportWorker()
+
+def pdf_report_button(df: pd.DataFrame, title: str, file_name: str, label: str, key: str) -> None:
+    """
+    Build the PDF on the report worker, then offer the download. While it builds, the
+    progress bar is drawn once and the end of the script schedules a rerun to update it.
+    """
+    worker = get_report_worker()
+    task_key = (frame_content_fingerprint(df), title)
+    task = worker.get(task_key)
+    if task is None:
+        if not st.button(f"🛠️ Build {label}", key=f"{key}_build", use_container_width=True):
+            return
+        task = worker.submit(task_key, create_pdf_report, df, title, summary=analytics_summary_for(df))
+
+    if not task.done():
+        st.progress(task.progress, text=f"Building PDF... {task.progress:.0%}")
+        st.session_state["pdf_build_pending"] = True
+        return
+
+    if task.future.exception() is not None:
+        st.error(f"Error building PDF: {task.future.exception()}")
+        return
+    st.download_button(
+        f"📄 Download {label}",
+        task.result(),
+        file_name,
+        "application/pdf",
+        key=key,
+        use_container_width=True
+    )
+
+@st.cache_resource
+def get_dataset_store() -> DatasetStore:
+    """Loaded datasets, held once in compact form and shared by every tab and session"""
+    return DatasetStore()
+
+def keep_dataset(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Keep df in session state under name as the shared compact copy, which is returned"""
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    shared = get_dataset_store().put(session_id, name, df)
+    st.session_state[name] = shared
+    return shared
+
+@st.cache_resource
+def get_export_cache() -> MemoCache:
+    """Built export files, shared by every session and evicted by total size"""
+    return MemoCache(max_entries=EXPORT_CACHE_ENTRIES, max_bytes=int(EXPORT_CACHE_MB * 1024 * 1024))
+
+def export_button(df: pd.DataFrame, fmt: str, file_name: str, label: str, key: str) -> None:
+    """
+    Offer df as a download in fmt (a key of EXPORT_FORMATS). The file is only built when
+    asked for, then kept in the export cache so later reruns serve it without rebuilding.
+    """
+    build, mime = EXPORT_FORMATS[fmt]
+    cache = get_export_cache()
+    cache_key = (frame_content_fingerprint(df), fmt)
+    data = cache.get(cache_key)
+    if data is None:
+        if not st.button(f"🛠️ Prepare {label}", key=f"{key}_build", use_container_width=True):
+            return
+        with st.spinner(f"Preparing {label}..."):
+            data = cache.get_or_compute(cache_key, lambda: timed(get_metrics, f"export.{fmt}")(build)(df))
+
+    st.download_button(
+        f"📥 Download {label}",
+        data,
+        file_name,
+        mime,
+        key=key,
+        use_container_width=True
+    )
+
+def show_tier_report(tier_report: dict) -> None:
+    """Rows and latency per classifier tier, plus how far near-duplicate clustering shrank the batch"""
+    st.dataframe(tier_report_frame(tier_report), use_container_width=True, hide_index=True)
+    total_rows = sum(stats["rows"] for stats in tier_report.values())
+    if tier_report.get("cluster", {}).get("rows"):
+        compression = signature_compression(tier_report)
+        st.caption(
+            f"🧬 {round(compression * total_rows):,} unique signatures for {total_rows:,} rows "
+            f"(compression ratio {compression:.3f})"
+        )
 
-def load_from_supabase(limit: int = 100) -> pd.DataFrame:
-    """Load classification results from Supabase"""
+def save_results(records: list, batch_id: str, row_indices=None) -> dict:
+    """save_to_supabase, reporting failures in the page"""
+    report = save_to_supabase(records, batch_id=batch_id, row_indices=row_indices)
+    if not report["ok"]:
+        st.error(f"Error saving to Supabase: {report['error']}")
+    return report
+
+def add_save_counts(totals: dict, report: dict) -> None:
+    """Add one save_results report's written/skipped/failed counts to running totals"""
+    for count in ("written", "skipped", "failed"):
+        totals[count] += report[count]
+
+def show_save_totals(totals: dict, complete: bool) -> None:
+    """Confirm a save made in several calls, or say how far it got when one of them failed"""
+    counts = (
+        f"{totals['written']:,} records "
+        f"({totals['skipped']:,} already in database, {totals['failed']:,} failed rows not saved)"
+    )
+    if complete:
+        st.success(f"✅ Saved {counts}")
+    else:
+        st.warning(f"⚠️ Saving stopped at an error after {counts}; save again to retry the rest")
+
+def load_results(limit: int = 100, progress_callback=None) -> pd.DataFrame:
+    """load_from_supabase, reporting failures in the page"""
     try:
-        response = supabase.table("classifications").select("*").order("created_at", desc=True).limit(limit).execute()
-        if response.data:
-            return pd.DataFrame(response.data)
-        return pd.DataFrame()
+        return load_from_supabase(limit=limit, progress_callback=progress_callback)
     except Exception as e:
         st.error(f"Error loading from Supabase: {str(e)}")
         return pd.DataFrame()
 
-def extract_date(text: str):
-    """Extract date from transaction text"""
-    patterns = [
-        r"(\d{4}-\d{2}-\d{2})",
-        r"(\d{2}/\d{2}/\d{4})",
-        r"(\d{2}-\d{2}-\d{4})"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, str(text))
-        if match:
-            try:
-                return pd.to_datetime(match.group(1))
-            except:
-                continue
-    return None
-
-
-def create_pdf_report(df: pd.DataFrame, title: str = "Spend Enrichment Report") -> bytes:
-    """Generate PDF report from dataframe"""
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-
-    # Title
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, title, ln=True, align="C")
-    pdf.ln(10)
-
-    # Records
-    pdf.set_font("Arial", "", 9)
-    for idx, row in df.iterrows():
-        pdf.set_font("Arial", "B", 10)
-        pdf.multi_cell(0, 5, f"Transaction {idx + 1}")
-        pdf.set_font("Arial", "", 9)
-        pdf.multi_cell(0, 5, f"Input: {row.get('raw_input', '')[:100]}")
-        pdf.multi_cell(0, 5, f"Category: {row.get('category', '')}  |  Vendor: {row.get('vendor', '')}")
-        pdf.multi_cell(0, 5, f"Description: {row.get('enriched_description', '')}")
-        pdf.ln(3)
-
-    return pdf.output(dest="S").encode("latin-1")
+def refresh_results(df: pd.DataFrame, progress_callback=None) -> tuple:
+    """refresh_from_supabase, reporting failures in the page"""
+    try:
+        return refresh_from_supabase(df, progress_callback=progress_callback)
+    except Exception as e:
+        st.error(f"Error refreshing from Supabase: {str(e)}")
+        return df, 0
 
 # ---------------------------------------------------------
 # Streamlit Configuration
@@ -338,11 +450,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Navigation tabs
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "🏠 Home",
     "🔍 Classification",
     "📊 Analytics",
     "📄 Reports",
+    "⏱️ Performance",
 ])
 
 # ---------------------------------------------------------
@@ -440,8 +553,30 @@ with tab2:
         )
 
         if uploaded_file:
-            df_upload = pd.read_csv(uploaded_file)
-            st.info(f"📊 Loaded {len(df_upload)} transactions")
+            streaming_mode = st.checkbox(
+                "📦 Streaming mode (large files)",
+                value=uploaded_file.size > STREAMING_AUTO_MB * 1e6,
+                help="Read and classify the file in chunks; results spill to disk instead of memory"
+            )
+            if streaming_mode:
+                col_stream1, col_stream2 = st.columns(2)
+                with col_stream1:
+                    stream_chunksize = st.number_input(
+                        "Rows per chunk", min_value=100, value=STREAMING_CHUNK_ROWS, step=1000
+                    )
+                with col_stream2:
+                    persist_chunks = st.checkbox("Save each chunk to database", value=False)
+                df_upload = pd.read_csv(uploaded_file, nrows=10)
+                uploaded_file.seek(0)
+                st.info(f"📊 Streaming {uploaded_file.size / 1e6:.1f} MB in chunks of {stream_chunksize:,} rows")
+            else:
+                run_in_background = st.checkbox(
+                    "🧵 Run as background job (resumable)",
+                    value=True,
+                    help="Keeps running across page interactions and restarts; finished rows are never re-sent"
+                )
+                df_upload = pd.read_csv(uploaded_file)
+                st.info(f"📊 Loaded {len(df_upload)} transactions")
 
             with st.expander("Preview uploaded data"):
                 st.dataframe(df_upload.head(10), use_container_width=True)
@@ -449,6 +584,8 @@ with tab2:
             classify_batch = st.button("🚀 Classify All", type="primary", use_container_width=True)
         else:
             classify_batch = False
+            streaming_mode = False
+            run_in_background = False
 
     with col_right:
         st.markdown("#### Settings")
@@ -472,31 +609,108 @@ with tab2:
                 ),
                 use_container_width=True
             )
+            # Only report the size once built; building it here would delay the first paint
+            if get_vendor_index.cache_info().currsize:
+                st.caption(f"Vendor master: {len(get_vendor_index()):,} vendors")
+            else:
+                st.caption("Vendor master: loaded on first classification")
+
+        with st.expander("⚡ Batch Performance"):
+            max_concurrency = st.slider(
+                "Concurrent requests",
+                min_value=1,
+                max_value=32,
+                value=BATCH_MAX_WORKERS,
+                help="Number of Gemini calls in flight at once"
+            )
+            requests_per_minute = st.number_input(
+                "Rate limit (requests/min)",
+                min_value=0,
+                value=BATCH_REQUESTS_PER_MINUTE,
+                help="0 disables rate limiting; 429/5xx errors are retried with backoff"
+            )
+            packed_batch_size = st.slider(
+                "Transactions per request",
+                min_value=1,
+                max_value=50,
+                value=GEMINI_BATCH_SIZE,
+                help="Pack several transactions into one Gemini prompt; 1 sends one request per row"
+            )
+            cluster_near_duplicates = st.checkbox(
+                "Cluster near-duplicates",
+                value=NEAR_DUPLICATE_CLUSTERING,
+                help="Classify one row per pattern (PO/invoice numbers, amounts and dates masked) "
+                     "and copy its label to the rest"
+            )
+
+        with st.expander("🔤 Keyword Rules"):
+            use_rules = st.checkbox(
+                "Match vendor and keyword rules first",
+                value=RULE_ENGINE,
+                help="Rows the rules resolve unambiguously skip every model call"
+            )
+            rule_stats = get_rule_engine().stats()
+            st.caption(
+                f"{rule_stats['rules']} rules · resolved {rule_stats['resolved']:,} of "
+                f"{rule_stats['scanned']:,} rows scanned ({rule_stats['resolved_rate']:.0%}) · "
+                f"{rule_stats['us_per_row']:.1f} µs per row"
+            )
+
+        with st.expander("🧠 Local Model"):
+            local_available = local_model_available(LOCAL_MODEL_PATH)
+            use_local_model = st.checkbox(
+                "Use local BERT model first",
+                value=local_available,
+                disabled=not local_available,
+                help="Confident local predictions skip the Gemini call"
+            )
+            local_threshold = st.slider(
+                "Confidence threshold",
+                min_value=0.5,
+                max_value=0.99,
+                value=LOCAL_MODEL_THRESHOLD,
+                step=0.01,
+                disabled=not use_local_model
+            )
+            if not local_available:
+                st.caption(f"No local model found at {LOCAL_MODEL_PATH}")
+
+        with st.expander("🗄️ Classification Cache"):
+            cache_stats = get_classification_cache().stats()
+            cache_col1, cache_col2 = st.columns(2)
+            with cache_col1:
+                st.metric("Hits", cache_stats["hits"])
+                st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+            with cache_col2:
+                st.metric("Misses", cache_stats["misses"])
+                st.metric("Entries", cache_stats["entries"])
+            if st.button("🗑️ Clear Cache", use_container_width=True):
+                get_classification_cache().clear()
+                st.rerun()
+
+        with st.expander("📏 Gemini Usage"):
+            usage = get_usage_meter().snapshot()
+            if usage:
+                st.dataframe(usage_frame(usage), use_container_width=True, hide_index=True)
+            else:
+                st.caption("No Gemini requests yet")
+            if st.button("↺ Reset Usage", use_container_width=True):
+                get_usage_meter().reset()
+                st.rerun()
 
         show_raw_json = st.checkbox("Show raw AI response", value=False)
 
     # Process single classification
     if classify_single and raw_text:
         with st.spinner("🤖 Classifying transaction..."):
-            parsed = call_gemini_for_input(raw_text)
-
-            gem_vendor = parsed.get("vendor")
-            gem_cat = parsed.get("category")
-            enriched = parsed.get("enriched_description") or ""
-
-            vendor_used = (
-                fuzzy_correct_vendor(gem_vendor) if gem_vendor
-                else assign_vendor_by_category(gem_cat)
+            single_results, single_report = classify_transactions(
+                [raw_text],
+                tiers=build_classifier_tiers(use_local_model, local_threshold, use_rules)
             )
-
-            result_data = {
-                "raw_input": raw_text,
-                "category": gem_cat or "Unknown",
-                "vendor": vendor_used,
-                "enriched_description": enriched
-            }
-
-            st.session_state["last_single_result"] = result_data
+            st.session_state["last_single_result"] = single_results[0]
+            st.session_state["last_single_batch_id"] = new_batch_id()
+            if failed_rows(single_report):
+                st.error("Error calling Gemini: request failed after retries")
 
         st.success("✅ Classification complete!")
 
@@ -528,85 +742,279 @@ with tab2:
 
     # Save single result
     if save_single and "last_single_result" in st.session_state:
-        if save_to_supabase([st.session_state["last_single_result"]]):
-            st.success("✅ Saved to database!")
+        save_report = save_results([st.session_state["last_single_result"]], st.session_state["last_single_batch_id"])
+        if save_report["ok"]:
+            if save_report["written"]:
+                st.success("✅ Saved to database!")
+            elif save_report["failed"]:
+                st.warning("⚠️ This transaction failed classification and was not saved")
+            else:
+                st.info("ℹ️ This result is already in the database")
 
-    # Process batch classification
-    if classify_batch and uploaded_file:
-        results = []
+    # Process streaming batch classification
+    if classify_batch and uploaded_file and streaming_mode:
         progress_bar = st.progress(0)
         status_text = st.empty()
 
-        # Ensure raw_input column exists
-        if "raw_input" not in df_upload.columns:
-            if len(df_upload.columns) == 1:
-                df_upload.columns = ["raw_input"]
-            else:
-                st.error("❌ CSV must have 'raw_input' column")
-                st.stop()
-
-        for idx, row in df_upload.iterrows():
-            status_text.text(f"Processing transaction {idx + 1}/{len(df_upload)}")
+        previous_spill = st.session_state.pop("last_batch_spill", None)
+        if previous_spill:
+            previous_spill["handle"].discard()
+
+        stream_tiers = build_classifier_tiers(use_local_model, local_threshold, use_rules)
+        stream_tier_report = {}
+        stream_saved = {"written": 0, "skipped": 0, "failed": 0}
+        stream_batch_id = new_batch_id()
+
+        try:
+            with ResultSpillWriter(spill_dir=STREAMING_SPILL_DIR) as spill:
+                for chunk_inputs in iter_raw_input_chunks(uploaded_file, stream_chunksize):
+                    chunk_results, chunk_report = classify_transactions(
+                        chunk_inputs,
+                        max_workers=max_concurrency,
+                        requests_per_minute=requests_per_minute,
+                        batch_size=packed_batch_size,
+                        tiers=stream_tiers,
+                        cluster=cluster_near_duplicates,
+                    )
+                    first_row = spill.rows
+                    spill.write(chunk_results)
+                    merge_tier_reports(stream_tier_report, chunk_report)
+
+                    if persist_chunks:
+                        save_report = save_results(
+                            chunk_results, stream_batch_id, range(first_row, first_row + len(chunk_results))
+                        )
+                        add_save_counts(stream_saved, save_report)
+
+                    status_text.text(f"Processed {spill.rows:,} transactions")
+                    progress_bar.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0))
+        except ValueError as e:
+            st.error(f"❌ {str(e)}")
+            st.stop()
 
-            raw_input = str(row["raw_input"])
-            parsed = call_gemini_for_input(raw_input)
-
-            gem_vendor = parsed.get("vendor")
-            gem_cat = parsed.get("category")
-            enriched = parsed.get("enriched_description") or ""
+        status_text.empty()
+        progress_bar.empty()
 
-            vendor_used = (
-                fuzzy_correct_vendor(gem_vendor) if gem_vendor
-                else assign_vendor_by_category(gem_cat)
+        # The handle deletes the spill file when replaced, when the session ends or at exit
+        st.session_state["last_batch_spill"] = {
+            "path": spill.path, "rows": spill.rows, "batch_id": stream_batch_id, "handle": spill.handle()
+        }
+        st.success(f"✅ Classified {spill.rows:,} transactions!")
+        if failed_rows(stream_tier_report):
+            st.warning(f"⚠️ {failed_rows(stream_tier_report):,} transactions failed after retries")
+        if persist_chunks:
+            st.caption(
+                f"Saved {stream_saved['written']:,} records ({stream_saved['skipped']:,} already in database, "
+                f"{stream_saved['failed']:,} failed rows not saved)"
             )
 
-            results.append({
-                "raw_input": raw_input,
-                "category": gem_cat or "Unknown",
-                "vendor": vendor_used,
-                "enriched_description": enriched
-            })
+        with st.expander("🧠 Classifier Tiers", expanded=True):
+            show_tier_report(stream_tier_report)
+
+    # Streamed results live on disk, so they survive reruns without being held in memory
+    if "last_batch_spill" in st.session_state and os.path.exists(st.session_state["last_batch_spill"]["path"]):
+        spill_info = st.session_state["last_batch_spill"]
+
+        st.markdown(f"#### Streamed Results ({spill_info['rows']:,} rows, first 100 shown)")
+        st.dataframe(read_spill_preview(spill_info["path"]), use_container_width=True)
+
+        col_spill1, col_spill2 = st.columns(2)
+
+        with col_spill1:
+            if st.button("💾 Save All to Database", key="save_spill", use_container_width=True):
+                spill_saved = {"written": 0, "skipped": 0, "failed": 0}
+                spill_complete = True
+                spill_offset = 0
+                with st.spinner("Saving streamed results..."):
+                    for spill_records in iter_spill_records(spill_info["path"], batch_size=STREAMING_CHUNK_ROWS):
+                        save_report = save_results(
+                            spill_records, spill_info["batch_id"],
+                            range(spill_offset, spill_offset + len(spill_records))
+                        )
+                        spill_offset += len(spill_records)
+                        add_save_counts(spill_saved, save_report)
+                        if not save_report["ok"]:
+                            spill_complete = False
+                            break
+                show_save_totals(spill_saved, spill_complete)
+
+        with col_spill2:
+            with open(spill_info["path"], "rb") as spill_file:
+                st.download_button(
+                    "📥 Download Parquet",
+                    spill_file,
+                    "batch_results.parquet",
+                    "application/vnd.apache.parquet",
+                    use_container_width=True
+                )
+
+    # Ensure raw_input column exists
+    if classify_batch and uploaded_file and not streaming_mode and "raw_input" not in df_upload.columns:
+        if len(df_upload.columns) == 1:
+            df_upload.columns = ["raw_input"]
+        else:
+            st.error("❌ CSV must have 'raw_input' column")
+            st.stop()
+
+    # Submit batch classification as a background job
+    if classify_batch and uploaded_file and not streaming_mode and run_in_background:
+        st.session_state["active_job_id"] = get_job_runner().submit(
+            df_upload["raw_input"].astype(str).tolist(),
+            name=uploaded_file.name,
+            settings={
+                "max_workers": max_concurrency,
+                "requests_per_minute": requests_per_minute,
+                "batch_size": packed_batch_size,
+                "use_local_model": use_local_model,
+                "local_threshold": local_threshold,
+                "use_rules": use_rules,
+                "cluster": cluster_near_duplicates,
+            }
+        )
+        st.success("🧵 Job submitted! Track it in Background Jobs below.")
 
-            progress_bar.progress((idx + 1) / len(df_upload))
+    # Process batch classification
+    if classify_batch and uploaded_file and not streaming_mode and not run_in_background:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        def update_progress(done, total):
+            status_text.text(f"Processed {done}/{total} transactions")
+            progress_bar.progress(done / total)
+
+        results, tier_report = classify_transactions(
+            df_upload["raw_input"].astype(str).tolist(),
+            max_workers=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            batch_size=packed_batch_size,
+            tiers=build_classifier_tiers(use_local_model, local_threshold, use_rules),
+            progress_callback=update_progress,
+            cluster=cluster_near_duplicates,
+        )
 
         status_text.empty()
         progress_bar.empty()
 
-        st.session_state["last_batch_results"] = pd.DataFrame(results)
+        keep_dataset("last_batch_results", pd.DataFrame(results))
+        st.session_state["last_batch_id"] = new_batch_id()
+        st.session_state["last_batch_tier_report"] = tier_report
         st.success(f"✅ Classified {len(results)} transactions!")
+        if failed_rows(tier_report):
+            st.warning(f"⚠️ {failed_rows(tier_report):,} transactions failed after retries")
+
+    # Batch results (kept in session state so the buttons below survive reruns)
+    if "last_batch_results" in st.session_state:
+        batch_results = st.session_state["last_batch_results"]
+
+        with st.expander("🧠 Classifier Tiers", expanded=bool(classify_batch)):
+            show_tier_report(st.session_state.get("last_batch_tier_report", {}))
 
         st.markdown("#### Results")
-        st.dataframe(st.session_state["last_batch_results"], use_container_width=True)
+        st.dataframe(batch_results, use_container_width=True)
 
         # Save to database
         col_save1, col_save2, col_save3 = st.columns(3)
 
         with col_save1:
             if st.button("💾 Save All to Database", use_container_width=True):
-                if save_to_supabase(results):
-                    st.success("✅ All records saved!")
+                save_report = save_results(frame_records(batch_results), st.session_state["last_batch_id"])
+                if save_report["ok"]:
+                    st.success(
+                        f"✅ Saved {save_report['written']} records "
+                        f"({save_report['skipped']} already in database, {save_report['failed']} failed rows not saved)"
+                    )
+                    if save_report["chunk_seconds"]:
+                        st.caption(
+                            f"{len(save_report['chunk_seconds'])} chunks, "
+                            f"{max(save_report['chunk_seconds']):.2f}s slowest chunk"
+                        )
 
         with col_save2:
-            csv_buffer = io.BytesIO()
-            st.session_state["last_batch_results"].to_csv(csv_buffer, index=False)
-            st.download_button(
-                "📥 Download CSV",
-                csv_buffer.getvalue(),
-                "batch_results.csv",
-                "text/csv",
-                use_container_width=True
-            )
+            export_button(batch_results, "csv", "batch_results.csv", "CSV", key="batch_csv")
 
         with col_save3:
-            pdf_bytes = create_pdf_report(st.session_state["last_batch_results"], "Batch Classification Report")
-            st.download_button(
-                "📄 Download PDF",
-                pdf_bytes,
+            pdf_report_button(
+                batch_results,
+                "Batch Classification Report",
                 "batch_results.pdf",
-                "application/pdf",
-                use_container_width=True
+                "PDF",
+                key="batch_pdf"
             )
 
+    # Background job status
+    job_runner = get_job_runner()
+    recent_jobs = job_runner.store.list_jobs()
+
+    if recent_jobs:
+        st.markdown("---")
+        st.markdown("#### 🧵 Background Jobs")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Job": job["id"],
+                    "File": job["name"],
+                    "Status": job["status"],
+                    "Progress": f"{job['done']:,}/{job['total']:,}",
+                    "Updated": datetime.fromtimestamp(job["updated_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                    "Error": job["error"] or "",
+                }
+                for job in recent_jobs
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        job_names = {job["id"]: job["name"] for job in recent_jobs}
+        job_ids = list(job_names)
+        active_job_id = st.session_state.get("active_job_id")
+        selected_job_id = st.selectbox(
+            "Selected job",
+            job_ids,
+            index=job_ids.index(active_job_id) if active_job_id in job_ids else 0,
+            format_func=lambda job_id: f"{job_id} — {job_names[job_id]}"
+        )
+        st.session_state["active_job_id"] = selected_job_id
+        selected_job = job_runner.store.get_job(selected_job_id)
+
+        st.progress(
+            selected_job["done"] / max(selected_job["total"], 1),
+            text=f"{selected_job['status'].title()}: {selected_job['done']:,}/{selected_job['total']:,} rows"
+        )
+
+        col_job1, col_job2, col_job3, col_job4 = st.columns(4)
+        with col_job1:
+            st.button("🔄 Refresh", key="refresh_jobs", use_container_width=True)
+        with col_job2:
+            st.checkbox("Auto-refresh", key="auto_refresh_jobs")
+        with col_job3:
+            if selected_job["status"] in ACTIVE_STATUSES:
+                if st.button("⏹️ Cancel", key="cancel_job", use_container_width=True):
+                    job_runner.cancel(selected_job_id)
+                    st.rerun()
+            elif selected_job["done"] < selected_job["total"]:
+                if st.button("▶️ Resume", key="resume_job", use_container_width=True):
+                    job_runner.resume(selected_job_id)
+                    st.rerun()
+        with col_job4:
+            if selected_job["done"] and st.button("💾 Save All to Database", key="save_job", use_container_width=True):
+                job_saved = {"written": 0, "skipped": 0, "failed": 0}
+                job_complete = True
+                with st.spinner("Saving job results..."):
+                    for job_rows in job_runner.store.iter_results(
+                        selected_job_id, batch_size=SUPABASE_CHUNK_SIZE, with_row_idx=True
+                    ):
+                        job_indices, job_records = zip(*job_rows)
+                        save_report = save_results(list(job_records), selected_job_id, job_indices)
+                        add_save_counts(job_saved, save_report)
+                        if not save_report["ok"]:
+                            job_complete = False
+                            break
+                show_save_totals(job_saved, job_complete)
+
+        if selected_job["done"]:
+            job_preview = next(job_runner.store.iter_results(selected_job_id, batch_size=100), [])
+            st.dataframe(pd.DataFrame(job_preview), use_container_width=True)
+
 # ---------------------------------------------------------
 # ANALYTICS TAB
 # ---------------------------------------------------------
@@ -619,67 +1027,123 @@ with tab3:
     with col_load1:
         data_source = st.radio(
             "Data Source",
-            ["Load from Database", "Upload CSV"],
-            horizontal=True
+            ["Database Summary", "Load from Database", "Upload CSV"],
+            horizontal=True,
+            help="Database Summary aggregates the whole table in Postgres; the other sources analyze the rows loaded here"
         )
 
     with col_load2:
-        record_limit = st.number_input("Records", min_value=10, max_value=1000, value=100)
+        load_all = st.checkbox("Load all records", value=False, disabled=data_source != "Load from Database")
+        record_limit = st.number_input(
+            "Records", min_value=10, value=100, step=100,
+            disabled=load_all or data_source != "Load from Database"
+        )
+
+    if data_source == "Database Summary":
+        if st.button("🔄 Load Summary", type="primary"):
+            with st.spinner("Aggregating in database..."):
+                try:
+                    summary = fetch_analytics_summary()
+                except Exception as e:
+                    st.error(f"Error loading summary from Supabase: {str(e)}")
+                else:
+                    if summary["total"]:
+                        st.session_state["analytics_summary"] = summary
+                        st.session_state["analytics_df_source"] = "summary"
+                    else:
+                        st.warning("No data found in database")
+    elif data_source == "Load from Database":
+        col_btn_load, col_btn_refresh = st.columns([1, 4])
+        with col_btn_load:
+            load_analytics = st.button("🔄 Load Data", type="primary")
+        with col_btn_refresh:
+            refresh_analytics = st.button(
+                "⏩ Fetch New Rows",
+                disabled=st.session_state.get("analytics_df_source") != "database",
+                help="Only fetch rows newer than the data already loaded"
+            )
+
+        load_status = st.empty()
 
-    df_analytics = None
+        def show_loaded(rows):
+            load_status.text(f"Loaded {rows:,} rows...")
 
-    if data_source == "Load from Database":
-        if st.button("🔄 Load Data", type="primary"):
+        if load_analytics:
             with st.spinner("Loading from database..."):
-                df_analytics = load_from_supabase(limit=record_limit)
+                df_analytics = load_results(
+                    limit=None if load_all else record_limit,
+                    progress_callback=show_loaded
+                )
+                load_status.empty()
                 if not df_analytics.empty:
-                    st.session_state["analytics_df"] = df_analytics
+                    df_analytics = keep_dataset("analytics_df", df_analytics)
+                    st.session_state["analytics_summary"] = analytics_summary_for(df_analytics)
+                    st.session_state["analytics_df_source"] = "database"
                 else:
                     st.warning("No data found in database")
+        elif refresh_analytics:
+            with st.spinner("Fetching new rows..."):
+                df_analytics, new_rows = refresh_results(
+                    st.session_state["analytics_df"],
+                    progress_callback=show_loaded
+                )
+                load_status.empty()
+                df_analytics = keep_dataset("analytics_df", df_analytics)
+                st.session_state["analytics_summary"] = analytics_summary_for(df_analytics)
+                st.info(f"ℹ️ Fetched {new_rows} new rows")
     else:
         uploaded_analytics = st.file_uploader("Upload CSV", type=["csv"], key="analytics_upload")
         if uploaded_analytics:
             df_analytics = pd.read_csv(uploaded_analytics)
-            st.session_state["analytics_df"] = df_analytics
+            df_analytics = keep_dataset("analytics_df", df_analytics)
+            st.session_state["analytics_summary"] = analytics_summary_for(df_analytics)
+            st.session_state["analytics_df_source"] = "upload"
 
-    if "analytics_df" in st.session_state:
-        df_analytics = st.session_state["analytics_df"]
+    if "analytics_summary" in st.session_state:
+        summary = st.session_state["analytics_summary"]
 
-        st.success(f"✅ Analyzing {len(df_analytics)} transactions")
+        if st.session_state.get("analytics_df_source") == "summary":
+            st.success(f"✅ Analyzing all {summary['total']:,} transactions (aggregated in database)")
+        else:
+            st.success(f"✅ Analyzing {summary['total']} transactions")
+
+        memo_stats = get_analytics_memo().stats()
+        st.caption(
+            f"🧮 Analytics memo: {memo_stats['hit_rate']:.0%} hit rate "
+            f"({memo_stats['hits']:,} hits, {memo_stats['misses']:,} misses, "
+            f"{memo_stats['entries']} entries, {memo_stats['evictions']} evictions)"
+        )
 
         # KPI Cards
         st.markdown("#### Key Metrics")
         kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
         with kpi1:
-            total_transactions = len(df_analytics)
             st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Total Transactions</div>
-                <div class="kpi-value">{total_transactions}</div>
+                <div class="kpi-value">{summary["total"]}</div>
             </div>
             """, unsafe_allow_html=True)
 
         with kpi2:
-            unique_categories = df_analytics["category"].nunique()
             st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Categories</div>
-                <div class="kpi-value">{unique_categories}</div>
+                <div class="kpi-value">{summary["categories"]}</div>
             </div>
             """, unsafe_allow_html=True)
 
         with kpi3:
-            unique_vendors = df_analytics["vendor"].nunique()
             st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Vendors</div>
-                <div class="kpi-value">{unique_vendors}</div>
+                <div class="kpi-value">{summary["vendors"]}</div>
             </div>
             """, unsafe_allow_html=True)
 
         with kpi4:
-            top_category = df_analytics["category"].mode()[0] if not df_analytics["category"].isnull().all() else "N/A"
+            top_category = summary["top_category"] or "N/A"
             st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Top Category</div>
@@ -689,89 +1153,31 @@ with tab3:
 
         st.markdown("---")
 
-        # Charts
+        figures = get_analytics_memo().get_or_compute(
+            ("figures", payload_fingerprint(summary)),
+            lambda: build_analytics_figures(summary)
+        )
         col_chart1, col_chart2 = st.columns(2)
 
         with col_chart1:
             st.markdown("#### 📈 Category Distribution")
-            category_counts = df_analytics["category"].value_counts().head(10)
-            fig_cat = px.bar(
-                x=category_counts.values,
-                y=category_counts.index,
-                orientation='h',
-                labels={'x': 'Count', 'y': 'Category'},
-                color=category_counts.values,
-                color_continuous_scale='Viridis'
-            )
-            fig_cat.update_layout(
-                showlegend=False,
-                height=400,
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            st.plotly_chart(fig_cat, use_container_width=True)
+            st.plotly_chart(figures["category"], use_container_width=True)
 
         with col_chart2:
             st.markdown("#### 🏢 Top Vendors")
-            vendor_counts = df_analytics["vendor"].value_counts().head(10)
-            fig_vendor = px.bar(
-                x=vendor_counts.values,
-                y=vendor_counts.index,
-                orientation='h',
-                labels={'x': 'Count', 'y': 'Vendor'},
-                color=vendor_counts.values,
-                color_continuous_scale='Plasma'
-            )
-            fig_vendor.update_layout(
-                showlegend=False,
-                height=400,
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            st.plotly_chart(fig_vendor, use_container_width=True)
+            st.plotly_chart(figures["vendor"], use_container_width=True)
 
         # Time series if dates available
         st.markdown("#### 📅 Transaction Timeline")
-        df_analytics["parsed_date"] = df_analytics["raw_input"].apply(extract_date)
-
-        if df_analytics["parsed_date"].notnull().any():
-            df_dates = df_analytics.dropna(subset=["parsed_date"])
-            daily_counts = df_dates.groupby(df_dates["parsed_date"].dt.date).size().reset_index()
-            daily_counts.columns = ["Date", "Count"]
-
-            fig_timeline = px.line(
-                daily_counts,
-                x="Date",
-                y="Count",
-                markers=True,
-                labels={'Count': 'Transactions', 'Date': 'Date'}
-            )
-            fig_timeline.update_traces(line_color='#667eea', line_width=3)
-            fig_timeline.update_layout(
-                height=350,
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            st.plotly_chart(fig_timeline, use_container_width=True)
+
+        if figures["timeline"] is not None:
+            st.plotly_chart(figures["timeline"], use_container_width=True)
         else:
             st.info("ℹ️ No dates detected in transaction data for timeline visualization")
 
         # Category-Vendor Matrix
         st.markdown("#### 🔗 Category-Vendor Relationship")
-        cat_vendor_matrix = df_analytics.groupby(["category", "vendor"]).size().reset_index(name="count")
-        cat_vendor_top = cat_vendor_matrix.nlargest(20, "count")
-
-        fig_matrix = px.scatter(
-            cat_vendor_top,
-            x="category",
-            y="vendor",
-            size="count",
-            color="count",
-            color_continuous_scale="Blues",
-            size_max=30
-        )
-        fig_matrix.update_layout(
-            height=400,
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        st.plotly_chart(fig_matrix, use_container_width=True)
+        st.plotly_chart(figures["matrix"], use_container_width=True)
 
 # ---------------------------------------------------------
 # REPORTS TAB
@@ -791,17 +1197,31 @@ with tab4:
     if report_source == "Load from Database":
         col_r1, col_r2 = st.columns([3, 1])
         with col_r1:
-            report_limit = st.number_input("Number of records", min_value=10, max_value=1000, value=50, key="report_limit")
+            report_load_all = st.checkbox("Load all records", value=False, key="report_load_all")
+            report_limit = st.number_input(
+                "Number of records", min_value=10, value=50, step=50,
+                key="report_limit", disabled=report_load_all
+            )
         with col_r2:
             if st.button("📊 Load Data", type="primary"):
-                df_report = load_from_supabase(limit=report_limit)
+                df_report = load_results(limit=None if report_load_all else report_limit)
                 if not df_report.empty:
-                    st.session_state["report_df"] = df_report
+                    df_report = keep_dataset("report_df", df_report)
+                    st.session_state["report_df_source"] = "database"
+            if st.button(
+                "⏩ Fetch New Rows",
+                key="report_refresh",
+                disabled=st.session_state.get("report_df_source") != "database"
+            ):
+                df_report, new_rows = refresh_results(st.session_state["report_df"])
+                df_report = keep_dataset("report_df", df_report)
+                st.info(f"ℹ️ Fetched {new_rows} new rows")
     else:
         uploaded_report = st.file_uploader("Upload enriched CSV", type=["csv"], key="report_upload")
         if uploaded_report:
             df_report = pd.read_csv(uploaded_report)
-            st.session_state["report_df"] = df_report
+            df_report = keep_dataset("report_df", df_report)
+            st.session_state["report_df_source"] = "upload"
 
     if "report_df" in st.session_state:
         df_report = st.session_state["report_df"]
@@ -824,67 +1244,123 @@ with tab4:
 
         with col_exp1:
             st.markdown("##### CSV Export")
-            csv_buffer = io.BytesIO()
-            df_report.to_csv(csv_buffer, index=False)
-            st.download_button(
-                "📥 Download CSV Report",
-                csv_buffer.getvalue(),
-                "spend_report.csv",
-                "text/csv",
-                use_container_width=True
-            )
+            export_button(df_report, "csv", "spend_report.csv", "CSV Report", key="report_csv")
 
         with col_exp2:
             st.markdown("##### PDF Export")
-            pdf_bytes = create_pdf_report(df_report, "Spend Classification Report")
-            st.download_button(
-                "📄 Download PDF Report",
-                pdf_bytes,
-                "spend_report.pdf",
-                "application/pdf",
-                use_container_width=True
-            )
+            pdf_report_button(df_report, "Spend Classification Report", "spend_report.pdf", "PDF Report", key="report_pdf")
 
         with col_exp3:
             st.markdown("##### Excel Export")
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                df_report.to_excel(writer, sheet_name='Classifications', index=False)
-            st.download_button(
-                "📊 Download Excel Report",
-                excel_buffer.getvalue(),
-                "spend_report.xlsx",
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+            export_button(df_report, "xlsx", "spend_report.xlsx", "Excel Report", key="report_xlsx")
+
+        col_exp4, col_exp5, _ = st.columns(3)
+
+        with col_exp4:
+            st.markdown("##### Parquet Export")
+            export_button(df_report, "parquet", "spend_report.parquet", "Parquet", key="report_parquet")
+
+        with col_exp5:
+            st.markdown("##### Arrow Export")
+            export_button(df_report, "arrow", "spend_report.arrow", "Arrow IPC", key="report_arrow")
 
         # Summary Statistics
         st.markdown("---")
         st.markdown("#### 📈 Report Summary")
 
+        report_summary = analytics_summary_for(df_report)
         sum_col1, sum_col2, sum_col3 = st.columns(3)
 
         with sum_col1:
-            st.metric("Total Records", len(df_report))
-            st.metric("Unique Categories", df_report["category"].nunique())
+            st.metric("Total Records", report_summary["total"])
+            st.metric("Unique Categories", report_summary["categories"])
 
         with sum_col2:
-            st.metric("Unique Vendors", df_report["vendor"].nunique())
-            top_cat = df_report["category"].value_counts().index[0] if len(df_report) > 0 else "N/A"
-            st.metric("Most Common Category", top_cat)
+            st.metric("Unique Vendors", report_summary["vendors"])
+            st.metric("Most Common Category", report_summary["top_category"] or "N/A")
 
         with sum_col3:
-            top_vendor = df_report["vendor"].value_counts().index[0] if len(df_report) > 0 else "N/A"
+            top_vendor = report_summary["vendor_counts"][0]["vendor"] if report_summary["vendor_counts"] else "N/A"
             st.metric("Most Common Vendor", top_vendor)
 
+# ---------------------------------------------------------
+# PERFORMANCE TAB
+# ---------------------------------------------------------
+with tab5:
+    st.markdown("### ⏱️ Pipeline Performance")
+    st.caption(
+        "Latency per pipeline stage since this server started (or was last reset). "
+        "Percentiles cover each stage's most recent observations."
+    )
+
+    latency = latency_frame(get_metrics().histograms.snapshot())
+    if latency.empty:
+        st.info("ℹ️ No stages have run yet")
+    else:
+        model_stages = latency[latency["Stage"].str.startswith("gemini.") & ~latency["Stage"].str.endswith("parse")]
+        if not model_stages.empty:
+            perf_col1, perf_col2, perf_col3 = st.columns(3)
+            busiest = model_stages.sort_values("Count", ascending=False).iloc[0]
+            with perf_col1:
+                st.metric("Model Call p50", f"{busiest['p50 (ms)']:,.0f} ms")
+            with perf_col2:
+                st.metric("Model Call p95", f"{busiest['p95 (ms)']:,.0f} ms")
+            with perf_col3:
+                st.metric("Model Call p99", f"{busiest['p99 (ms)']:,.0f} ms")
+        st.dataframe(latency, use_container_width=True, hide_index=True)
+
+    rule_stats = get_rule_engine().stats()
+    if rule_stats["scanned"]:
+        st.markdown("#### 🔤 Keyword Rules")
+        rule_col1, rule_col2, rule_col3 = st.columns(3)
+        with rule_col1:
+            st.metric("Rows Resolved", f"{rule_stats['resolved']:,}")
+        with rule_col2:
+            st.metric("Resolved Rate", f"{rule_stats['resolved_rate']:.0%}")
+        with rule_col3:
+            st.metric("Matching Cost", f"{rule_stats['us_per_row']:.1f} µs/row")
+
+    usage = get_usage_meter().snapshot()
+    if usage:
+        st.markdown("#### 📏 Gemini Usage")
+        st.dataframe(usage_frame(usage), use_container_width=True, hide_index=True)
+
+    sinks = []
+    if METRICS_PROMETHEUS_PATH:
+        sinks.append(f"Prometheus file `{METRICS_PROMETHEUS_PATH}`")
+    if METRICS_JSON_LOG:
+        sinks.append("JSON log lines")
+    st.caption(f"📤 Also exported to: {', '.join(sinks)}" if sinks else "📤 No external metrics sinks configured")
+
+    if st.button("↺ Reset Metrics", key="reset_metrics"):
+        get_metrics().histograms.reset()
+        st.rerun()
+
 # ---------------------------------------------------------
 # Footer
 # ---------------------------------------------------------
 st.markdown("---")
+if "session_id" in st.session_state:
+    session_memory = get_dataset_store().session_memory(st.session_state["session_id"])
+    store_stats = get_dataset_store().stats()
+    st.caption(
+        f"🧠 This session holds {session_memory['bytes'] / 1e6:,.1f} MB in {session_memory['datasets']} "
+        f"dataset(s) ({session_memory['exclusive_bytes'] / 1e6:,.1f} MB not shared with other sessions) · "
+        f"all sessions: {store_stats['bytes'] / 1e6:,.1f} MB in {store_stats['datasets']} dataset(s) "
+        f"across {store_stats['sessions']} session(s)"
+    )
 st.markdown("""
 <div style='text-align: center; color: #666; padding: 2rem;'>
     <p style='margin: 0; font-size: 0.9rem;'>
         <strong>Spend Classification & Enrichment Engine</strong><br>
     </p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Poll PDF builds and background jobs while any are still running, once the page is drawn
+if st.session_state.pop("pdf_build_pending", False):
+    time.sleep(PDF_POLL_SECONDS)
+    st.rerun()
+if st.session_state.get("auto_refresh_jobs") and get_job_runner().store.next_active_job() is not None:
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
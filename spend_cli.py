@@ -0,0 +1,223 @@
+"""
+Spend classification batch CLI
+Classifies a CSV of transactions without the dashboard, for scheduled backfills on
+plain cron workers. Input is read in chunks; results go to CSV or Parquet (by file
+extension) and/or the database.
+
+Usage:
+    python spend_cli.py transactions.csv --output results.parquet
+    python spend_cli.py transactions.csv --to-db --workers 16 --requests-per-minute 600
+    python spend_cli.py transactions.csv --output results.csv --processes 4
+
+Exits with status 1 if any row could not be classified or saved.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from spend_core import (
+    BATCH_MAX_WORKERS,
+    BATCH_REQUESTS_PER_MINUTE,
+    GEMINI_BATCH_SIZE,
+    LOCAL_MODEL_THRESHOLD,
+    NEAR_DUPLICATE_CLUSTERING,
+    RULE_ENGINE,
+    STREAMING_CHUNK_ROWS,
+    build_classifier_tiers,
+    classify_transactions,
+    failed_rows,
+    get_metrics,
+    get_rule_engine,
+    get_usage_meter,
+    merge_tier_reports,
+    new_batch_id,
+    save_to_supabase,
+    signature_compression,
+    tier_report_frame,
+)
+from llm_usage import usage_frame
+from metrics import latency_frame
+from streaming_ingest import ResultSpillWriter, iter_raw_input_chunks
+
+logger = logging.getLogger("spend_cli")
+
+
+def classify_chunk(raw_inputs: list, settings: dict) -> tuple:
+    """Classify one input chunk; module-level so worker processes can run it"""
+    return classify_transactions(
+        raw_inputs,
+        max_workers=settings["workers"],
+        requests_per_minute=settings["requests_per_minute"],
+        batch_size=settings["batch_size"],
+        tiers=build_classifier_tiers(settings["local_model"], settings["local_threshold"], settings["rules"]),
+        cluster=settings["cluster"],
+    )
+
+
+def classify_chunk_in_worker(raw_inputs: list, settings: dict) -> tuple:
+    """classify_chunk plus the Gemini usage, stage latencies and rule counts it incurred, for the parent process"""
+    meter, histograms, rules = get_usage_meter(), get_metrics().histograms, get_rule_engine()
+    meter.reset()
+    histograms.reset()
+    rules.reset()
+    results, report = classify_chunk(raw_inputs, settings)
+    telemetry = {"usage": meter.snapshot(), "latency": histograms.snapshot(), "rules": rules.counts()}
+    return results, report, telemetry
+
+
+def iter_classified_chunks(chunks, settings: dict, processes: int):
+    """
+    Yield (results, tier_report) per input chunk, in input order.
+
+    With processes > 1, chunks are spread over a process pool (each process still
+    runs its own thread pool), keeping at most two chunks per process in flight so
+    memory stays bounded on large files.
+    """
+    if processes <= 1:
+        for raw_inputs in chunks:
+            yield classify_chunk(raw_inputs, settings)
+        return
+
+    def collect(future):
+        results, report, telemetry = future.result()
+        get_usage_meter().merge(telemetry["usage"])
+        get_metrics().merge(telemetry["latency"])
+        get_rule_engine().merge(telemetry["rules"])
+        return results, report
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        in_flight = deque()
+        for raw_inputs in chunks:
+            in_flight.append(executor.submit(classify_chunk_in_worker, raw_inputs, settings))
+            if len(in_flight) >= 2 * processes:
+                yield collect(in_flight.popleft())
+        while in_flight:
+            yield collect(in_flight.popleft())
+
+
+def write_csv_chunk(path: str, results: list, first: bool) -> None:
+    pd.DataFrame(results).to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV with a raw_input column (or a single column)")
+    parser.add_argument("--output", help="Write results to this .csv or .parquet file")
+    parser.add_argument("--to-db", action="store_true", help="Save results to Supabase")
+    parser.add_argument("--batch-id", help="Upload identity for --to-db; rerun with the same id to retry a save "
+                                           "without duplicating rows (default: a new id per run)")
+    parser.add_argument("--chunk-rows", type=int, default=STREAMING_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS, help="Concurrent Gemini requests per process")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes, each with --workers threads")
+    parser.add_argument("--requests-per-minute", type=int, default=BATCH_REQUESTS_PER_MINUTE,
+                        help="Total Gemini request budget across all processes (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=GEMINI_BATCH_SIZE, help="Transactions per Gemini request")
+    parser.add_argument("--no-rules", dest="rules", action="store_false", default=RULE_ENGINE,
+                        help="Skip the keyword rule tier")
+    parser.add_argument("--local-model", action="store_true", help="Try the local BERT model before Gemini")
+    parser.add_argument("--local-threshold", type=float, default=LOCAL_MODEL_THRESHOLD)
+    parser.add_argument("--no-cluster", dest="cluster", action="store_false", default=NEAR_DUPLICATE_CLUSTERING,
+                        help="Classify every row instead of one per near-duplicate signature")
+    args = parser.parse_args()
+    if not args.output and not args.to_db:
+        parser.error("nothing to do: pass --output and/or --to-db")
+    if args.output and os.path.splitext(args.output)[1].lower() not in (".csv", ".parquet"):
+        parser.error("--output must end in .csv or .parquet")
+    return args
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = parse_args()
+    processes = max(1, args.processes)
+    settings = {
+        "workers": args.workers,
+        # Split the shared rate limit evenly, since each process paces its own requests
+        "requests_per_minute": args.requests_per_minute // processes if args.requests_per_minute else 0,
+        "batch_size": args.batch_size,
+        "local_model": args.local_model,
+        "local_threshold": args.local_threshold,
+        "rules": args.rules,
+        "cluster": args.cluster,
+    }
+
+    parquet_writer = None
+    if args.output and args.output.lower().endswith(".parquet"):
+        parquet_writer = ResultSpillWriter(args.output)
+
+    batch_id = args.batch_id or new_batch_id()
+    tier_report = {}
+    rows = 0
+    saved = {"written": 0, "skipped": 0, "failed": 0, "unclassified": 0}
+    start = time.perf_counter()
+
+    with open(args.input, newline="", encoding="utf-8") as f:
+        chunks = iter_raw_input_chunks(f, chunksize=args.chunk_rows)
+        for results, report in iter_classified_chunks(chunks, settings, processes):
+            if parquet_writer is not None:
+                parquet_writer.write(results)
+            elif args.output:
+                write_csv_chunk(args.output, results, first=rows == 0)
+            if args.to_db:
+                # Rows that failed classification would read as Unknown; they are reported, not saved
+                indexed = [
+                    (rows + offset, result) for offset, result in enumerate(results)
+                    if result["classified_by"] != "failed"
+                ]
+                saved["unclassified"] += len(results) - len(indexed)
+                if indexed:
+                    row_indices, records = zip(*indexed)
+                    save_report = save_to_supabase(list(records), batch_id=batch_id, row_indices=row_indices)
+                    if save_report["ok"]:
+                        saved["written"] += save_report["written"]
+                        saved["skipped"] += save_report["skipped"]
+                    else:
+                        saved["failed"] += len(records)
+            merge_tier_reports(tier_report, report)
+            rows += len(results)
+            elapsed = time.perf_counter() - start
+            logger.info("%d rows classified (%.1f rows/sec)", rows, rows / elapsed if elapsed else 0.0)
+
+    if parquet_writer is not None:
+        parquet_writer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"\nRows:        {rows:,}")
+    print(f"Elapsed:     {elapsed:.1f}s")
+    print(f"Throughput:  {rows / elapsed if elapsed else 0.0:.1f} rows/sec")
+    print(f"Failed rows: {failed_rows(tier_report):,}")
+    print(f"Signatures:  {signature_compression(tier_report):.3f} unique per row")
+    if args.rules:
+        rule_stats = get_rule_engine().stats()
+        print(f"Rules:       {rule_stats['resolved']:,} of {rule_stats['scanned']:,} rows scanned "
+              f"({rule_stats['resolved_rate']:.0%}), {rule_stats['us_per_row']:.1f} us/row matching")
+    if args.to_db:
+        print(f"Saved:       {saved['written']:,} written, {saved['skipped']:,} already in database, "
+              f"{saved['failed']:,} not saved, {saved['unclassified']:,} failed rows left out")
+    if args.output:
+        print(f"Output:      {args.output}")
+    if tier_report:
+        print()
+        print(tier_report_frame(tier_report).to_string(index=False))
+    usage = get_usage_meter().snapshot()
+    if usage:
+        print()
+        print(usage_frame(usage).to_string(index=False))
+    latency = latency_frame(get_metrics().histograms.snapshot())
+    if not latency.empty:
+        print()
+        print(latency.to_string(index=False))
+    get_metrics().flush()
+
+    return 1 if failed_rows(tier_report) or saved["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
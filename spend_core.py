@@ -0,0 +1,1122 @@
+"""
+Spend classification core
+Prompt building, Gemini calls, vendor correction, persistence and reporting without any
+Streamlit dependency, shared by the dashboard (spend.py) and the batch CLI (spend_cli.py).
+Clients are created lazily on first use, and the Gemini SDK, Supabase client, fpdf and
+torch are only imported when first needed so importing this module stays fast.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from batch_engine import RateLimiter, is_retryable, retry_with_backoff, run_concurrent
+from bert_classifier import (
+    BertSpendClassifier,
+    LocalModelTier,
+    local_model_available,
+    quantized_model_available,
+)
+from classification_cache import ClassificationCache, make_cache_key
+from llm_usage import UsageMeter
+from metrics import JsonLogSink, Metrics, PrometheusFileSink, timed
+from near_duplicates import description_template, fill_description, group_by_signature
+from rule_engine import RuleEngine, RuleTier, load_rules_csv, seed_rules
+from vendor_index import VendorIndex
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# ---------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-2.5-flash"
+
+SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
+SUPABASE_KEY = os.getenv("VITE_SUPABASE_ANON_KEY")
+
+# Batch throughput settings (0 = no rate limit)
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+BATCH_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "0"))
+BATCH_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+
+# Transactions packed into one Gemini request (1 = one request per row)
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "10"))
+GEMINI_PACKED_RESENDS = int(os.getenv("GEMINI_PACKED_RESENDS", "2"))
+
+# Prompt mode: "verbose" repeats the instructions and an annotated JSON example in every
+# prompt; "compact" sends the rules once as a system instruction and lets a response
+# schema shape the output
+GEMINI_PROMPT_MODE = os.getenv("GEMINI_PROMPT_MODE", "verbose")
+
+# Vendor master for fuzzy vendor correction: CSV file and/or Supabase table with a 'vendor' column
+VENDOR_MASTER_PATH = os.getenv("VENDOR_MASTER_PATH")
+VENDOR_MASTER_TABLE = os.getenv("VENDOR_MASTER_TABLE")
+
+# Local fine-tuned BERT tier (see Finetune_BERT.ipynb)
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "./bert-spend-cls-final")
+LOCAL_MODEL_THRESHOLD = float(os.getenv("LOCAL_MODEL_THRESHOLD", "0.9"))
+LOCAL_MODEL_BATCH_SIZE = int(os.getenv("LOCAL_MODEL_BATCH_SIZE", "32"))
+# Use the INT8 export (python quantize_bert.py) when present; set to 0 to force fp32
+LOCAL_MODEL_QUANTIZED = os.getenv("LOCAL_MODEL_QUANTIZED", "1") == "1"
+
+# Rows per multi-row insert when saving to Supabase
+SUPABASE_CHUNK_SIZE = int(os.getenv("SUPABASE_CHUNK_SIZE", "500"))
+
+# Rows fetched per keyset page when loading from Supabase
+SUPABASE_PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+
+# seq values below the newest loaded one that a refresh re-reads, to pick up rows from
+# saves that were still committing when the previous load ran
+REFRESH_SEQ_OVERLAP = int(os.getenv("REFRESH_SEQ_OVERLAP", "2000"))
+
+# Analytics chart sizes: bars in the top category/vendor charts and points in the matrix
+ANALYTICS_TOP_N = int(os.getenv("ANALYTICS_TOP_N", "10"))
+ANALYTICS_MATRIX_N = int(os.getenv("ANALYTICS_MATRIX_N", "20"))
+# Derived analytics tables and figures kept in memory (see memo_cache.py)
+ANALYTICS_MEMO_ENTRIES = int(os.getenv("ANALYTICS_MEMO_ENTRIES", "64"))
+
+# PDF reports: TrueType font for Unicode text (defaults to an installed DejaVu Sans, else
+# Latin-1 Helvetica) and an optional cap on detail rows (0 = every row)
+PDF_FONT_PATH = os.getenv("PDF_FONT_PATH")
+PDF_BOLD_FONT_PATH = os.getenv("PDF_BOLD_FONT_PATH")
+PDF_MAX_DETAIL_ROWS = int(os.getenv("PDF_MAX_DETAIL_ROWS", "0"))
+# Seconds between dashboard reruns while a PDF builds in the background
+PDF_POLL_SECONDS = float(os.getenv("PDF_POLL_SECONDS", "0.5"))
+
+# Built export files (CSV/Excel/Parquet/Arrow) kept in memory for re-download
+EXPORT_CACHE_MB = float(os.getenv("EXPORT_CACHE_MB", "256"))
+EXPORT_CACHE_ENTRIES = int(os.getenv("EXPORT_CACHE_ENTRIES", "32"))
+
+# Streaming ingestion for large uploads (results spill to Parquet in STREAMING_SPILL_DIR)
+STREAMING_CHUNK_ROWS = int(os.getenv("STREAMING_CHUNK_ROWS", "5000"))
+STREAMING_AUTO_MB = float(os.getenv("STREAMING_AUTO_MB", "50"))
+STREAMING_SPILL_DIR = os.getenv("STREAMING_SPILL_DIR")
+
+# Background batch jobs (SQLite job table, checkpointed every JOB_CHUNK_ROWS rows)
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "batch_jobs.db")
+JOB_CHUNK_ROWS = int(os.getenv("JOB_CHUNK_ROWS", "50"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+
+# Persistent classification cache (TTL of 0 keeps entries until evicted)
+CLASSIFICATION_CACHE_PATH = os.getenv("CLASSIFICATION_CACHE_PATH", "classification_cache.db")
+CLASSIFICATION_CACHE_TTL_DAYS = float(os.getenv("CLASSIFICATION_CACHE_TTL_DAYS", "30"))
+CLASSIFICATION_CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFICATION_CACHE_MAX_ENTRIES", "100000"))
+
+# Near-duplicate clustering: classify one row per masked signature and fan the label out.
+# Signature results (with the description as a template) are cached under their own keys,
+# so later batches reuse them too
+NEAR_DUPLICATE_CLUSTERING = os.getenv("NEAR_DUPLICATE_CLUSTERING", "1") == "1"
+SIGNATURE_CACHE_PREFIX = "signature-template:"
+
+# Keyword rules tried before any model: vendor names from CATEGORY_VENDOR_MAP and
+# VENDOR_ALIASES, CATEGORY_KEYWORDS, RULE_EXCLUSIONS and, optionally, a CSV of extra rules
+# (columns pattern, category, vendor)
+RULE_ENGINE = os.getenv("RULE_ENGINE", "1") == "1"
+RULES_PATH = os.getenv("RULES_PATH")
+
+# Stage latency metrics: always kept in-process for the Performance tab; optionally also
+# exported as a Prometheus text file and/or logged as JSON lines (slow stages only)
+METRICS_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH")
+METRICS_PROMETHEUS_INTERVAL = float(os.getenv("METRICS_PROMETHEUS_INTERVAL", "15"))
+METRICS_JSON_LOG = os.getenv("METRICS_JSON_LOG", "0") == "1"
+METRICS_JSON_LOG_MIN_MS = float(os.getenv("METRICS_JSON_LOG_MIN_MS", "10"))
+
+logger = logging.getLogger("spend")
+
+# ---------------------------------------------------------
+# Clients (created on first use and shared by every thread, rerun and session)
+# ---------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def get_supabase() -> "Client":
+    """Create the Supabase client once per process"""
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise RuntimeError("Supabase credentials not found in .env file")
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_model():
+    """Configure the Gemini SDK and build the model handle once per process"""
+    if not GEMINI_API_KEY:
+        raise RuntimeError("GEMINI_API_KEY not found in .env file")
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    if GEMINI_PROMPT_MODE == "compact":
+        return genai.GenerativeModel(GEMINI_MODEL, system_instruction=COMPACT_SYSTEM_INSTRUCTION)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+@functools.lru_cache(maxsize=None)
+def get_usage_meter() -> UsageMeter:
+    """Token, latency and parse-failure counters for every Gemini request in this process"""
+    return UsageMeter()
+
+@functools.lru_cache(maxsize=None)
+def get_metrics() -> Metrics:
+    """Stage latency registry for this process, with the sinks enabled in the environment"""
+    metrics = Metrics()
+    if METRICS_PROMETHEUS_PATH:
+        metrics.add_sink(PrometheusFileSink(metrics.histograms, METRICS_PROMETHEUS_PATH, METRICS_PROMETHEUS_INTERVAL))
+    if METRICS_JSON_LOG:
+        metrics.add_sink(JsonLogSink(min_seconds=METRICS_JSON_LOG_MIN_MS / 1000))
+    return metrics
+
+# Hard-coded vendor map
+CATEGORY_VENDOR_MAP = {
+    "Cloud Services": "Amazon Web Services",
+    "Employee Engagement > Meals & Entertainment": "Dominos",
+    "IT Hardware": "HP Inc.",
+    "Office Supplies": "Office Depot",
+    "Professional Services > Audit": "EY",
+    "Professional Services > Consulting": "Deloitte",
+    "Software Subscriptions": "Adobe",
+    "Travel > Accommodation": "Taj Hotels",
+    "Travel > Local Transport": "Uber",
+}
+ALL_HARDCODED_VENDORS = list(CATEGORY_VENDOR_MAP.values())
+
+# Other names the rule engine recognises for the vendors above
+VENDOR_ALIASES = {
+    "Amazon Web Services": ["AWS"],
+    "Dominos": ["Domino's", "Dominos Pizza"],
+    "HP Inc.": ["HP Inc", "Hewlett-Packard", "Hewlett Packard"],
+    "EY": ["Ernst & Young", "Ernst and Young"],
+    "Taj Hotels": ["Taj Hotel"],
+}
+
+# Words that point to a category. The rule engine only classifies a row when one of these
+# agrees with the category of the vendor it names, so a vendor's name alone never decides it
+CATEGORY_KEYWORDS = {
+    "Cloud Services": ["cloud hosting", "hosting", "ec2", "s3 storage", "compute instances", "cloud storage"],
+    "Employee Engagement > Meals & Entertainment": [
+        "meal", "meals", "lunch", "dinner", "breakfast", "food", "pizza", "pizzas", "restaurant",
+        "catering", "snacks", "uber eats",
+    ],
+    "IT Hardware": ["laptop", "laptops", "printer", "printers", "monitor", "monitors", "desktop", "toner"],
+    "Office Supplies": ["stationery", "paper", "pens", "office supplies", "notebooks", "printer paper"],
+    "Professional Services > Audit": ["audit", "statutory audit", "audit fee", "auditor", "assurance"],
+    "Professional Services > Consulting": ["consulting", "consultancy", "advisory", "consultant"],
+    "Software Subscriptions": ["subscription", "license", "licence", "creative cloud", "saas"],
+    "Travel > Accommodation": ["room", "room charges", "accommodation", "lodging", "night stay", "stay"],
+    "Travel > Local Transport": ["ride", "cab", "taxi", "trip", "airport transfer", "commute"],
+}
+
+# Phrases naming a known vendor's other business lines; rows containing them go to the model
+RULE_EXCLUSIONS = ["uber freight", "aws marketplace", "amazon web services marketplace"]
+
+# ---------------------------------------------------------
+# Utility Functions
+# ---------------------------------------------------------
+CLASSIFICATION_RULES = """Rules:
+1. If the input explicitly mentions a vendor name (even if misspelled), correct the spelling to the most likely real vendor and return it.
+2. If no vendor is mentioned, set vendor to null.
+3. Always correct obvious misspellings (e.g., "Mcdonld's" -> "McDonald's", "Stabucks" -> "Starbucks").
+4. Enriched description should be professional, precise, and limited to 1–2 lines (e.g., "Business meal at McDonald's for lunch" instead of "Lunch at McDonald's").
+5. If unsure about category or vendor, set them to null.
+6. Return strictly JSON and nothing else."""
+
+
+def build_gemini_prompt(raw_input: str) -> str:
+    """Build prompt for Gemini AI classification with vendor correction and professional enrichment"""
+    return f"""
+You are a spend classification and enrichment assistant. For the given transaction raw text, return ONLY a valid JSON object (no extra text)
+with the following fields:
+
+{{
+  "category": string,                // e.g. "Travel > Local Transport"
+  "vendor": string|null,             // vendor name if explicitly present (correct spelling), otherwise null
+  "enriched_description": string     // professional 1-2 line purpose of the spend
+}}
+
+{CLASSIFICATION_RULES}
+
+Input: "{raw_input}"
+Output:
+"""
+
+
+def build_gemini_batch_prompt(raw_inputs: list) -> str:
+    """Build a single prompt that classifies several numbered transactions at once"""
+    numbered_inputs = "\n".join(f"{idx}: {json.dumps(text)}" for idx, text in enumerate(raw_inputs))
+    return f"""
+You are a spend classification and enrichment assistant. For each numbered transaction raw text, return ONLY a valid JSON array (no extra text)
+with one object per transaction:
+
+[
+  {{
+    "index": integer,                  // the transaction number shown below
+    "category": string,                // e.g. "Travel > Local Transport"
+    "vendor": string|null,             // vendor name if explicitly present (correct spelling), otherwise null
+    "enriched_description": string     // professional 1-2 line purpose of the spend
+  }}
+]
+
+{CLASSIFICATION_RULES}
+7. Return exactly one object per transaction and copy its "index" unchanged.
+
+Inputs:
+{numbered_inputs}
+Output:
+"""
+
+
+COMPACT_SYSTEM_INSTRUCTION = f"""You are a spend classification and enrichment assistant. Each request is one \
+transaction raw text, or several numbered ones. For each, return its category (e.g. "Travel > Local Transport"), \
+its vendor if explicitly present (correct spelling), otherwise null, and a professional 1-2 line enriched_description \
+of the purpose of the spend. For numbered inputs, return one object per transaction and copy its index unchanged.
+
+{CLASSIFICATION_RULES}"""
+
+# Classification fields in the compact-mode response schema, and whether each may be null
+RESPONSE_FIELDS = {"category": True, "vendor": True, "enriched_description": False}
+
+
+def build_compact_prompt(raw_input: str) -> str:
+    """Compact-mode prompt: just the transaction text, the instructions live in the system instruction"""
+    return json.dumps(raw_input)
+
+
+def build_compact_batch_prompt(raw_inputs: list) -> str:
+    """Compact-mode prompt for several numbered transactions"""
+    return "\n".join(f"{idx}: {json.dumps(text)}" for idx, text in enumerate(raw_inputs))
+
+
+@functools.lru_cache(maxsize=None)
+def compact_generation_config(batch: bool) -> dict:
+    """Structured JSON output settings for compact mode: one object, or an array of indexed objects"""
+    import google.generativeai as genai
+    Schema, Type = genai.protos.Schema, genai.protos.Type
+
+    properties = {name: Schema(type=Type.STRING, nullable=nullable) for name, nullable in RESPONSE_FIELDS.items()}
+    required = list(RESPONSE_FIELDS)
+    if batch:
+        properties = {"index": Schema(type=Type.INTEGER), **properties}
+        required = ["index", *required]
+    item = Schema(type=Type.OBJECT, properties=properties, required=required)
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": Schema(type=Type.ARRAY, items=item) if batch else item,
+    }
+
+
+# Changes to the active mode's prompts invalidate previously cached classifications
+if GEMINI_PROMPT_MODE == "compact":
+    PROMPT_TEMPLATE = "compact" + COMPACT_SYSTEM_INSTRUCTION + json.dumps(RESPONSE_FIELDS) + build_compact_batch_prompt([])
+else:
+    PROMPT_TEMPLATE = build_gemini_prompt("") + build_gemini_batch_prompt([])
+PROMPT_TEMPLATE_HASH = hashlib.sha256(PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def get_classification_cache() -> ClassificationCache:
+    """Open the persistent classification cache once per process"""
+    return ClassificationCache(
+        CLASSIFICATION_CACHE_PATH,
+        ttl_seconds=CLASSIFICATION_CACHE_TTL_DAYS * 86400 or None,
+        max_entries=CLASSIFICATION_CACHE_MAX_ENTRIES,
+    )
+
+
+def classification_cache_key(raw_input: str) -> str:
+    """Cache key for a transaction under the current model and prompt template"""
+    return make_cache_key(raw_input, GEMINI_MODEL, PROMPT_TEMPLATE_HASH)
+
+
+EMPTY_CLASSIFICATION = {"category": None, "vendor": None, "enriched_description": None}
+
+
+def parse_gemini_response(text: str) -> dict:
+    """Extract the classification fields from a Gemini text response"""
+    text = text.strip()
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end == -1:
+        return dict(EMPTY_CLASSIFICATION)
+
+    parsed = json.loads(text[start:end+1])
+    return {
+        "category": parsed.get("category"),
+        "vendor": parsed.get("vendor"),
+        "enriched_description": parsed.get("enriched_description"),
+    }
+
+
+class GeminiParseError(ValueError):
+    """A Gemini response that did not contain a usable classification"""
+
+
+def parse_single_response(text: str):
+    """Classification fields from a single-transaction response, or None if it cannot be parsed"""
+    if GEMINI_PROMPT_MODE == "compact":
+        # Structured output is the JSON document itself
+        try:
+            return validate_classification(json.loads(text))
+        except json.JSONDecodeError:
+            return None
+    try:
+        parsed = parse_gemini_response(text)
+    except json.JSONDecodeError:
+        return None
+    return parsed if is_cacheable(parsed) else None
+
+
+def generate(prompt: str, transactions: int, batch: bool = False, rate_limiter: RateLimiter = None):
+    """Send one prompt in the configured mode, recording its tokens and latency"""
+    model = get_gemini_model()
+    # Every model call takes its own slot, so resends and per-row fallbacks stay in budget
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    start = time.perf_counter()
+    try:
+        if GEMINI_PROMPT_MODE == "compact":
+            response = model.generate_content(prompt, generation_config=compact_generation_config(batch))
+        else:
+            response = model.generate_content(prompt)
+    finally:
+        # Failed calls count towards latency too; a timeout is exactly what ops needs to see
+        elapsed = time.perf_counter() - start
+        get_metrics().observe("gemini.batch_request" if batch else "gemini.request", elapsed)
+    get_usage_meter().record_call(GEMINI_PROMPT_MODE, transactions, response, elapsed)
+    return response
+
+
+def request_gemini_classification(raw_input: str, rate_limiter: RateLimiter = None) -> dict:
+    """Call Gemini AI and parse response, raising on API errors and unparseable responses"""
+    prompt = build_compact_prompt(raw_input) if GEMINI_PROMPT_MODE == "compact" else build_gemini_prompt(raw_input)
+    response = generate(prompt, 1, rate_limiter=rate_limiter)
+    with get_metrics().timer("gemini.parse"):
+        parsed = parse_single_response(response.text)
+    get_usage_meter().record_parse(GEMINI_PROMPT_MODE, int(parsed is not None), int(parsed is None))
+    if parsed is None:
+        raise GeminiParseError(f"Unparseable Gemini response: {response.text[:200]!r}")
+    return parsed
+
+
+def is_cacheable(parsed: dict) -> bool:
+    """Only successful classifications are worth caching"""
+    return any(value is not None for value in parsed.values())
+
+
+def call_gemini_for_input(raw_input: str) -> dict:
+    """Call Gemini AI and parse response, serving repeats from the cache"""
+    cache = get_classification_cache()
+    key = classification_cache_key(raw_input)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        parsed = request_gemini_classification(raw_input)
+    except Exception as e:
+        logger.warning("Error calling Gemini: %s", e)
+        return dict(EMPTY_CLASSIFICATION)
+
+    if is_cacheable(parsed):
+        cache.put(key, parsed)
+    return parsed
+
+def validate_classification(item) -> dict:
+    """Return the classification fields of one AI result, or None if it is malformed"""
+    if not isinstance(item, dict) or "category" not in item:
+        return None
+    fields = {}
+    for key in EMPTY_CLASSIFICATION:
+        value = item.get(key)
+        if value is not None and not isinstance(value, str):
+            return None
+        fields[key] = value
+    return fields
+
+
+def parse_gemini_batch_response(text: str, expected: int) -> dict:
+    """Parse a packed JSON array response into {index: fields}, skipping malformed entries"""
+    start = text.find("[")
+    end = text.rfind("]")
+    if start == -1 or end == -1:
+        return {}
+    try:
+        items = json.loads(text[start:end+1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    parsed = {}
+    for item in items:
+        idx = item.get("index") if isinstance(item, dict) else None
+        if not isinstance(idx, int) or not 0 <= idx < expected or idx in parsed:
+            continue
+        fields = validate_classification(item)
+        if fields is not None:
+            parsed[idx] = fields
+    return parsed
+
+
+def request_gemini_batch_classification(raw_inputs: list, rate_limiter: RateLimiter = None) -> list:
+    """
+    Classify several transactions in one packed Gemini request.
+
+    Entries that come back missing or malformed are re-sent on their own (packed again
+    when more than one is left); any still unresolved fall back to the per-row call.
+    """
+    results = [None] * len(raw_inputs)
+    pending = list(range(len(raw_inputs)))
+    build_prompt = build_compact_batch_prompt if GEMINI_PROMPT_MODE == "compact" else build_gemini_batch_prompt
+
+    for _ in range(GEMINI_PACKED_RESENDS + 1):
+        if len(pending) <= 1:
+            break
+        response = generate(
+            build_prompt([raw_inputs[idx] for idx in pending]), len(pending), batch=True, rate_limiter=rate_limiter
+        )
+        with get_metrics().timer("gemini.batch_parse"):
+            parsed = parse_gemini_batch_response(response.text, len(pending))
+        get_usage_meter().record_parse(GEMINI_PROMPT_MODE, len(parsed), len(pending) - len(parsed))
+        for local_idx, idx in enumerate(pending):
+            if local_idx in parsed:
+                results[idx] = parsed[local_idx]
+        pending = [idx for idx in pending if results[idx] is None]
+
+    for idx in pending:
+        try:
+            results[idx] = request_gemini_classification(raw_inputs[idx], rate_limiter)
+        except GeminiParseError as e:
+            # One bad row should not fail the rows already classified in this chunk
+            logger.warning("%s", e)
+            results[idx] = dict(EMPTY_CLASSIFICATION)
+
+    return results
+
+def load_vendor_master() -> list:
+    """Collect vendor names from the hard-coded map plus the configured CSV and table"""
+    vendors = list(ALL_HARDCODED_VENDORS)
+    if VENDOR_MASTER_PATH:
+        vendors += pd.read_csv(VENDOR_MASTER_PATH, usecols=["vendor"])["vendor"].dropna().astype(str).tolist()
+    if VENDOR_MASTER_TABLE:
+        start = 0
+        while True:
+            rows = get_supabase().table(VENDOR_MASTER_TABLE).select("vendor").order("vendor") \
+                .range(start, start + SUPABASE_PAGE_SIZE - 1).execute().data
+            vendors += [row["vendor"] for row in rows if row.get("vendor")]
+            if len(rows) < SUPABASE_PAGE_SIZE:
+                break
+            start += SUPABASE_PAGE_SIZE
+    return vendors
+
+@functools.lru_cache(maxsize=None)
+def get_vendor_index() -> VendorIndex:
+    """Build the vendor master index once per process"""
+    return VendorIndex(load_vendor_master())
+
+@timed(get_metrics, "vendor.fuzzy_correct")
+def fuzzy_correct_vendor(given_vendor: str) -> str:
+    """Fuzzy match vendor to known vendors"""
+    if not given_vendor:
+        return None
+    return get_vendor_index().match(given_vendor) or given_vendor
+
+def assign_vendor_by_category(category: str) -> str:
+    """Assign vendor based on category"""
+    return CATEGORY_VENDOR_MAP.get(category, "Unknown Vendor")
+
+def finalize_classification(raw_input: str, parsed: dict) -> dict:
+    """Apply vendor correction and defaults to a parsed AI response"""
+    gem_vendor = parsed.get("vendor")
+    gem_cat = parsed.get("category")
+
+    vendor_used = (
+        fuzzy_correct_vendor(gem_vendor) if gem_vendor
+        else assign_vendor_by_category(gem_cat)
+    )
+
+    return {
+        "raw_input": raw_input,
+        "category": gem_cat or "Unknown",
+        "vendor": vendor_used,
+        "enriched_description": parsed.get("enriched_description") or ""
+    }
+
+@functools.lru_cache(maxsize=None)
+def get_local_classifier() -> BertSpendClassifier:
+    """Load the local BERT model once per process and keep it warm"""
+    quantized = LOCAL_MODEL_QUANTIZED and quantized_model_available(LOCAL_MODEL_PATH)
+    return BertSpendClassifier(LOCAL_MODEL_PATH, quantized=quantized)
+
+def load_rules() -> list:
+    """Seed rules from the hard-coded vendors, aliases, keywords and exclusions, then the configured rules CSV"""
+    rules = seed_rules(CATEGORY_VENDOR_MAP, VENDOR_ALIASES, CATEGORY_KEYWORDS, RULE_EXCLUSIONS)
+    if RULES_PATH:
+        rules += load_rules_csv(RULES_PATH)
+    return rules
+
+@functools.lru_cache(maxsize=None)
+def get_rule_engine() -> RuleEngine:
+    """Compile the keyword rules once per process"""
+    return RuleEngine(load_rules())
+
+def build_classifier_tiers(
+    use_local_model: bool,
+    local_threshold: float = LOCAL_MODEL_THRESHOLD,
+    use_rules: bool = RULE_ENGINE,
+) -> list:
+    """Classifier tiers to try, in order, before falling back to Gemini"""
+    tiers = []
+    if use_rules:
+        tiers.append(RuleTier(get_rule_engine()))
+    if use_local_model and local_model_available(LOCAL_MODEL_PATH):
+        tiers.append(LocalModelTier(get_local_classifier(), local_threshold, LOCAL_MODEL_BATCH_SIZE))
+    return tiers
+
+def classify_inputs(
+    raw_inputs: list,
+    max_workers: int = BATCH_MAX_WORKERS,
+    requests_per_minute: int = BATCH_REQUESTS_PER_MINUTE,
+    batch_size: int = GEMINI_BATCH_SIZE,
+    tiers: list = (),
+    progress_callback=None,
+) -> tuple:
+    """
+    Classify many transactions text by text, returning (results, tier_report) with
+    results in input order.
+
+    Each distinct input is resolved by the first tier that accepts it: the persistent
+    cache, then each of tiers (e.g. the local BERT model), then concurrent Gemini calls.
+    tier_report maps each tier name to the rows it handled and the seconds it spent;
+    rows whose Gemini requests kept failing are reported under a "failed" tier and
+    left unclassified. Nothing here touches the Streamlit UI, so it is safe to call
+    from background threads.
+    """
+    failures = []
+    batch_size = max(1, batch_size)
+    tier_seconds = {}
+    tier_by_key = {}
+
+    # Serve repeats from the cache and send each distinct uncached input only once
+    tier_start = time.perf_counter()
+    cache = get_classification_cache()
+    keys = [classification_cache_key(raw_input) for raw_input in raw_inputs]
+    parsed_by_key = cache.get_many(keys)
+    tier_by_key.update(dict.fromkeys(parsed_by_key, "cache"))
+    pending = {}
+    for key, raw_input in zip(keys, raw_inputs):
+        if key not in parsed_by_key and key not in pending:
+            pending[key] = raw_input
+    tier_seconds["cache"] = time.perf_counter() - tier_start
+
+    for tier in tiers:
+        if not pending:
+            break
+        tier_start = time.perf_counter()
+        for key, parsed in zip(list(pending), tier.classify(list(pending.values()))):
+            if parsed is not None:
+                parsed_by_key[key] = parsed
+                tier_by_key[key] = tier.name
+                del pending[key]
+        tier_seconds[tier.name] = time.perf_counter() - tier_start
+
+    pending_keys = list(pending)
+    pending_inputs = list(pending.values())
+    resolved_rows = sum(1 for key in keys if key in parsed_by_key)
+
+    chunks = [pending_inputs[i:i + batch_size] for i in range(0, len(pending_inputs), batch_size)]
+
+    # Paced per model call rather than per chunk: a packed chunk can make several calls
+    limiter = RateLimiter(requests_per_minute or None)
+
+    def classify_chunk(chunk):
+        if len(chunk) == 1:
+            return [request_gemini_classification(chunk[0], limiter)]
+        return request_gemini_batch_classification(chunk, limiter)
+
+    def on_error(chunk, exc):
+        failures.append((chunk, exc))
+        return [dict(EMPTY_CLASSIFICATION) for _ in chunk]
+
+    def on_progress(done, total):
+        if progress_callback is not None:
+            sent = min(done * batch_size, len(pending_inputs))
+            progress_callback(min(resolved_rows + sent, len(raw_inputs)), len(raw_inputs))
+
+    tier_start = time.perf_counter()
+    chunk_results = run_concurrent(
+        chunks,
+        classify_chunk,
+        max_workers=max_workers,
+        max_retries=BATCH_MAX_RETRIES,
+        on_error=on_error,
+        progress_callback=on_progress,
+    )
+    if pending_inputs:
+        tier_seconds["gemini"] = time.perf_counter() - tier_start
+
+    failed_keys = set()
+    for chunk, exc in failures:
+        logger.warning("Gemini request for %d transactions failed after retries: %s", len(chunk), exc)
+        failed_keys.update(classification_cache_key(raw_input) for raw_input in chunk)
+
+    fresh = dict(zip(pending_keys, [parsed for chunk in chunk_results for parsed in chunk]))
+    cache.put_many({key: parsed for key, parsed in fresh.items() if is_cacheable(parsed)})
+    parsed_by_key.update(fresh)
+    tier_by_key.update((key, "failed" if key in failed_keys else "gemini") for key in fresh)
+
+    results = []
+    tier_report = {name: {"rows": 0, "seconds": seconds} for name, seconds in tier_seconds.items()}
+    if failed_keys:
+        tier_report["failed"] = {"rows": 0, "seconds": 0.0}
+    for raw_input, key in zip(raw_inputs, keys):
+        result = finalize_classification(raw_input, parsed_by_key[key])
+        result["classified_by"] = tier_by_key[key]
+        tier_report[tier_by_key[key]]["rows"] += 1
+        results.append(result)
+
+    return results, tier_report
+
+def classify_transactions(
+    raw_inputs: list,
+    max_workers: int = BATCH_MAX_WORKERS,
+    requests_per_minute: int = BATCH_REQUESTS_PER_MINUTE,
+    batch_size: int = GEMINI_BATCH_SIZE,
+    tiers: list = (),
+    progress_callback=None,
+    cluster: bool = NEAR_DUPLICATE_CLUSTERING,
+) -> tuple:
+    """
+    Classify many transactions, returning (results, tier_report) with results in input order.
+
+    With cluster, rows are first grouped by near-duplicate signature (see
+    near_duplicates.transaction_signature) and only the first row of each group goes
+    through classify_inputs, unless an earlier batch already classified that signature.
+    Its category and vendor fan back out to the other members, which keep their own
+    raw_input and are reported under a "cluster" tier. The description is shared as a
+    template (near_duplicates.description_template) filled with each member's own PO
+    numbers, amounts and dates; one that cannot be templated stays with its own row.
+    """
+    if not cluster:
+        return classify_inputs(raw_inputs, max_workers, requests_per_minute, batch_size, tiers, progress_callback)
+
+    tier_start = time.perf_counter()
+    signatures, representatives, members = group_by_signature(raw_inputs)
+    cache = get_classification_cache()
+    signature_keys = [classification_cache_key(SIGNATURE_CACHE_PREFIX + signature) for signature in signatures]
+    cached = cache.get_many(signature_keys)
+    pending = [index for index, key in enumerate(signature_keys) if key not in cached]
+    cluster_seconds = time.perf_counter() - tier_start
+
+    def on_progress(done, total):
+        if progress_callback is not None and representatives:
+            resolved = len(representatives) - len(pending) + done
+            progress_callback(len(raw_inputs) * resolved // len(representatives), len(raw_inputs))
+
+    pending_results, pending_report = classify_inputs(
+        [representatives[index] for index in pending],
+        max_workers, requests_per_minute, batch_size, tiers, on_progress,
+    )
+
+    tier_start = time.perf_counter()
+    resolved = {}
+    templates = {}
+    for index, key in enumerate(signature_keys):
+        if key in cached:
+            resolved[index] = dict(finalize_classification(representatives[index], cached[key]), classified_by="cache")
+            templates[index] = cached[key].get("enriched_description")
+    for index, result in zip(pending, pending_results):
+        resolved[index] = result
+        templates[index] = description_template(result["enriched_description"], representatives[index])
+    cache.put_many({
+        signature_keys[index]: {
+            "category": result["category"], "vendor": result["vendor"], "enriched_description": templates[index]
+        }
+        for index, result in zip(pending, pending_results)
+        # Rule results are cheap to recompute and must follow rule edits, so only model answers are kept
+        if result["classified_by"] not in ("failed", "rules") and result["category"] != "Unknown"
+    })
+    classified_here = set(pending)
+
+    tier_report = {name: {"rows": 0, "seconds": stats["seconds"]} for name, stats in pending_report.items()}
+    if cached:
+        tier_report.setdefault("cache", {"rows": 0, "seconds": 0.0})
+    results = []
+    seen = set()
+    for raw_input, index in zip(raw_inputs, members):
+        result = resolved[index]
+        tier = result["classified_by"]
+        if index in seen and tier != "failed":
+            tier = "cluster"
+        if index in seen or index not in classified_here:
+            # Everyone but the row the model actually saw gets the description re-filled from its own text
+            result = dict(result, enriched_description=fill_description(templates[index], raw_input))
+        seen.add(index)
+        results.append(dict(result, raw_input=raw_input, classified_by=tier))
+        tier_report.setdefault(tier, {"rows": 0, "seconds": 0.0})["rows"] += 1
+
+    cluster_seconds += time.perf_counter() - tier_start
+    tier_report.setdefault("cluster", {"rows": 0, "seconds": 0.0})["seconds"] += cluster_seconds
+    return results, tier_report
+
+def classify_job_chunk(raw_inputs: list, settings: dict) -> list:
+    """Classify one background job chunk; failed rows come back as None so a resume retries them"""
+    results, _ = classify_transactions(
+        raw_inputs,
+        max_workers=settings.get("max_workers", BATCH_MAX_WORKERS),
+        requests_per_minute=settings.get("requests_per_minute", BATCH_REQUESTS_PER_MINUTE),
+        batch_size=settings.get("batch_size", GEMINI_BATCH_SIZE),
+        tiers=build_classifier_tiers(
+            settings.get("use_local_model", False),
+            settings.get("local_threshold", LOCAL_MODEL_THRESHOLD),
+            settings.get("use_rules", RULE_ENGINE)
+        ),
+        cluster=settings.get("cluster", NEAR_DUPLICATE_CLUSTERING),
+    )
+    return [None if result["classified_by"] == "failed" else result for result in results]
+
+def merge_tier_reports(total: dict, report: dict) -> dict:
+    """Accumulate a per-chunk tier report into a running total"""
+    for name, stats in report.items():
+        entry = total.setdefault(name, {"rows": 0, "seconds": 0.0})
+        entry["rows"] += stats["rows"]
+        entry["seconds"] += stats["seconds"]
+    return total
+
+def failed_rows(tier_report: dict) -> int:
+    """Rows left unclassified because their model requests kept failing"""
+    return tier_report.get("failed", {}).get("rows", 0)
+
+def signature_compression(tier_report: dict) -> float:
+    """Unique near-duplicate signatures per input row (1.0 when nothing was clustered)"""
+    total_rows = sum(stats["rows"] for stats in tier_report.values())
+    if not total_rows:
+        return 1.0
+    return (total_rows - tier_report.get("cluster", {}).get("rows", 0)) / total_rows
+
+def tier_report_frame(tier_report: dict) -> pd.DataFrame:
+    """Tabulate rows handled and latency per classifier tier"""
+    total_rows = sum(stats["rows"] for stats in tier_report.values()) or 1
+    return pd.DataFrame([
+        {
+            "Tier": name,
+            "Rows": stats["rows"],
+            "Share": f"{stats['rows'] / total_rows:.0%}",
+            "Total Time (s)": round(stats["seconds"], 3),
+            "ms / Row": round(1000 * stats["seconds"] / stats["rows"], 2) if stats["rows"] else None,
+        }
+        for name, stats in tier_report.items()
+    ])
+
+def compute_content_hash(record: dict, batch_id: str, row_index: int) -> str:
+    """
+    Stable hash of a record's upload identity and content, used to make saves idempotent.
+
+    Keyed by the upload batch and the row's position in it, so retrying a save is a no-op
+    while genuine repeats (a monthly subscription, the same daily ride) are kept.
+    """
+    payload = "\x1f".join([str(batch_id), str(row_index)] + [
+        str(record.get(field) or "")
+        for field in ("raw_input", "category", "vendor", "enriched_description")
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def new_batch_id() -> str:
+    """Identity for one upload, passed to every save_to_supabase call made for it"""
+    return uuid.uuid4().hex
+
+def is_retryable_write_error(exc: Exception) -> bool:
+    """Retry rate limits, server errors and dropped connections"""
+    import httpx
+    return is_retryable(exc) or isinstance(exc, httpx.TransportError)
+
+def save_to_supabase(records: list, chunk_size: int = SUPABASE_CHUNK_SIZE,
+                     batch_id: str = None, row_indices=None) -> dict:
+    """
+    Save classification results to Supabase in chunked, idempotent upserts.
+
+    Each row is keyed by batch_id and its index in the upload (row_indices, default
+    0..n-1), so repeating a save with the same batch_id skips rows already present
+    instead of duplicating them. Without a batch_id every call is a new upload.
+    Rows whose classification failed are not saved (they would read as Unknown) and
+    are counted as failed. Returns a report with ok, written, skipped, failed,
+    chunk_seconds (time per chunk) and error.
+    """
+    report = {"ok": True, "written": 0, "skipped": 0, "failed": 0, "chunk_seconds": [], "error": None}
+    batch_id = batch_id or new_batch_id()
+    created_at = datetime.utcnow().isoformat()
+
+    if row_indices is None:
+        row_indices = range(len(records))
+    indexed = [
+        (row_index, record) for row_index, record in zip(row_indices, records)
+        if record.get("classified_by") != "failed"
+    ]
+    report["failed"] = len(records) - len(indexed)
+
+    rows = []
+    dates = extract_dates(pd.Series([record["raw_input"] for _, record in indexed], dtype=object))
+    for (row_index, record), date in zip(indexed, dates):
+        rows.append({
+            "raw_input": record["raw_input"],
+            "category": record["category"],
+            "vendor": record["vendor"],
+            "enriched_description": record["enriched_description"],
+            "content_hash": compute_content_hash(record, batch_id, row_index),
+            "transaction_date": None if pd.isna(date) else date.date().isoformat(),
+            "created_at": created_at
+        })
+
+    def upsert_chunk(chunk):
+        return get_supabase().table("classifications").upsert(
+            chunk, on_conflict="content_hash", ignore_duplicates=True
+        ).execute()
+
+    try:
+        for start in range(0, len(rows), max(1, chunk_size)):
+            chunk = rows[start:start + chunk_size]
+            chunk_start = time.perf_counter()
+            response = retry_with_backoff(
+                upsert_chunk, chunk,
+                max_retries=BATCH_MAX_RETRIES,
+                retry_on=is_retryable_write_error,
+            )
+            written = len(response.data or [])
+            report["written"] += written
+            report["skipped"] += len(chunk) - written
+            report["chunk_seconds"].append(time.perf_counter() - chunk_start)
+            get_metrics().observe("supabase.save_chunk", report["chunk_seconds"][-1])
+    except Exception as e:
+        logger.error("Error saving to Supabase: %s", e)
+        report["ok"] = False
+        report["error"] = str(e)
+
+    return report
+
+def iter_supabase_pages(
+    page_size: int = SUPABASE_PAGE_SIZE,
+    ascending: bool = False,
+    after: int = None,
+    max_rows: int = None,
+):
+    """
+    Yield pages of classification rows using keyset pagination on seq.
+
+    seq is unique and assigned by the database at insert, so each page is a single
+    index range starting strictly after the last row of the previous one and deep
+    pages cost the same as the first (a (created_at, id) cursor needs an OR filter
+    the planner cannot seek on, and rows of one save share a created_at). after
+    starts the scan past that seq, in the paging direction.
+    """
+    direction = "asc" if ascending else "desc"
+    cursor = after
+    fetched = 0
+
+    while max_rows is None or fetched < max_rows:
+        limit = page_size if max_rows is None else min(page_size, max_rows - fetched)
+        query = get_supabase().table("classifications").select("*")
+        query.params = query.params.add("order", f"seq.{direction}")
+        if cursor is not None:
+            query = query.gt("seq", cursor) if ascending else query.lt("seq", cursor)
+        rows = query.limit(limit).execute().data
+        if not rows:
+            return
+        yield rows
+        fetched += len(rows)
+        if len(rows) < limit:
+            return
+        cursor = rows[-1]["seq"]
+
+@timed(get_metrics, "supabase.load")
+def load_from_supabase(limit: int = 100, progress_callback=None) -> pd.DataFrame:
+    """Load the most recent classification results from Supabase (limit=None loads all)"""
+    frames = []
+    loaded = 0
+    for page in iter_supabase_pages(max_rows=limit):
+        frames.append(pd.DataFrame(page))
+        loaded += len(page)
+        if progress_callback is not None:
+            progress_callback(loaded)
+    if frames:
+        return pd.concat(frames, ignore_index=True)
+    return pd.DataFrame()
+
+@timed(get_metrics, "supabase.refresh")
+def refresh_from_supabase(df: pd.DataFrame, progress_callback=None) -> tuple:
+    """
+    Merge rows inserted since df was loaded.
+
+    The watermark is seq, which the database assigns at insert, rather than the
+    client-stamped created_at, so a slow save stamped before a faster one is not
+    left behind. seq is drawn when a row is inserted but only visible once its save
+    commits, so a save still committing during the previous load can surface later
+    with a seq below the watermark: the scan therefore starts REFRESH_SEQ_OVERLAP
+    below it and rows already in df are dropped by id. A save that commits more than
+    that many seq values late is still missed until the next full load. Refresh time
+    depends on the number of new rows plus the overlap, not the table size.
+    Returns (merged_df, new_rows).
+    """
+    if df.empty or "seq" not in df.columns or df["seq"].isna().all():
+        fresh = load_from_supabase(limit=None, progress_callback=progress_callback)
+        return fresh, len(fresh)
+
+    frames = []
+    fetched = 0
+    after = int(df["seq"].max()) - REFRESH_SEQ_OVERLAP
+    for page in iter_supabase_pages(ascending=True, after=after):
+        frames.append(pd.DataFrame(page))
+        fetched += len(page)
+        if progress_callback is not None:
+            progress_callback(fetched)
+
+    if not frames:
+        return df, 0
+
+    new_df = pd.concat(frames, ignore_index=True)
+    new_df = new_df[~new_df["id"].isin(df["id"])]
+    if new_df.empty:
+        return df, 0
+
+    # Newest first, matching load_from_supabase ordering
+    new_df = new_df.iloc[::-1]
+    return pd.concat([new_df, df], ignore_index=True), len(new_df)
+
+# Supported date layouts in precedence order, each with the formats tried for it
+DATE_PATTERNS = {
+    "iso": re.compile(r"\d{4}-\d{2}-\d{2}"),
+    "slash": re.compile(r"\d{2}/\d{2}/\d{4}"),
+    "dash": re.compile(r"\d{2}-\d{2}-\d{4}"),
+}
+DATE_FORMATS = {
+    "iso": ["%Y-%m-%d"],
+    "slash": ["%m/%d/%Y", "%d/%m/%Y"],
+    "dash": ["%m-%d-%Y", "%d-%m-%Y"],
+}
+
+def extract_dates(texts: pd.Series) -> pd.Series:
+    """
+    Vectorized date extraction for a whole column as datetime64 (NaT when absent).
+
+    Layouts are tried in DATE_PATTERNS order on the first match of each, so an ISO
+    date wins over an earlier slash date and an invalid match falls through to the
+    next layout, as in extract_date.
+    """
+    texts = texts.astype(str)
+    dates = pd.Series(pd.NaT, index=texts.index, dtype="datetime64[ns]")
+    for group, pattern in DATE_PATTERNS.items():
+        found = texts.str.extract(f"({pattern.pattern})", expand=False)
+        for fmt in DATE_FORMATS[group]:
+            dates = dates.fillna(pd.to_datetime(found, format=fmt, errors="coerce"))
+    return dates
+
+def extract_date(text: str):
+    """Extract date from transaction text (use extract_dates for a column)"""
+    text = str(text)
+    for group, pattern in DATE_PATTERNS.items():
+        match = pattern.search(text)
+        if not match:
+            continue
+        for fmt in DATE_FORMATS[group]:
+            try:
+                return pd.Timestamp(datetime.strptime(match.group(), fmt))
+            except ValueError:
+                continue
+    return None
+
+def transaction_dates(df: pd.DataFrame) -> pd.Series:
+    """Transaction dates for df, read from the stored column and parsed from text only where missing"""
+    if "transaction_date" not in df.columns:
+        return extract_dates(df["raw_input"])
+    dates = pd.to_datetime(df["transaction_date"], errors="coerce")
+    missing = dates.isna()
+    if missing.any():
+        dates[missing] = extract_dates(df.loc[missing, "raw_input"])
+    return dates
+
+
+@timed(get_metrics, "analytics.summary")
+def summarize_classifications(
+    df: pd.DataFrame,
+    top_n: int = ANALYTICS_TOP_N,
+    matrix_n: int = ANALYTICS_MATRIX_N,
+) -> dict:
+    """Analytics aggregates for loaded rows, in the same shape get_analytics_summary returns"""
+    category_counts = df["category"].value_counts()
+    vendor_counts = df["vendor"].value_counts()
+    # Categorical columns also count their unused categories, as zeros
+    category_counts = category_counts[category_counts > 0].head(top_n)
+    vendor_counts = vendor_counts[vendor_counts > 0].head(top_n)
+    dates = transaction_dates(df).dropna()
+    daily_counts = dates.groupby(dates.dt.date).size()
+    pair_counts = df.groupby(["category", "vendor"], observed=True).size().nlargest(matrix_n)
+
+    return {
+        "total": len(df),
+        "categories": int(df["category"].nunique()),
+        "vendors": int(df["vendor"].nunique()),
+        "top_category": df["category"].mode()[0] if not df["category"].isnull().all() else None,
+        "category_counts": [
+            {"category": category, "count": int(count)} for category, count in category_counts.items()
+        ],
+        "vendor_counts": [
+            {"vendor": vendor, "count": int(count)} for vendor, count in vendor_counts.items()
+        ],
+        "daily_counts": [
+            {"day": day.isoformat(), "count": int(count)} for day, count in daily_counts.items()
+        ],
+        "category_vendor": [
+            {"category": category, "vendor": vendor, "count": int(count)}
+            for (category, vendor), count in pair_counts.items()
+        ],
+    }
+
+@timed(get_metrics, "analytics.fetch")
+def fetch_analytics_summary(top_n: int = ANALYTICS_TOP_N, matrix_n: int = ANALYTICS_MATRIX_N) -> dict:
+    """
+    Analytics aggregates over the whole classifications table, computed in Postgres.
+
+    Reads the trigger-maintained rollups through the get_analytics_summary RPC (see
+    supabase_setup.sql), so the response is a few KB however many rows are stored.
+    """
+    rows = get_supabase().rpc(
+        "get_analytics_summary", {"top_n": top_n, "matrix_n": matrix_n}
+    ).execute().data
+    return rows[0]["summary"]
+
+
+@timed(get_metrics, "report.pdf")
+def create_pdf_report(
+    df: pd.DataFrame,
+    title: str = "Spend Enrichment Report",
+    summary: dict = None,
+    progress_callback=None,
+) -> bytes:
+    """
+    Generate PDF report from dataframe: a summary page plus a dense detail table.
+
+    summary defaults to summarize_classifications(df); pass a precomputed one (e.g. from
+    the analytics memo or get_analytics_summary) to skip the aggregation.
+    """
+    from pdf_report import build_pdf_report, find_unicode_font
+
+    if PDF_FONT_PATH:
+        font_path, bold_font_path = PDF_FONT_PATH, PDF_BOLD_FONT_PATH
+    else:
+        font_path, bold_font_path = find_unicode_font()
+
+    return build_pdf_report(
+        df,
+        title,
+        summary if summary is not None else summarize_classifications(df),
+        font_path=font_path,
+        bold_font_path=bold_font_path,
+        max_detail_rows=PDF_MAX_DETAIL_ROWS or None,
+        progress_callback=progress_callback,
+    )
@@ -0,0 +1,117 @@
+"""
+Streaming CSV ingestion
+Chunked reads of large uploads with classification results spilled to Parquet on disk
+"""
+
+import os
+import tempfile
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+RESULT_SCHEMA = pa.schema([
+    ("raw_input", pa.string()),
+    ("category", pa.string()),
+    ("vendor", pa.string()),
+    ("enriched_description", pa.string()),
+    ("classified_by", pa.string()),
+])
+
+
+def iter_raw_input_chunks(file, chunksize: int = 5000):
+    """
+    Yield lists of raw_input strings from a CSV file object, chunksize rows at a time.
+
+    Only the raw_input column is parsed (or the only column, for single-column files),
+    so memory use depends on chunksize rather than the file size.
+    """
+    header = pd.read_csv(file, nrows=0).columns
+    file.seek(0)
+    if "raw_input" in header:
+        column = "raw_input"
+    elif len(header) == 1:
+        column = header[0]
+    else:
+        raise ValueError("CSV must have 'raw_input' column")
+
+    for chunk in pd.read_csv(file, usecols=[column], chunksize=chunksize):
+        yield chunk[column].astype(str).tolist()
+
+
+def remove_spill(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class SpillHandle:
+    """
+    Owner of a finished spill file.
+
+    The file is removed by discard(), or once the handle is garbage collected (as when
+    the session holding it ends) or the process exits, whichever comes first.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._finalizer = weakref.finalize(self, remove_spill, path)
+
+    def discard(self) -> None:
+        self._finalizer()
+
+
+class ResultSpillWriter:
+    """
+    Append classification results to a Parquet file instead of keeping them in memory.
+
+    Without a path, results go to a temporary file in spill_dir that is deleted if the
+    with block exits with an error; call handle() on success to keep it.
+    """
+
+    def __init__(self, path: str = None, spill_dir: str = None):
+        self.temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="batch_results_", suffix=".parquet", dir=spill_dir)
+            os.close(fd)
+        self.path = path
+        self.rows = 0
+        self._writer = pq.ParquetWriter(path, RESULT_SCHEMA, compression="zstd")
+
+    def write(self, records: list) -> None:
+        """Write one chunk of result dicts as a Parquet row group"""
+        if records:
+            self._writer.write_table(pa.Table.from_pylist(records, schema=RESULT_SCHEMA))
+            self.rows += len(records)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def handle(self) -> SpillHandle:
+        """Hand the finished file to a SpillHandle that removes it when discarded"""
+        return SpillHandle(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            self.close()
+        finally:
+            if exc_type is not None and self.temporary:
+                remove_spill(self.path)
+
+
+def read_spill_preview(path: str, rows: int = 100) -> pd.DataFrame:
+    """First rows of a spilled result file"""
+    batches = pq.ParquetFile(path).iter_batches(batch_size=rows)
+    first = next(batches, None)
+    return first.to_pandas() if first is not None else pd.DataFrame(columns=RESULT_SCHEMA.names)
+
+
+def iter_spill_records(path: str, batch_size: int = 5000):
+    """Yield spilled results as lists of record dicts, batch_size at a time"""
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield batch.to_pylist()
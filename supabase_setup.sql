@@ -9,6 +9,9 @@
       - `vendor` (text) - Identified or assigned vendor name
       - `enriched_description` (text) - Human-readable description
       - `created_at` (timestamptz) - Timestamp of classification
+      - `content_hash` (text, unique) - Hash of the upload batch, row index and record content, used for idempotent upserts
+      - `transaction_date` (date) - Date found in the transaction text, extracted when saved
+      - `seq` (bigserial, unique) - Insert order assigned by the database, the keyset for paged loads and incremental refresh
 
   2. Security
     - Enable RLS on `classifications` table
@@ -19,7 +22,19 @@
     - Add indexes on created_at, category, and vendor for fast queries
     - Support analytics and reporting workloads
 
-  4. Notes
+  4. Vendor Master
+    - `vendor_master` lists canonical vendor names for fuzzy vendor correction
+
+  5. Analytics Rollups
+    - `classification_pair_counts` keeps a row count per (category, vendor) pair
+    - `classification_daily_counts` keeps a row count per transaction_date
+    - Both are updated incrementally by statement-level triggers on `classifications`
+    - `get_analytics_summary(top_n, matrix_n)` returns every Analytics tab aggregate as one
+      small JSON document computed from the rollups, so the dashboard covers the whole table
+
+  6. Notes
+    - Safe to re-run: tables, columns, indexes and functions are created if missing and
+      policies and triggers are dropped and recreated
     - This table stores all classified transactions
     - Used for analytics, reports, and historical tracking
     - RLS policies allow demo usage while maintaining security
@@ -32,13 +47,22 @@ CREATE TABLE IF NOT EXISTS classifications (
   category text,
   vendor text,
   enriched_description text,
-  created_at timestamptz DEFAULT now()
+  created_at timestamptz DEFAULT now(),
+  content_hash text,
+  transaction_date date,
+  seq bigserial
 );
 
+-- Upgrade existing deployments created before these columns existed
+ALTER TABLE classifications ADD COLUMN IF NOT EXISTS content_hash text;
+ALTER TABLE classifications ADD COLUMN IF NOT EXISTS transaction_date date;
+ALTER TABLE classifications ADD COLUMN IF NOT EXISTS seq bigserial;
+
 -- Enable Row Level Security
 ALTER TABLE classifications ENABLE ROW LEVEL SECURITY;
 
 -- Policy: Allow all operations for authenticated users
+DROP POLICY IF EXISTS "Allow all operations for authenticated users" ON classifications;
 CREATE POLICY "Allow all operations for authenticated users"
   ON classifications
   FOR ALL
@@ -47,6 +71,7 @@ CREATE POLICY "Allow all operations for authenticated users"
   WITH CHECK (true);
 
 -- Policy: Allow read access for anonymous users (demo purposes)
+DROP POLICY IF EXISTS "Allow read for anon users" ON classifications;
 CREATE POLICY "Allow read for anon users"
   ON classifications
   FOR SELECT
@@ -55,6 +80,7 @@ CREATE POLICY "Allow read for anon users"
 
 -- Policy: Allow insert for anonymous users (demo purposes)
 -- NOTE: In production, you may want to remove this and require authentication
+DROP POLICY IF EXISTS "Allow insert for anon users" ON classifications;
 CREATE POLICY "Allow insert for anon users"
   ON classifications
   FOR INSERT
@@ -65,6 +91,16 @@ CREATE POLICY "Allow insert for anon users"
 CREATE INDEX IF NOT EXISTS idx_classifications_created_at
   ON classifications(created_at DESC);
 
+-- Replaced by the seq index below
+DROP INDEX IF EXISTS idx_classifications_created_at_id;
+
+-- Keyset pagination on seq for paged loads and incremental refresh (server-assigned, unlike created_at)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_classifications_seq
+  ON classifications(seq);
+
+CREATE INDEX IF NOT EXISTS idx_classifications_transaction_date
+  ON classifications(transaction_date);
+
 CREATE INDEX IF NOT EXISTS idx_classifications_category
   ON classifications(category);
 
@@ -74,16 +110,258 @@ CREATE INDEX IF NOT EXISTS idx_classifications_vendor
 CREATE INDEX IF NOT EXISTS idx_classifications_category_vendor
   ON classifications(category, vendor);
 
--- Create view for analytics (optional)
+-- Unique content hash: re-saving a row from the same upload is a no-op (ON CONFLICT DO NOTHING),
+-- while identical rows from different uploads or positions are kept
+CREATE UNIQUE INDEX IF NOT EXISTS idx_classifications_content_hash
+  ON classifications(content_hash);
+
+-- Vendor master used for fuzzy vendor correction (set VENDOR_MASTER_TABLE=vendor_master)
+CREATE TABLE IF NOT EXISTS vendor_master (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  vendor text NOT NULL UNIQUE,
+  created_at timestamptz DEFAULT now()
+);
+
+ALTER TABLE vendor_master ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all operations on vendor_master for authenticated users" ON vendor_master;
+CREATE POLICY "Allow all operations on vendor_master for authenticated users"
+  ON vendor_master
+  FOR ALL
+  TO authenticated
+  USING (true)
+  WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow read on vendor_master for anon users" ON vendor_master;
+CREATE POLICY "Allow read on vendor_master for anon users"
+  ON vendor_master
+  FOR SELECT
+  TO anon
+  USING (true);
+
+-- Analytics rollups, maintained by the triggers below (missing category/vendor stored as '')
+CREATE TABLE IF NOT EXISTS classification_pair_counts (
+  category text NOT NULL,
+  vendor text NOT NULL,
+  transaction_count bigint NOT NULL,
+  first_transaction timestamptz,
+  last_transaction timestamptz,
+  PRIMARY KEY (category, vendor)
+);
+
+CREATE TABLE IF NOT EXISTS classification_daily_counts (
+  day date PRIMARY KEY,
+  transaction_count bigint NOT NULL
+);
+
+ALTER TABLE classification_pair_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE classification_daily_counts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow read on classification_pair_counts" ON classification_pair_counts;
+CREATE POLICY "Allow read on classification_pair_counts"
+  ON classification_pair_counts
+  FOR SELECT
+  TO authenticated, anon
+  USING (true);
+
+DROP POLICY IF EXISTS "Allow read on classification_daily_counts" ON classification_daily_counts;
+CREATE POLICY "Allow read on classification_daily_counts"
+  ON classification_daily_counts
+  FOR SELECT
+  TO authenticated, anon
+  USING (true);
+
+-- Apply one statement's inserted/deleted rows to the rollups as count deltas.
+-- Runs as the table owner so anonymous inserts can maintain the rollups through RLS.
+CREATE OR REPLACE FUNCTION classification_rollups_apply()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    UPDATE classification_pair_counts p
+    SET transaction_count = p.transaction_count - o.n
+    FROM (
+      SELECT coalesce(category, '') AS category, coalesce(vendor, '') AS vendor, count(*) AS n
+      FROM old_rows
+      GROUP BY 1, 2
+    ) o
+    WHERE p.category = o.category AND p.vendor = o.vendor;
+
+    UPDATE classification_daily_counts d
+    SET transaction_count = d.transaction_count - o.n
+    FROM (
+      SELECT transaction_date AS day, count(*) AS n
+      FROM old_rows
+      WHERE transaction_date IS NOT NULL
+      GROUP BY 1
+    ) o
+    WHERE d.day = o.day;
+
+    DELETE FROM classification_pair_counts WHERE transaction_count <= 0;
+    DELETE FROM classification_daily_counts WHERE transaction_count <= 0;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO classification_pair_counts AS p
+      (category, vendor, transaction_count, first_transaction, last_transaction)
+    SELECT coalesce(category, ''), coalesce(vendor, ''), count(*), min(created_at), max(created_at)
+    FROM new_rows
+    GROUP BY 1, 2
+    ON CONFLICT (category, vendor) DO UPDATE SET
+      transaction_count = p.transaction_count + EXCLUDED.transaction_count,
+      first_transaction = least(p.first_transaction, EXCLUDED.first_transaction),
+      last_transaction = greatest(p.last_transaction, EXCLUDED.last_transaction);
+
+    INSERT INTO classification_daily_counts AS d (day, transaction_count)
+    SELECT transaction_date, count(*)
+    FROM new_rows
+    WHERE transaction_date IS NOT NULL
+    GROUP BY 1
+    ON CONFLICT (day) DO UPDATE SET
+      transaction_count = d.transaction_count + EXCLUDED.transaction_count;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+-- Rebuild both rollups from scratch (backfills existing data; first/last timestamps
+-- only ever widen incrementally, so run this after large deletes to tighten them)
+CREATE OR REPLACE FUNCTION refresh_classification_rollups()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  DELETE FROM classification_pair_counts;
+  INSERT INTO classification_pair_counts
+    (category, vendor, transaction_count, first_transaction, last_transaction)
+  SELECT coalesce(category, ''), coalesce(vendor, ''), count(*), min(created_at), max(created_at)
+  FROM classifications
+  GROUP BY 1, 2;
+
+  DELETE FROM classification_daily_counts;
+  INSERT INTO classification_daily_counts (day, transaction_count)
+  SELECT transaction_date, count(*)
+  FROM classifications
+  WHERE transaction_date IS NOT NULL
+  GROUP BY 1;
+END;
+$$;
+
+-- Only the table owner (and this setup script) may rebuild the rollups; a SECURITY DEFINER
+-- function is otherwise executable by everyone, including anonymous API clients
+REVOKE EXECUTE ON FUNCTION refresh_classification_rollups() FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION classification_rollups_truncate()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  DELETE FROM classification_pair_counts;
+  DELETE FROM classification_daily_counts;
+  RETURN NULL;
+END;
+$$;
+
+-- Statement-level triggers see each multi-row insert as one transition table,
+-- so a 500-row chunked upsert costs one rollup update, not 500
+DROP TRIGGER IF EXISTS classifications_rollups_insert ON classifications;
+CREATE TRIGGER classifications_rollups_insert
+  AFTER INSERT ON classifications
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION classification_rollups_apply();
+
+DROP TRIGGER IF EXISTS classifications_rollups_update ON classifications;
+CREATE TRIGGER classifications_rollups_update
+  AFTER UPDATE ON classifications
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION classification_rollups_apply();
+
+DROP TRIGGER IF EXISTS classifications_rollups_delete ON classifications;
+CREATE TRIGGER classifications_rollups_delete
+  AFTER DELETE ON classifications
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION classification_rollups_apply();
+
+DROP TRIGGER IF EXISTS classifications_rollups_truncate ON classifications;
+CREATE TRIGGER classifications_rollups_truncate
+  AFTER TRUNCATE ON classifications
+  FOR EACH STATEMENT EXECUTE FUNCTION classification_rollups_truncate();
+
+-- Backfill rollups for rows that existed before the triggers
+SELECT refresh_classification_rollups();
+
+-- Every Analytics tab aggregate in one round trip (a few KB regardless of table size)
+-- Returned as a one-row table so PostgREST clients always receive a JSON array
+CREATE OR REPLACE FUNCTION get_analytics_summary(top_n integer DEFAULT 10, matrix_n integer DEFAULT 20)
+RETURNS TABLE (summary json)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH pairs AS (
+    SELECT nullif(category, '') AS category, nullif(vendor, '') AS vendor, transaction_count
+    FROM classification_pair_counts
+  ),
+  by_category AS (
+    SELECT category, sum(transaction_count)::bigint AS count
+    FROM pairs
+    WHERE category IS NOT NULL
+    GROUP BY category
+  ),
+  by_vendor AS (
+    SELECT vendor, sum(transaction_count)::bigint AS count
+    FROM pairs
+    WHERE vendor IS NOT NULL
+    GROUP BY vendor
+  )
+  SELECT json_build_object(
+    'total', (SELECT coalesce(sum(transaction_count), 0)::bigint FROM pairs),
+    'categories', (SELECT count(*) FROM by_category),
+    'vendors', (SELECT count(*) FROM by_vendor),
+    'top_category', (SELECT category FROM by_category ORDER BY count DESC, category LIMIT 1),
+    'category_counts', coalesce((
+      SELECT json_agg(t ORDER BY t.count DESC, t.category)
+      FROM (SELECT category, count FROM by_category ORDER BY count DESC, category LIMIT top_n) t
+    ), '[]'::json),
+    'vendor_counts', coalesce((
+      SELECT json_agg(t ORDER BY t.count DESC, t.vendor)
+      FROM (SELECT vendor, count FROM by_vendor ORDER BY count DESC, vendor LIMIT top_n) t
+    ), '[]'::json),
+    'daily_counts', coalesce((
+      SELECT json_agg(t ORDER BY t.day)
+      FROM (SELECT day, transaction_count AS count FROM classification_daily_counts) t
+    ), '[]'::json),
+    'category_vendor', coalesce((
+      SELECT json_agg(t ORDER BY t.count DESC, t.category, t.vendor)
+      FROM (
+        SELECT category, vendor, transaction_count AS count
+        FROM pairs
+        WHERE category IS NOT NULL AND vendor IS NOT NULL
+        ORDER BY transaction_count DESC, category, vendor
+        LIMIT matrix_n
+      ) t
+    ), '[]'::json)
+  );
+$$;
+
+GRANT EXECUTE ON FUNCTION get_analytics_summary(integer, integer) TO authenticated, anon;
+
+-- Create view for analytics (optional); reads the rollup instead of scanning classifications
 CREATE OR REPLACE VIEW classification_summary AS
 SELECT
-  category,
-  vendor,
-  COUNT(*) as transaction_count,
-  MIN(created_at) as first_transaction,
-  MAX(created_at) as last_transaction
-FROM classifications
-GROUP BY category, vendor
+  nullif(category, '') as category,
+  nullif(vendor, '') as vendor,
+  transaction_count,
+  first_transaction,
+  last_transaction
+FROM classification_pair_counts
 ORDER BY transaction_count DESC;
 
 -- Grant access to the view
@@ -98,3 +376,6 @@ COMMENT ON COLUMN classifications.category IS 'Business category assigned by AI
 COMMENT ON COLUMN classifications.vendor IS 'Vendor name extracted or assigned (e.g., "Uber", "Amazon Web Services")';
 COMMENT ON COLUMN classifications.enriched_description IS 'Human-readable description generated by AI';
 COMMENT ON COLUMN classifications.created_at IS 'Timestamp when the classification was created';
+COMMENT ON COLUMN classifications.transaction_date IS 'Date parsed from raw_input at save time (null when the text has no date)';
+COMMENT ON COLUMN classifications.content_hash IS 'SHA-256 of the upload batch id, row index, raw_input, category, vendor and enriched_description; makes retried saves idempotent';
+COMMENT ON COLUMN classifications.seq IS 'Insert order assigned by the database; keyset for paged loads and the watermark for incremental refresh';
@@ -0,0 +1,177 @@
+"""
+Spend classifier training pipeline
+Script version of Finetune_BERT.ipynb tuned for throughput: dynamic padding with
+length-bucketed batches, parallel tokenization and an on-disk tokenized dataset cache
+keyed by tokenizer and data hash.
+
+Usage:
+    python train_bert.py --data-dir . --output ./bert-spend-cls-final
+    python train_bert.py --padding max_length   # notebook baseline, for before/after samples/sec
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import pandas as pd
+import torch
+from datasets import Dataset, load_from_disk
+from transformers import (
+    AutoTokenizer,
+    BertForSequenceClassification,
+    DataCollatorWithPadding,
+    Trainer,
+    TrainingArguments,
+    default_data_collator,
+)
+
+from bert_classifier import compute_metrics
+
+TEXT_COLUMN = "Raw Input"
+LABEL_COLUMN = "Category"
+SPLITS = ("train", "val", "test")
+
+# Bumped when the tokenized layout changes, so stale on-disk copies are rebuilt
+TOKENIZED_CACHE_VERSION = 2
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def tokenizer_hash(tokenizer) -> str:
+    """Hash of the tokenizer class and vocabulary, so a different tokenizer never reuses the cache"""
+    payload = json.dumps([type(tokenizer).__name__, sorted(tokenizer.get_vocab().items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_tokenized_split(split, csv_path, tokenizer, label2id, args):
+    """Tokenize one split, reusing the on-disk copy when tokenizer, data and settings are unchanged"""
+    cache_key = hashlib.sha256(json.dumps([
+        TOKENIZED_CACHE_VERSION, tokenizer_hash(tokenizer), file_hash(csv_path), label2id,
+        args.padding, args.max_length,
+    ]).encode("utf-8")).hexdigest()[:16]
+    cache_path = os.path.join(args.cache_dir, f"{split}-{cache_key}")
+    if os.path.isdir(cache_path):
+        print(f"{split}: using cached tokens from {cache_path}")
+        return load_from_disk(cache_path)
+
+    df = pd.read_csv(csv_path)
+    df["label"] = df[LABEL_COLUMN].map(label2id)
+    unseen = int(df["label"].isna().sum())
+    if unseen:
+        print(f"{split}: dropping {unseen:,} rows whose category is not in the training labels")
+    df = df[[TEXT_COLUMN, "label"]].dropna()
+    # map() left the labels float64 wherever a row was unmapped; the loss wants integers
+    df["label"] = df["label"].astype("int64")
+    dataset = Dataset.from_pandas(df, preserve_index=False)
+
+    def tokenize(batch):
+        encoded = tokenizer(
+            batch[TEXT_COLUMN],
+            padding="max_length" if args.padding == "max_length" else False,
+            truncation=True,
+            max_length=args.max_length,
+        )
+        # Stored so group_by_length does not have to re-measure every sample
+        encoded["length"] = [len(ids) for ids in encoded["input_ids"]]
+        return encoded
+
+    dataset = dataset.map(
+        tokenize,
+        batched=True,
+        num_proc=args.num_proc if len(dataset) > 1000 else None,
+        remove_columns=[TEXT_COLUMN],
+    )
+    dataset.save_to_disk(cache_path)
+    return dataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=".", help="Directory with train.csv, val.csv and test.csv")
+    parser.add_argument("--model-name", default="bert-base-uncased")
+    parser.add_argument("--output", default="./bert-spend-cls-final")
+    parser.add_argument("--cache-dir", default=".cache/tokenized")
+    parser.add_argument("--padding", choices=["dynamic", "max_length"], default="dynamic")
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--epochs", type=float, default=3)
+    parser.add_argument("--max-steps", type=int, default=-1, help="Stop early, e.g. for quick throughput runs")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=2e-5)
+    parser.add_argument("--num-proc", type=int, default=os.cpu_count(), help="Tokenization processes")
+    parser.add_argument("--dataloader-workers", type=int, default=min(4, os.cpu_count() or 1))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    csv_paths = {split: os.path.join(args.data_dir, f"{split}.csv") for split in SPLITS}
+
+    labels = sorted(pd.read_csv(csv_paths["train"], usecols=[LABEL_COLUMN])[LABEL_COLUMN].dropna().unique())
+    label2id = {label: i for i, label in enumerate(labels)}
+    id2label = {i: label for label, i in label2id.items()}
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name)
+    datasets = {
+        split: load_tokenized_split(split, path, tokenizer, label2id, args)
+        for split, path in csv_paths.items()
+    }
+
+    model = BertForSequenceClassification.from_pretrained(
+        args.model_name, num_labels=len(labels), id2label=id2label, label2id=label2id
+    )
+
+    dynamic = args.padding == "dynamic"
+    training_args = TrainingArguments(
+        output_dir="./bert-spend-cls",
+        eval_strategy="epoch",
+        save_strategy="epoch",
+        learning_rate=args.learning_rate,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.batch_size * 2,
+        num_train_epochs=args.epochs,
+        max_steps=args.max_steps,
+        weight_decay=0.01,
+        logging_dir="./logs",
+        load_best_model_at_end=True,
+        metric_for_best_model="accuracy",
+        group_by_length=dynamic,
+        length_column_name="length",
+        dataloader_num_workers=args.dataloader_workers,
+        dataloader_pin_memory=torch.cuda.is_available(),
+        dataloader_persistent_workers=args.dataloader_workers > 0,
+        report_to=[],
+    )
+
+    trainer = Trainer(
+        model=model,
+        args=training_args,
+        train_dataset=datasets["train"],
+        eval_dataset=datasets["val"],
+        tokenizer=tokenizer,
+        data_collator=DataCollatorWithPadding(tokenizer) if dynamic else default_data_collator,
+        compute_metrics=compute_metrics,
+    )
+
+    train_metrics = trainer.train().metrics
+    test_metrics = trainer.evaluate(datasets["test"], metric_key_prefix="test")
+
+    trainer.save_model(args.output)
+    tokenizer.save_pretrained(args.output)
+
+    print(f"\npadding={args.padding}")
+    print(f"train samples/sec: {train_metrics['train_samples_per_second']:.1f}")
+    print(f"test  samples/sec: {test_metrics['test_samples_per_second']:.1f}")
+    print(f"test accuracy: {test_metrics['test_accuracy']:.4f}  f1: {test_metrics['test_f1']:.4f}")
+    print(f"Saved model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
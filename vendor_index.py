@@ -0,0 +1,102 @@
+"""
+Vendor master index
+Character-trigram inverted index for fuzzy vendor lookup against large vendor lists
+"""
+
+import functools
+import heapq
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_vendor(name: str) -> str:
+    """Case- and whitespace-insensitive form of a vendor name"""
+    return _WHITESPACE.sub(" ", str(name)).strip().casefold()
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of text, padded so short names still produce grams"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class VendorIndex:
+    """
+    Fuzzy vendor matcher over a vendor master list.
+
+    Candidates come from a trigram inverted index (ranked by Dice overlap), and only
+    the top few are re-scored with difflib's ratio, so the cutoff means the same as in
+    difflib.get_close_matches while lookup cost stays flat as the list grows.
+    Candidate generation reads posting lists rarest-first and stops once
+    posting_budget vendor ids have been counted, so very common trigrams never turn
+    a lookup into a full scan. Recent lookups are memoized.
+    """
+
+    def __init__(
+        self,
+        vendors: list,
+        cutoff: float = 0.6,
+        max_candidates: int = 20,
+        posting_budget: int = 4000,
+        memo_size: int = 10_000,
+    ):
+        self.vendors = list(dict.fromkeys(v for v in vendors if v))
+        self.cutoff = cutoff
+        self.max_candidates = max_candidates
+        self.posting_budget = posting_budget
+        self._normalized = [normalize_vendor(v) for v in self.vendors]
+        self._gram_counts = []
+        self._postings = defaultdict(list)
+        for vendor_id, name in enumerate(self._normalized):
+            grams = trigrams(name)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(vendor_id)
+        self._memo = functools.lru_cache(maxsize=memo_size)(self._lookup)
+
+    def __len__(self) -> int:
+        return len(self.vendors)
+
+    def match(self, name: str) -> Optional[str]:
+        """Return the closest known vendor scoring at least cutoff, or None"""
+        if not name:
+            return None
+        return self._memo(normalize_vendor(name))
+
+    def _candidates(self, query: str) -> list:
+        grams = trigrams(query)
+        postings = sorted(
+            (self._postings[gram] for gram in grams if gram in self._postings),
+            key=len,
+        )
+        overlap = Counter()
+        counted = 0
+        for i, posting in enumerate(postings):
+            if i >= 3 and counted + len(posting) > self.posting_budget:
+                break
+            overlap.update(posting)
+            counted += len(posting)
+
+        query_grams = len(grams)
+        return heapq.nlargest(
+            self.max_candidates,
+            overlap,
+            key=lambda vendor_id: 2 * overlap[vendor_id] / (query_grams + self._gram_counts[vendor_id]),
+        )
+
+    def _lookup(self, query: str) -> Optional[str]:
+        matcher = SequenceMatcher()
+        matcher.set_seq2(query)
+        best_id, best_score = None, self.cutoff
+        for vendor_id in self._candidates(query):
+            matcher.set_seq1(self._normalized[vendor_id])
+            if (matcher.real_quick_ratio() >= best_score
+                    and matcher.quick_ratio() >= best_score):
+                score = matcher.ratio()
+                if score >= best_score and (best_id is None or score > best_score):
+                    best_id, best_score = vendor_id, score
+        return self.vendors[best_id] if best_id is not None else None